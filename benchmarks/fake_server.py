@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""本地欧瑞博SSL服务器替身
+
+使用与组件相同的HomematePacket封包（pk/dk类型、CRC32、AES-ECB，
+pk包使用DEFAULT_KEY，dk包使用下发的会话密钥），实现
+CMD_HELLO/LOGIN/CONTROL/STATE_UPDATE/HEARTBEAT，并可在登录后按批次
+推送设备状态更新。推送数据中的sendTs为服务器发送时刻（time.time()）。
+
+独立运行：
+    python benchmarks/fake_server.py --cert c.pem --key k.pem --devices 50 --bursts 20 --burst-size 100
+启动后在标准输出打印一行 "PORT <端口>"。
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import ssl
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "custom_components"))
+
+from ORVIBO_Device_Control.packet import HomematePacket  # noqa: E402
+from ORVIBO_Device_Control.const import (  # noqa: E402
+    DEFAULT_KEY,
+    CMD_HELLO, CMD_LOGIN, CMD_CONTROL, CMD_STATE_UPDATE, CMD_HEARTBEAT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_ALPHABET = string.ascii_letters + string.digits
+
+
+def device_id(index: int) -> str:
+    """第index个模拟设备的deviceId"""
+    return f"bench{index:027d}"
+
+
+def device_uid(index: int) -> str:
+    """第index个模拟设备的uid（MAC）"""
+    return f"{index:012x}"
+
+
+def generate_cert(directory: str):
+    """生成localhost自签名证书，返回(证书路径, 私钥路径)"""
+    import datetime
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    certfile = os.path.join(directory, "fake_server_cert.pem")
+    keyfile = os.path.join(directory, "fake_server_key.pem")
+    with open(certfile, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(keyfile, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    return certfile, keyfile
+
+
+class FakeOrviboServer:
+    """欧瑞博SSL服务器替身：每个连接独立下发会话ID与会话密钥"""
+
+    def __init__(self, devices=10, bursts=0, burst_size=0, burst_interval=0.1, push_delay=0.5):
+        self.devices = devices
+        self.bursts = bursts
+        self.burst_size = burst_size
+        self.burst_interval = burst_interval
+        self.push_delay = push_delay
+        self.default_key = DEFAULT_KEY.encode("utf-8")
+        self.received = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session_id = "".join(random.choices(_ALPHABET, k=32)).encode("utf-8")
+        session_key = "".join(random.choices(_ALPHABET, k=16)).encode("utf-8")
+        keys = {session_id.decode("utf-8"): session_key}
+        push_task = None
+        try:
+            while True:
+                header = await reader.readexactly(HomematePacket.HEADER_SIZE)
+                length = HomematePacket.parse_length(header)
+                ciphertext = await reader.readexactly(length - HomematePacket.HEADER_SIZE)
+                data = HomematePacket.from_frame(header, ciphertext, keys).json_payload
+                self.received += 1
+                cmd = data.get("cmd")
+                reply = {"cmd": cmd, "serial": data.get("serial"), "status": 0}
+
+                if cmd == CMD_HELLO:
+                    reply["key"] = session_key.decode("utf-8")
+                    writer.write(HomematePacket.build_packet(
+                        HomematePacket.PK, self.default_key, session_id, reply))
+                    await writer.drain()
+                    continue
+                if cmd == CMD_LOGIN:
+                    reply["userId"] = data.get("userName", "bench")
+                    if self.bursts and push_task is None:
+                        push_task = asyncio.create_task(self._push_bursts(writer, session_id, session_key))
+                elif cmd in (CMD_CONTROL, CMD_STATE_UPDATE):
+                    reply["uid"] = data.get("uid")
+                    reply["deviceId"] = data.get("deviceId")
+                elif cmd == CMD_HEARTBEAT:
+                    reply["utc"] = int(time.time())
+                writer.write(HomematePacket.build_packet(HomematePacket.DK, session_key, session_id, reply))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            _LOGGER.error("处理客户端数据失败: %s", e)
+        finally:
+            if push_task:
+                push_task.cancel()
+            writer.close()
+
+    async def _push_bursts(self, writer, session_id, session_key):
+        """登录后按批次推送状态更新，每批一次写出"""
+        await asyncio.sleep(self.push_delay)
+        serial = 0
+        for _ in range(self.bursts):
+            frames = []
+            for _ in range(self.burst_size):
+                serial += 1
+                index = serial % self.devices
+                frames.append(HomematePacket.build_packet(HomematePacket.DK, session_key, session_id, {
+                    "cmd": CMD_STATE_UPDATE,
+                    "serial": serial,
+                    "respByAcc": 1,
+                    "deviceId": device_id(index),
+                    "uid": device_uid(index),
+                    "value1": serial % 2,
+                    "value2": 3,
+                    "value3": 1,
+                    # 目标温度逐条变化，每条推送都会改变实体展示的状态
+                    "value4": ((1600 + serial % 1400) << 16) | 2500,
+                    "sendTs": time.time(),
+                }))
+            writer.write(b"".join(frames))
+            await writer.drain()
+            await asyncio.sleep(self.burst_interval)
+
+
+async def _serve(args):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(args.cert, args.key)
+    fake = FakeOrviboServer(args.devices, args.bursts, args.burst_size, args.burst_interval, args.push_delay)
+    server = await asyncio.start_server(fake.handle, args.host, args.port, ssl=context)
+    print(f"PORT {server.sockets[0].getsockname()[1]}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地欧瑞博SSL服务器替身")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--cert", help="服务器证书（缺省时自动生成自签名证书）")
+    parser.add_argument("--key", help="服务器私钥")
+    parser.add_argument("--devices", type=int, default=10, help="模拟设备数量")
+    parser.add_argument("--bursts", type=int, default=0, help="推送批次数")
+    parser.add_argument("--burst-size", type=int, default=0, help="每批推送的状态更新数量")
+    parser.add_argument("--burst-interval", type=float, default=0.1, help="批次间隔（秒）")
+    parser.add_argument("--push-delay", type=float, default=0.5, help="登录后开始推送的延迟（秒）")
+    args = parser.parse_args()
+    if not args.cert:
+        import tempfile
+        args.cert, args.key = generate_cert(tempfile.mkdtemp(prefix="orvibo_fake_"))
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""SSLClient负载测试
+
+在独立进程中启动fake_server.py，用真实的SSLClient连接并登录，测量：
+  - 推送到实体状态的延迟分位数（服务器sendTs → 实体async_write_ha_state）：
+    推送经协调器的真实回调进入空调实体，同一设备被合并到一次写入的推送在这次写入时一起结算
+  - 控制指令吞吐（指令/秒，按serial等待应答）
+  - 本进程每个数据包消耗的CPU时间（服务器CPU不计入）
+
+用法：
+    python benchmarks/load_test.py --devices 50 --bursts 20 --burst-size 100 --commands 1000
+"""
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "custom_components"))
+sys.path.insert(0, BENCH_DIR)
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from ORVIBO_Device_Control import coordinator as coordinator_module  # noqa: E402
+from ORVIBO_Device_Control.climate import WifiAirConditionerDevice  # noqa: E402
+from ORVIBO_Device_Control.const import ORVIBO_SWITCH_MODEL  # noqa: E402
+from ORVIBO_Device_Control.coordinator import OrviboSwitchCoordinator  # noqa: E402
+from ORVIBO_Device_Control.device_state import DeviceState  # noqa: E402
+from ORVIBO_Device_Control.hass import set_current_devices  # noqa: E402
+from ORVIBO_Device_Control.ssl_client import SSLClient  # noqa: E402
+from fake_server import device_id, device_uid, generate_cert  # noqa: E402
+
+_LOGGER = logging.getLogger(__name__)
+
+# 模拟设备使用空调型号，推送中的value1-value4全部参与状态更新
+AC_MODEL = next(model for model, kind in ORVIBO_SWITCH_MODEL.items() if kind == "Air Conditioner")
+
+
+class BenchSSLClient(SSLClient):
+    """记录每条推送的服务器发送时刻，实体写入状态时按设备结算延迟"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: list[float] = []
+        self.pushes_done = asyncio.Event()
+        self.expected_pushes = 0
+        # deviceId -> 尚未写入实体的推送的sendTs
+        self._unwritten: dict[str, list[float]] = {}
+
+    async def _handle_state_update(self, data: dict):
+        send_ts = data.get("sendTs")
+        if send_ts is not None:
+            # 先登记再处理：不合并派发时实体在处理过程中同步写入
+            self._unwritten.setdefault(data.get("deviceId"), []).append(send_ts)
+        await super()._handle_state_update(data)
+
+    def on_entity_written(self, device_id: str):
+        """替代实体的async_write_ha_state：结算该设备尚未写入的推送"""
+        now = time.time()
+        for send_ts in self._unwritten.pop(device_id, ()):
+            self.latencies.append(now - send_ts)
+        if self.expected_pushes and len(self.latencies) >= self.expected_pushes:
+            self.pushes_done.set()
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def start_server(args, certfile, keyfile):
+    """在独立进程中启动服务器替身，返回(进程, 端口)"""
+    process = subprocess.Popen(
+        [
+            sys.executable, os.path.join(BENCH_DIR, "fake_server.py"),
+            "--cert", certfile, "--key", keyfile,
+            "--devices", str(args.devices),
+            "--bursts", str(args.bursts),
+            "--burst-size", str(args.burst_size),
+            "--burst-interval", str(args.burst_interval),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    line = process.stdout.readline().split()
+    if len(line) != 2 or line[0] != "PORT":
+        process.kill()
+        raise RuntimeError("服务器替身启动失败")
+    return process, int(line[1])
+
+
+async def run(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="orvibo_bench_")
+    certfile, keyfile = generate_cert(workdir)
+    process, port = start_server(args, certfile, keyfile)
+
+    hass = HomeAssistant(workdir)
+    coordinator = OrviboSwitchCoordinator(hass, "bench", "bench")
+    ids = [device_id(i) for i in range(args.devices)]
+    set_current_devices(coordinator.registry, [
+        {"deviceId": device_id(i), "uid": device_uid(i), "deviceName": f"bench{i}", "model": AC_MODEL}
+        for i in range(args.devices)
+    ])
+    coordinator.device_states = {
+        device_id(i): DeviceState(device_id=device_id(i), device_name=f"bench{i}", device_uid=device_uid(i),
+                                  model=AC_MODEL, online=1)
+        for i in range(args.devices)
+    }
+    coordinator.https_client.family_id = "family"
+
+    # 由协调器按实际方式创建SSL客户端（推送回调即协调器的回调），只把服务器与客户端类换成本地替身
+    coordinator_module.SSL_HOST, coordinator_module.SSL_PORT = "localhost", port
+    coordinator_module.SSLClient = BenchSSLClient
+    await coordinator._init_ssl_client()
+    client = coordinator.ssl_client
+    client.ssl_context = ssl.create_default_context(cafile=certfile)
+    client.expected_pushes = args.bursts * args.burst_size
+
+    for did in ids:
+        entity = WifiAirConditionerDevice(coordinator, did)
+        entity.hass = hass
+        entity.async_write_ha_state = functools.partial(client.on_entity_written, did)
+        await entity.async_added_to_hass()
+
+    try:
+        started = time.perf_counter()
+        if not await client.connect_and_login():
+            raise RuntimeError("登录服务器替身失败")
+        handshake = time.perf_counter() - started
+
+        # 推送阶段
+        cpu_start = time.process_time()
+        if client.expected_pushes:
+            try:
+                await asyncio.wait_for(client.pushes_done.wait(), args.timeout)
+            except asyncio.TimeoutError:
+                _LOGGER.warning("推送阶段超时")
+        push_cpu = time.process_time() - cpu_start
+        pushes = len(client.latencies)
+
+        # 控制指令阶段
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def command(index):
+            async with semaphore:
+                return await client.async_turn_on(ids[index % len(ids)])
+
+        cpu_start = time.process_time()
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(command(i) for i in range(args.commands)))
+        elapsed = time.perf_counter() - started
+        command_cpu = time.process_time() - cpu_start
+        acked = sum(1 for status in statuses if status == 0)
+    finally:
+        await client.disconnect()
+        process.terminate()
+        process.wait()
+        await hass.async_stop(force=True)
+
+    return {
+        "devices": args.devices,
+        "handshake_ms": handshake * 1000,
+        "pushes_expected": client.expected_pushes,
+        "pushes_received": pushes,
+        "push_latency_ms": {
+            f"p{pct}": percentile(client.latencies, pct) * 1000 for pct in (50, 90, 99)
+        } | {"max": max(client.latencies, default=0.0) * 1000},
+        "push_cpu_us_per_packet": push_cpu / pushes * 1e6 if pushes else 0.0,
+        "commands": args.commands,
+        "commands_acked": acked,
+        "commands_per_sec": args.commands / elapsed if elapsed else 0.0,
+        # 每条指令包含一个发送包和一个应答包
+        "command_cpu_us_per_packet": command_cpu / (2 * args.commands) * 1e6 if args.commands else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSLClient负载测试")
+    parser.add_argument("--devices", type=int, default=50, help="模拟设备数量")
+    parser.add_argument("--bursts", type=int, default=20, help="推送批次数")
+    parser.add_argument("--burst-size", type=int, default=100, help="每批推送数量")
+    parser.add_argument("--burst-interval", type=float, default=0.05, help="批次间隔（秒）")
+    parser.add_argument("--commands", type=int, default=1000, help="控制指令数量")
+    parser.add_argument("--concurrency", type=int, default=64, help="同时发出的控制指令数量")
+    parser.add_argument("--timeout", type=float, default=60, help="推送阶段超时（秒）")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    latency = result["push_latency_ms"]
+    print(f"设备数量            {result['devices']}")
+    print(f"握手耗时            {result['handshake_ms']:.1f} ms")
+    print(f"推送                {result['pushes_received']}/{result['pushes_expected']}")
+    print(f"推送→实体延迟       p50 {latency['p50']:.2f} ms  p90 {latency['p90']:.2f} ms  "
+          f"p99 {latency['p99']:.2f} ms  max {latency['max']:.2f} ms")
+    print(f"推送CPU             {result['push_cpu_us_per_packet']:.1f} us/包")
+    print(f"控制指令            {result['commands_acked']}/{result['commands']} 已应答")
+    print(f"指令吞吐            {result['commands_per_sec']:.0f} 条/秒")
+    print(f"指令CPU             {result['command_cpu_us_per_packet']:.1f} us/包")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""packet.py与functions.py纯函数的微基准
+
+覆盖数据包封装/解析、AES加解密、签名、全部payload构造函数，
+以及控制指令与心跳从构造payload到封装成帧的端到端耗时，
+并与基线文件比较，单次调用耗时超过基线(1+容差)倍时以非零状态退出。
+
+用法：
+    python benchmarks/micro_bench.py                    # 运行并与基线比较
+    python benchmarks/micro_bench.py --save-baseline    # 运行并覆盖基线
+    python benchmarks/micro_bench.py --filter packet    # 只运行名称包含packet的用例
+    python benchmarks/micro_bench.py --compare-ref HEAD~1  # 与指定提交在本机的结果比较
+
+基线记录的是生成它的机器上的耗时，并附带一个固定参考负载的耗时；
+比较时先按参考负载换算，换机器后仍建议重新生成基线。
+修改了被测函数的提交应同时用--save-baseline更新基线；
+--compare-ref在临时工作树中检出指定提交，用本脚本测量其代码作为基线，不依赖基线文件是否最新。
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+# --source指定被测代码的custom_components目录（--compare-ref内部使用），须在导入被测模块之前处理
+_SOURCE = next((sys.argv[i + 1] for i, arg in enumerate(sys.argv[:-1]) if arg == "--source"),
+               os.path.join(REPO_DIR, "custom_components"))
+sys.path.insert(0, _SOURCE)
+
+from ORVIBO_Device_Control.const import DEFAULT_KEY, SIGN_KEY  # noqa: E402
+from ORVIBO_Device_Control.functions import hmac_sha256  # noqa: E402
+from ORVIBO_Device_Control.packet import HomematePacket, HomemateJsonData  # noqa: E402
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "micro_baseline.json")
+
+USERNAME = "13800000000"
+DEVICE_ID = "3f2a9c1e5b7d4e8f9a0b1c2d3e4f5a6b"
+DEVICE_MAC = "a1b2c3d4e5f6"
+FAMILY_ID = "8c1f0e2d3b4a59687766554433221100"
+USER_ID = "0f1e2d3c4b5a69788796a5b4c3d2e1f0"
+ACCESS_TOKEN = "9a8b7c6d5e4f3a2b1c0d9e8f7a6b5c4d"
+SESSION_ID = "Q" * 32
+SESSION_KEY = b"k1t4Q8pZr7Xc2VbN"
+DEFAULT_KEY_BYTES = DEFAULT_KEY.encode("utf-8")
+# --compare-ref可能检出较早的提交：帧类型、头部长度与from_frame在这些提交中还不存在，按协议取值并退回整帧解析
+PK = getattr(HomematePacket, "PK", b"pk")
+DK = getattr(HomematePacket, "DK", b"dk")
+HEADER_SIZE = getattr(HomematePacket, "HEADER_SIZE", 42)
+
+
+def _payloads() -> dict:
+    """真实大小的payload：心跳（小）、开关控制（中）、批量状态（大）"""
+    return {
+        "small": HomemateJsonData.ssl_heartbeat(),
+        "medium": HomemateJsonData.ssl_switch_control(USERNAME, DEVICE_ID, DEVICE_MAC, 0),
+        "large": {
+            "cmd": 42,
+            "serial": 1,
+            "status": 0,
+            "statusList": [
+                {"deviceId": f"{i:032x}", "uid": f"{i:012x}", "value1": 0, "value2": 3,
+                 "value3": 1, "value4": (2600 << 16) | 2500, "online": 1, "updateTime": 1700000000000}
+                for i in range(24)
+            ],
+        },
+    }
+
+
+def build_cases() -> dict:
+    """返回 名称 -> 无参可调用对象"""
+    cases = {}
+    keys = {SESSION_ID: SESSION_KEY}
+    session_id = SESSION_ID.encode("utf-8")
+
+    for size, payload in _payloads().items():
+        frame = HomematePacket.build_packet(DK, SESSION_KEY, session_id, payload)
+        header, ciphertext = frame[:HEADER_SIZE], frame[HEADER_SIZE:]
+        text = json.dumps(dict(payload))
+        encrypted = HomematePacket.encrypt_payload(SESSION_KEY, text)
+
+        cases[f"packet.build_packet[{size}]"] = (
+            lambda p=payload: HomematePacket.build_packet(DK, SESSION_KEY, session_id, p))
+        cases[f"packet.parse[{size}]"] = lambda f=frame: HomematePacket(f, keys)
+        if hasattr(HomematePacket, "from_frame"):
+            cases[f"packet.from_frame[{size}]"] = (
+                lambda h=header, c=ciphertext: HomematePacket.from_frame(h, c, keys))
+        else:
+            # 没有from_frame的提交：监听循环先拼接头部与密文，再整帧解析
+            cases[f"packet.from_frame[{size}]"] = lambda h=header, c=ciphertext: HomematePacket(h + c, keys)
+        cases[f"packet.encrypt_payload[{size}]"] = lambda t=text: HomematePacket.encrypt_payload(SESSION_KEY, t)
+        cases[f"packet.decrypt_payload[{size}]"] = lambda e=encrypted: HomematePacket.decrypt_payload(SESSION_KEY, e)
+
+    hello = HomematePacket.build_packet(
+        PK, DEFAULT_KEY_BYTES, b" " * 32, HomemateJsonData.ssl_get_session())
+    cases["packet.parse[hello_pk]"] = lambda: HomematePacket(hello, {})
+
+    sign_params = {
+        "accessToken": ACCESS_TOKEN, "dataType": "all", "deviceFlag": 0, "familyId": FAMILY_ID,
+        "lastUpdateTime": 0, "pageIndex": 0, "random": "0" * 32, "sessionId": SESSION_ID,
+        "serial": 123456789, "timestamp": "1700000000000", "userId": USER_ID,
+        "userName": USERNAME, "ver": "5.1.4.302",
+    }
+    sign_str = "&".join(f"{k}={sign_params[k]}" for k in sorted(sign_params)) + f"&key={SIGN_KEY}"
+    cases["functions.hmac_sha256"] = lambda: hmac_sha256(SIGN_KEY, sign_str)
+    cases["packet.create_sign"] = lambda: HomemateJsonData.create_sign(sign_params)
+
+    user_json = {"familyId": FAMILY_ID, "userId": USER_ID}
+    device_json = {"id": DEVICE_ID, "location": {"roomName": "客厅"}, "name": "开关"}
+    cases.update({
+        "builder.ssl_get_session": HomemateJsonData.ssl_get_session,
+        "builder.ssl_switch_control": lambda: HomemateJsonData.ssl_switch_control(
+            USERNAME, DEVICE_ID, DEVICE_MAC, 0),
+        "builder.ssl_air_conditioner_state_update": lambda: HomemateJsonData.ssl_air_conditioner_state_update(
+            USERNAME, DEVICE_ID, DEVICE_MAC, 0, 3, 1, (2600 << 16) | 2500),
+        "builder.ssl_ventilation_state_update": lambda: HomemateJsonData.ssl_ventilation_state_update(
+            USERNAME, DEVICE_ID, DEVICE_MAC, 100),
+        "builder.ssl_login": lambda: HomemateJsonData.ssl_login(USERNAME, "0" * 32, FAMILY_ID),
+        "builder.ssl_heartbeat": HomemateJsonData.ssl_heartbeat,
+        "builder.upload_log": lambda: HomemateJsonData.upload_log(user_json, device_json),
+        "builder.get_device_loglist": lambda: HomemateJsonData.get_device_loglist(USER_ID, FAMILY_ID, DEVICE_ID),
+        "builder.get_access_token_by_password": lambda: HomemateJsonData.get_access_token_by_password(
+            USERNAME, "0" * 32),
+        "builder.get_access_token_by_session_id": lambda: HomemateJsonData.get_access_token_by_session_id(
+            SESSION_ID),
+        "builder.get_family_statistics_users": lambda: HomemateJsonData.get_family_statistics_users(
+            USER_ID, ACCESS_TOKEN),
+        "builder.get_devices_status": lambda: HomemateJsonData.get_devices_status(
+            ACCESS_TOKEN, SESSION_ID, USER_ID, USERNAME, FAMILY_ID),
+        "builder.get_homepage_data": lambda: HomemateJsonData.get_homepage_data(FAMILY_ID, USER_ID, ACCESS_TOKEN),
+    })
+
+    # 控制指令与心跳实际发送的路径：构造payload并封装成帧
+    for name in ("ssl_switch_control", "ssl_air_conditioner_state_update",
+                 "ssl_ventilation_state_update", "ssl_heartbeat"):
+        cases[f"frame.{name}"] = lambda builder=cases[f"builder.{name}"]: HomematePacket.build_packet(
+            DK, SESSION_KEY, session_id, builder())
+    return cases
+
+
+def _calibration():
+    """与被测代码无关的固定负载，用于抵消机器整体快慢的漂移"""
+    return sorted(str(i * 7919 % 1009) for i in range(200))
+
+
+def measure(func, repeat: int, min_time: float) -> float:
+    """返回单次调用耗时（微秒），取多轮中的最小值以降低噪声"""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / elapsed))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def measure_ref(ref: str, args) -> dict:
+    """在临时工作树中检出ref，用本脚本测量该提交的代码，返回其基线数据"""
+    workdir = tempfile.mkdtemp(prefix="orvibo_bench_ref_")
+    tree = os.path.join(workdir, "tree")
+    output = os.path.join(workdir, "baseline.json")
+    subprocess.run(["git", "-C", REPO_DIR, "worktree", "add", "--detach", "--quiet", tree, ref], check=True)
+    try:
+        subprocess.run([
+            sys.executable, os.path.abspath(__file__),
+            "--source", os.path.join(tree, "custom_components"),
+            "--filter", args.filter, "--repeat", str(args.repeat), "--min-time", str(args.min_time),
+            "--baseline", output, "--save-baseline",
+        ], check=True, stdout=subprocess.DEVNULL)
+        with open(output, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        subprocess.run(["git", "-C", REPO_DIR, "worktree", "remove", "--force", tree], check=False)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="packet.py/functions.py微基准")
+    parser.add_argument("--filter", default="", help="只运行名称包含该字符串的用例")
+    parser.add_argument("--repeat", type=int, default=7, help="每个用例的测量轮数")
+    parser.add_argument("--min-time", type=float, default=0.2, help="每轮最短耗时（秒）")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许超过基线的比例")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果写为基线")
+    parser.add_argument("--compare-ref", help="以该git提交在本机的测量结果为基线（如HEAD~1）")
+    parser.add_argument("--source", default=_SOURCE, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    baseline = {}
+    base_calibration = None
+    if args.compare_ref and not args.save_baseline:
+        data = measure_ref(args.compare_ref, args)
+        baseline = data.get("results", {})
+        base_calibration = data.get("calibration_us")
+        print(f"基线: {args.compare_ref}")
+    elif os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            data = json.load(f)
+        baseline = data.get("results", {})
+        base_calibration = data.get("calibration_us")
+
+    # 按参考负载的耗时比例换算，比较的是相对基线机器状态的耗时
+    calibration = measure(_calibration, args.repeat, args.min_time)
+    scale = calibration / base_calibration if base_calibration else 1.0
+    print(f"{'calibration':48s} {calibration:10.2f} us   换算系数 {scale:.2f}")
+
+    results = {}
+    regressions = []
+    for name, func in build_cases().items():
+        if args.filter not in name:
+            continue
+        us = results[name] = round(measure(func, args.repeat, args.min_time), 3)
+        base = baseline.get(name)
+        if base:
+            ratio = us / (base * scale)
+            flag = "  回归" if ratio > 1 + args.tolerance else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:48s} {us:10.2f} us   基线 {base:10.2f} us   {ratio:5.2f}x{flag}")
+        else:
+            print(f"{name:48s} {us:10.2f} us")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "calibration_us": round(calibration, 3),
+                "results": results,
+            }, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"基线已写入 {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} 个用例超过基线 {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,19 @@
 # custom_components/wifi_switch/__init__.py
 import logging
-from datetime import timedelta
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.entity_registry import EntityRegistry
+from homeassistant.core import HomeAssistant
 from .coordinator import OrviboSwitchCoordinator
-from homeassistant.helpers.update_coordinator import (
-    DataUpdateCoordinator,
-    UpdateFailed,
-)
-from .config_flow import ConfigFlow
 from .const import (
     PLATFORM_SWITCH,
-    DOMAIN,
-    SSL_HOST,
-    SSL_PORT
+    CONF_PACKET_LOG,
+    PACKET_LOG_FILE,
 )
-from .https_client import HttpsClient
-from .ssl_client import SSLClient
+from .registry import DeviceRegistry
+from .manager import OrviboAccountManager
+from .packet import PacketLog
 
 _LOGGER = logging.getLogger(__name__)
 PLATFORMS = [PLATFORM_SWITCH, "climate", "fan"]
-UPDATE_INTERVAL = timedelta(minutes=5)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -31,30 +23,41 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     password_md5 = entry.data["passWord"]
     user_id = entry.data["userId"]
 
+    # 选项中开启数据包日志时记录本账号SSL收发的数据包（调试用，每个配置项一个文件）
+    packet_log = None
+    if entry.options.get(CONF_PACKET_LOG):
+        packet_log = PacketLog(hass.config.path(PACKET_LOG_FILE.format(entry_id=entry.entry_id)))
+    # 修改选项后重新加载配置项
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    # 每个配置项（账号）独立保存，多个账号互不覆盖
+    manager = OrviboAccountManager.get(hass)
     data = {
         "username": username,
         "password": password_md5,
         "coordinator": None,  # 占位
-        "floor": {},
-        "family": {},
-        "room_list": [],
-        "device_list": [],
-        "state_list": [],
+        "registry": DeviceRegistry(),  # 设备/状态/房间索引
+        "packet_log": packet_log,  # 数据包日志（未开启时为None）
     }
-    hass.data[DOMAIN] = data
+    manager.entries[entry.entry_id] = data
 
-    # 创建协调器并首次拉取设备（关键：登录后主动请求设备）
+    # 创建协调器并首次拉取设备（关键：登录后主动请求设备），HTTPS请求走共享连接池
     coordinator = OrviboSwitchCoordinator(
                         hass=hass,
                         username=username,
-                        password=password_md5)
+                        password=password_md5,
+                        registry=data["registry"],
+                        session=await manager.async_get_session(),
+                        packet_log=packet_log)
+    data["coordinator"] = coordinator
     # 等待协调器完成第一次数据更新（确保有设备数据）
-    await coordinator.async_config_entry_first_refresh()
+    try:
+        await coordinator.async_config_entry_first_refresh()
+    except Exception:
+        await manager.async_remove_entry(entry.entry_id)
+        raise
 
 
-    # 存储核心对象到 hass.data（供实体和卸载时使用）
-    data["coordinator"] = coordinator
-
     # 注册实体（动态创建设备对应的传感器/开关）
     # 使用 asyncio.create_task 包装整个 async_forward_entry_setups 调用，避免阻塞事件循环
     from asyncio import create_task
@@ -65,11 +68,16 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """卸载配置项"""
-    data = hass.data[DOMAIN].pop(entry.entry_id)
-    # await data["client"]._disconnect()
-    # data["coordinator"].update_interval = None
-    await data["coordinator"].async_unload_entry(entry)
-    return await hass.config_entries.async_forward_entry_unload(entry, "switch")
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        # 断开本账号的SSL连接并写出其数据包日志，最后一个账号卸载时关闭共享HTTPS会话
+        await OrviboAccountManager.get(hass).async_remove_entry(entry.entry_id)
+    return unload_ok
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """选项修改后重新加载配置项"""
+    await hass.config_entries.async_reload(entry.entry_id)
 
 # ------------------------------
 # 设备删除清理
@@ -77,7 +85,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_remove_config_entry_device(
     hass: HomeAssistant, config_entry: ConfigEntry, device_entry: dict
 ) -> bool:
-    er: EntityRegistry = hass.helpers.entity_registry.async_get(hass)
+    er = hass.helpers.entity_registry.async_get(hass)
     for entity in er.async_entries_for_config_entry(config_entry.entry_id):
         if entity.device_id == device_entry["id"]:
             er.async_remove(entity.entity_id)
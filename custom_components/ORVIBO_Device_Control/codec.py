@@ -0,0 +1,135 @@
+# custom_components/wifi_switch/codec.py
+from typing import Optional
+
+from .const import ORVIBO_SWITCH_MODEL
+
+
+class DeviceCodec:
+    """开关类设备（默认）的编解码：原始value1-value4 <-> 语义状态
+
+    解码结果直接作为DeviceState.update()的字段；每个设备按型号解析一次编解码器（DeviceState.codec）。
+    pushed为True表示原始值来自SSL推送或指令应答，否则来自HTTPS轮询，部分型号两者的映射不同。
+    """
+
+    device_type = "Switch"
+
+    def is_on(self, value1: int, pushed: bool = False) -> bool:
+        """value1=0为开，其他为关"""
+        return value1 == 0
+
+    def encode_power(self, on: bool) -> int:
+        """开关状态 -> value1"""
+        return 0 if on else 1
+
+    def decode(self, device_state, value1: int, value2: Optional[int] = None,
+               value3: Optional[int] = None, value4: Optional[int] = None, pushed: bool = False) -> dict:
+        """原始值 -> DeviceState字段；value2-value4为None时保留当前值"""
+        fields = {"state": self.is_on(value1, pushed), "value1": value1}
+        if value2 is not None:
+            fields["value2"] = value2
+        if value3 is not None:
+            fields["value3"] = value3
+        if value4 is not None:
+            fields["value4"] = value4
+        return fields
+
+
+class AirConditionerCodec(DeviceCodec):
+    """空调：value1开关（1为关），value2模式，value3风速，value4高16位目标温度、低16位室内温度（×100）"""
+
+    device_type = "Air Conditioner"
+    # value2 <-> HVAC模式（与homeassistant.components.climate.HVACMode的取值一致）
+    HVAC_MODES = {2: "dry", 7: "fan_only", 3: "cool", 4: "heat"}
+    HVAC_MODE_VALUES = {mode: value for value, mode in HVAC_MODES.items()}
+    DEFAULT_MODE_VALUE = 3  # 未知模式按制冷发送
+    # value3 <-> 风速
+    FAN_MODES = {1: "低风", 2: "中风", 3: "高风"}
+    FAN_MODE_VALUES = {mode: value for value, mode in FAN_MODES.items()}
+    DEFAULT_FAN_MODE = "低风"
+
+    def is_on(self, value1: int, pushed: bool = False) -> bool:
+        """HTTPS轮询：value1=1为关、其他为开；SSL推送与指令应答：value1=0为开、其他为关"""
+        if pushed:
+            return value1 == 0
+        return value1 != 1
+
+    def decode(self, device_state, value1, value2=None, value3=None, value4=None, pushed=False) -> dict:
+        # SSL推送未携带温度（value4<=0）时保留原有温度；HTTPS轮询的value4原样接受
+        if pushed and value4 is not None and value4 <= 0:
+            value4 = None
+        return super().decode(device_state, value1, value2, value3, value4, pushed)
+
+    def hvac_mode(self, on: bool, value2: int) -> str:
+        if not on:
+            return "off"
+        return self.HVAC_MODES.get(value2, "off")
+
+    def encode_hvac_mode(self, hvac_mode: str) -> dict:
+        """HVAC模式 -> 需要修改的原始字段（关机时保持当前模式）"""
+        if hvac_mode == "off":
+            return {"value1": self.encode_power(False)}
+        return {"value1": self.encode_power(True),
+                "value2": self.HVAC_MODE_VALUES.get(hvac_mode, self.DEFAULT_MODE_VALUE)}
+
+    def fan_mode(self, value3: int) -> str:
+        return self.FAN_MODES.get(value3, self.DEFAULT_FAN_MODE)
+
+    def encode_fan_mode(self, fan_mode: str) -> dict:
+        return {"value3": self.FAN_MODE_VALUES.get(fan_mode, 1)}
+
+    @staticmethod
+    def target_temperature(value4: int) -> int:
+        """value4高16位为目标温度"""
+        return (value4 >> 16) // 100
+
+    @staticmethod
+    def current_temperature(value4: int) -> int:
+        """value4低16位为室内温度"""
+        return (value4 & 0xFFFF) // 100
+
+    @staticmethod
+    def pack_temperature(target: float, indoor: float) -> int:
+        """目标温度与室内温度 -> value4"""
+        return (int(target * 100) << 16) | int(indoor * 100)
+
+    def encode_target_temperature(self, temperature: float, value4: int) -> dict:
+        """设置目标温度（同时开机），室内温度沿用当前value4"""
+        return {"value1": self.encode_power(True),
+                "value4": self.pack_temperature(temperature, self.current_temperature(value4))}
+
+
+class VentilationCodec(DeviceCodec):
+    """新风：value1为风速档位（0→慢，50→停，100→快），停即为关"""
+
+    device_type = "Ventilation"
+    PRESET_MODES = {0: "慢", 50: "停", 100: "快"}
+    PRESET_MODE_VALUES = {mode: value for value, mode in PRESET_MODES.items()}
+    OFF_VALUE = 50
+
+    def is_on(self, value1: int, pushed: bool = False) -> bool:
+        return value1 != self.OFF_VALUE
+
+    def encode_power(self, on: bool) -> int:
+        return 0 if on else self.OFF_VALUE
+
+    def preset_mode(self, value1: int) -> str:
+        return self.PRESET_MODES.get(value1, "未知")
+
+    def encode_preset_mode(self, preset_mode: str) -> Optional[int]:
+        """预设模式 -> value1，未知模式返回None"""
+        return self.PRESET_MODE_VALUES.get(preset_mode)
+
+
+SWITCH_CODEC = DeviceCodec()
+AIR_CONDITIONER_CODEC = AirConditionerCodec()
+VENTILATION_CODEC = VentilationCodec()
+
+# 设备类型 -> 编解码器
+_TYPE_CODECS = {codec.device_type: codec for codec in (SWITCH_CODEC, AIR_CONDITIONER_CODEC, VENTILATION_CODEC)}
+# 型号 -> 编解码器（未登记的型号按开关处理）
+MODEL_CODECS = {model: _TYPE_CODECS[device_type] for model, device_type in ORVIBO_SWITCH_MODEL.items()}
+
+
+def get_codec(model: str) -> DeviceCodec:
+    """按型号获取编解码器"""
+    return MODEL_CODECS.get(model, SWITCH_CODEC)
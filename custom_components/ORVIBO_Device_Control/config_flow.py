@@ -4,12 +4,13 @@ import hashlib
 import json
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 import aiohttp
 from .const import(
     DOMAIN,
-    LOGIN_URL
+    LOGIN_URL,
+    CONF_PACKET_LOG,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -25,6 +26,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):  # type: ignore[call
     VERSION = 1
     CONNECTION_CLASS = config_entries.CONN_CLASS_CLOUD_POLL
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> config_entries.OptionsFlow:
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(
             self, user_input: dict[str, str] | None = None
     ) -> FlowResult:
@@ -123,3 +129,26 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):  # type: ignore[call
                 if response_json.get("data",{}).get("access_token","") is None:
                     raise ValueError(f"登录失败：{response_json.get('message', '未知错误2')}")
                 return response_json.get("data",{}).get("user_id","")
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """选项：调试用的数据包日志开关（修改后配置项自动重新加载）"""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry):
+        self._entry = config_entry
+
+    async def async_step_init(
+            self, user_input: dict[str, bool] | None = None
+    ) -> FlowResult:
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Optional(
+                    CONF_PACKET_LOG,
+                    default=self._entry.options.get(CONF_PACKET_LOG, False),
+                ): bool,
+            }),
+        )
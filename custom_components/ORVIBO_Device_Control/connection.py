@@ -0,0 +1,81 @@
+# custom_components/wifi_switch/connection.py
+import time
+import random
+import logging
+from enum import Enum
+from typing import Optional
+
+from .const import (
+    SSL_RECONNECT_INTERVAL, SSL_RECONNECT_MAX_INTERVAL,
+    SSL_MAX_RECONNECT_ATTEMPTS, SSL_CIRCUIT_OPEN_TIME,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ConnectionState(Enum):
+    """SSL连接状态"""
+    DISCONNECTED = "disconnected"  # 未连接（初始状态或已主动断开）
+    CONNECTING = "connecting"      # 正在建立TLS连接
+    HELLO = "hello"                # 已连接，等待会话密钥
+    LOGGING_IN = "logging_in"      # 已获得会话密钥，等待登录响应
+    READY = "ready"                # 登录成功，可以收发指令
+    BACKOFF = "backoff"            # 连接失败或断开，等待重连
+
+
+class ReconnectBackoff:
+    """去相关抖动退避：下一次等待在[base, 上一次*3]中随机取值，不超过cap
+
+    多个连接同时断开时各自的重连时刻会被打散，避免同时冲击服务器。
+    """
+
+    def __init__(self, base: float = SSL_RECONNECT_INTERVAL, cap: float = SSL_RECONNECT_MAX_INTERVAL):
+        self.base = base
+        self.cap = max(cap, base)
+        self._sleep = base
+
+    def reset(self):
+        self._sleep = self.base
+
+    def next(self) -> float:
+        """返回本次应等待的秒数"""
+        self._sleep = min(self.cap, random.uniform(self.base, self._sleep * 3))
+        return self._sleep
+
+
+class CircuitBreaker:
+    """重连熔断：连续失败达到阈值后打开，打开期间不再尝试连接，指令直接失败
+
+    打开open_time秒后进入半开状态，允许一次尝试：成功则关闭，失败则重新打开。
+    """
+
+    def __init__(self, threshold: int = SSL_MAX_RECONNECT_ATTEMPTS, open_time: float = SSL_CIRCUIT_OPEN_TIME):
+        self.threshold = threshold
+        self.open_time = open_time
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        """熔断打开且尚未到半开时刻"""
+        return self._opened_at is not None and self.remaining > 0
+
+    @property
+    def remaining(self) -> float:
+        """距离允许下一次尝试的秒数"""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.open_time - time.monotonic())
+
+    def record_success(self):
+        if self._opened_at is not None:
+            _LOGGER.info("SSL重连熔断已关闭")
+        self.failures = 0
+        self._opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        # 半开状态下的一次失败或连续失败达到阈值时打开
+        if self._opened_at is not None or self.failures >= self.threshold:
+            self._opened_at = time.monotonic()
+            _LOGGER.warning("SSL连续%d次连接失败，%d秒内暂停重连", self.failures, self.open_time)
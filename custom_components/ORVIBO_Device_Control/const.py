@@ -5,10 +5,65 @@ from datetime import timedelta
 
 # 通过HTTPS请求进行设备状态更新的频率（默认30秒）
 UPDATE_INTERVAL = timedelta(seconds=60)
-# SSL自动重连的时间间隔（单位：秒），空闲400秒后服务器会主动断开
-SSL_RECONNECT_INTERVAL = 0
-# 重连最大重连尝试次数（达到后放弃）
+# 推送优先：SSL推送链路健康（已登录且心跳无丢失）时放宽HTTPS轮询，仅按该间隔做一致性校验
+PUSH_FIRST_SYNC = True
+PUSH_CONSISTENCY_INTERVAL = timedelta(minutes=15)
+# 增量拉取设备状态时，强制全量同步的时间间隔
+FULL_SYNC_INTERVAL = timedelta(minutes=30)
+# 增量拉取水位的回退量（单位：秒）：下次从“最新updateTime-回退量”开始拉取，避免漏掉与水位同一秒内的更新
+READTABLE_WATERMARK_OVERLAP = 5
+# 流式读取首页数据时每次读取的字节数
+HOMEPAGE_CHUNK_SIZE = 64 * 1024
+# 流式首页同步中，状态行早于其设备行到达时最多暂存的行数，超出的行丢弃并计数
+HOMEPAGE_MAX_PARKED_STATES = 10000
+# 所有账号共享的HTTPS连接池：总连接数上限与单个服务器的连接数上限
+HTTPS_POOL_LIMIT = 100
+HTTPS_LIMIT_PER_HOST = 8
+# SSL重连退避的基础间隔与上限（单位：秒），每次等待在[基础间隔, 上次*3]中随机取值
+SSL_RECONNECT_INTERVAL = 1
+SSL_RECONNECT_MAX_INTERVAL = 120
+# 服务器断开空闲SSL会话的时间（单位：秒）
+SSL_IDLE_TIMEOUT = 400
+# SSL链路空闲多久后发送心跳（单位：秒），RTT升高或心跳丢失时逐次减半，最低到SSL_HEARTBEAT_MIN_INTERVAL
+SSL_HEARTBEAT_INTERVAL = 30
+SSL_HEARTBEAT_MIN_INTERVAL = 5
+# 心跳应答超时的下限（单位：秒），实际超时按心跳RTT估计，上限为SSL_COMMAND_TIMEOUT
+SSL_HEARTBEAT_MIN_TIMEOUT = 1
+# 心跳连续未应答该次数后判定连接已失效
+SSL_HEARTBEAT_MAX_MISSES = 2
+# 读超时的余量（单位：秒）：超过“心跳间隔+心跳应答超时+余量”未收到任何数据包即判定连接已失效
+SSL_READ_DEADLINE_GRACE = 2
+# 连续连接失败达到该次数后熔断，熔断期间（单位：秒）不再重连，控制指令直接失败
 SSL_MAX_RECONNECT_ATTEMPTS = 3
+SSL_CIRCUIT_OPEN_TIME = 300
+# SSL控制指令等待服务器响应的超时时间（单位：秒）
+SSL_COMMAND_TIMEOUT = 5
+# SSL握手（hello/登录）等待服务器响应的超时时间（单位：秒）
+SSL_HANDSHAKE_TIMEOUT = 10
+# 同时等待服务器响应的控制指令上限
+SSL_MAX_IN_FLIGHT = 16
+# SSL发送队列长度（队列满时调用方等待）
+SSL_SEND_QUEUE_SIZE = 64
+# 发送任务单次合并写出的数据包上限
+SSL_WRITE_BATCH_SIZE = 32
+# 同一空调连续调整的合并窗口（单位：秒），窗口内的修改合并为一条指令
+COMMAND_COALESCE_WINDOW = 0.3
+# 是否将同一事件循环轮次内的设备状态变化合并后再通知实体（同一设备多次推送只写一次状态）
+DEVICE_UPDATE_BATCHING = True
+# 数据包日志：单个分段的最大字节数，超过后轮转
+PACKET_LOG_MAX_BYTES = 10 * 1024 * 1024
+# 数据包日志：单个分段的最长时长（单位：秒），超过后轮转
+PACKET_LOG_MAX_AGE = 3600
+# 数据包日志：保留的已轮转分段数量
+PACKET_LOG_BACKUP_COUNT = 5
+# 数据包日志：缓冲达到该条数或距上次写出超过该间隔（单位：秒）时写出
+PACKET_LOG_FLUSH_SIZE = 100
+PACKET_LOG_FLUSH_INTERVAL = 1
+# 数据包日志：选项中的开关名，以及日志文件名（位于HA配置目录，每个配置项一个文件）
+CONF_PACKET_LOG = "packet_log"
+PACKET_LOG_FILE = "orvibo_packets_{entry_id}.jsonl"
+# 数据包级trace日志的采样间隔：DEBUG启用时每N条输出一条（日志级别设为TRACE(5)时全部输出）
+LOG_TRACE_SAMPLE_EVERY = 20
 
 CMD_HELLO = 0
 CMD_LOGIN = 2
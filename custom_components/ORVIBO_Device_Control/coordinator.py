@@ -1,10 +1,11 @@
 # custom_components/wifi_switch/coordinator.py
 import logging
 import asyncio
+import aiohttp
 
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional
 from datetime import timedelta
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers.update_coordinator import UpdateFailed
@@ -14,30 +15,48 @@ from .ssl_client import SSLClient
 from .https_client import (
     HttpsClient
 )
+from .device_state import DeviceState
+from .registry import DeviceRegistry
+from .packet import PacketLog
+from .log import HotPathLogger
 
 
 from .const import (
     SSL_HOST, SSL_PORT,
     DEVICE_NAME,
     UPDATE_INTERVAL,
+    PUSH_FIRST_SYNC,
+    PUSH_CONSISTENCY_INTERVAL,
     SSL_RECONNECT_INTERVAL,
-    ORVIBO_SWITCH_MODEL
+    COMMAND_COALESCE_WINDOW,
+    DEVICE_UPDATE_BATCHING,
 )
 
 _LOGGER = logging.getLogger(__name__)
+_TRACE = HotPathLogger(__name__)
 
 
 class OrviboSwitchCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
-    _initial_keys: Dict[str, Any] = {}
-    def __init__(self, hass: HomeAssistant, username: str, password: str):
+    def __init__(self, hass: HomeAssistant, username: str, password: str,
+                 batch_device_updates: bool = DEVICE_UPDATE_BATCHING,
+                 push_first: bool = PUSH_FIRST_SYNC,
+                 registry: Optional[DeviceRegistry] = None,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 packet_log: Optional[PacketLog] = None):
         self.username = username
         self.password = password
         self.hass = hass
+        # 每个配置项（账号）独立的设备注册表，HTTPS与SSL客户端共用
+        self.registry = registry if registry is not None else DeviceRegistry()
+        # 本账号的数据包日志（选项中开启时由配置项创建），交给SSL客户端记录收发的数据包
+        self.packet_log = packet_log
 
         self.https_client = HttpsClient(
                         hass=hass,
                         username=username,
-                        password=password
+                        password=password,
+                        registry=self.registry,
+                        session=session
         )
         self.ssl_client = None
 
@@ -48,7 +67,20 @@ class OrviboSwitchCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
             update_interval=UPDATE_INTERVAL,
         )
 
-        self.device_states: Dict[str, Any] = {}
+        self.device_states: Dict[str, DeviceState] = {}
+        # 空调合并窗口内挂起的修改：deviceId -> {values, waiters, task}
+        self._pending_ac_updates: Dict[str, Dict[str, Any]] = {}
+        # 已离开合并窗口、正在发送的空调指令：每个设备同一时刻只有一条，下一条等它应答后再合并发送
+        self._inflight_ac_updates: Dict[str, Dict[str, Any]] = {}
+        # 按设备订阅的状态变化回调：deviceId -> [回调]
+        # SSL推送与控制应答只通知对应设备的实体，HTTPS轮询仍通过async_set_updated_data通知全部实体
+        self._device_listeners: Dict[str, List[Callable[[], None]]] = {}
+        self.batch_device_updates = batch_device_updates
+        self._dirty_devices: set = set()
+        self._dispatch_handle: Optional[asyncio.Handle] = None
+        # 推送优先：SSL推送链路健康时HTTPS轮询放宽为一致性校验，链路断开时恢复UPDATE_INTERVAL
+        self.push_first = push_first
+        self._push_healthy: Optional[bool] = None
 
     async def _async_setup(self):
         """Set up the coordinator
@@ -65,19 +97,11 @@ class OrviboSwitchCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
                 raise UpdateFailed("HTTPS登录失败")
 
             # 2.首次拉取所有设备信息
-            device_states = await self.https_client.update_state_list()
+            device_states = await self.https_client.update_state_list(self.device_states)
             # 确保device_states至少是一个空字典
-            if device_states is None:
-                self.device_states = {}
-            else:
-                # 过滤掉delFlag为1的设备，保留online为0的设备以便显示为不可用状态
-                self.device_states = {
-                    device_id: state 
-                    for device_id, state in device_states.items() 
-                    if state.get('delFlag') != 1
-                }
-
-            # 2. 初始化全局SSL客户端（仅创建1次）
+            self.device_states = device_states or {}
+
+            # 2. 初始化本账号的SSL客户端（仅创建1次）
             await self._init_ssl_client()
 
             if self.ssl_client:
@@ -96,14 +120,10 @@ class OrviboSwitchCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
                 raise UpdateFailed("HTTPS登录失败")
 
             # 2. 获取设备最新状态（首次执行会同时拉取所有设备信息）
-            device_states = await self.https_client.update_state_list()
+            # 已有的DeviceState记录原地更新，不再每次重建
+            device_states = await self.https_client.update_state_list(self.device_states)
             if device_states:
-                # 过滤掉delFlag为1的设备，保留online为0的设备以便显示为不可用状态
-                self.device_states = {
-                    device_id: state 
-                    for device_id, state in device_states.items() 
-                    if state.get('delFlag') != 1
-                }
+                self.device_states = device_states
             if not self.device_states:
                 raise UpdateFailed("未获取到设备信息")
             return self.device_states
@@ -111,7 +131,7 @@ class OrviboSwitchCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
             raise UpdateFailed(f"拉取设备状态失败: {str(e)}") from e
 
     async def _init_ssl_client(self):
-        """初始化全局SSL客户端（仅执行1次）"""
+        """初始化本账号的SSL客户端（仅执行1次）"""
         if self.ssl_client is not None:
             return
 
@@ -131,60 +151,14 @@ class OrviboSwitchCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
 
         def on_status_update(device_id: str, status: int, value2: int = 0, value3: int = 0, value4: int = 0):
             """SSL状态推送回调"""
-            # 获取设备类型
-            device_state = self.device_states.get(device_id, {})
-            model = device_state.get('model')
-            device_type = ORVIBO_SWITCH_MODEL.get(model, "Switch")
-            
-            # 更新基本状态
-            self.device_states[device_id]["value1"] = status
-            # 更新相关状态字段
-            self.device_states[device_id]["value2"] = value2  # 模式
-            self.device_states[device_id]["value3"] = value3  # 风速
-            self.device_states[device_id]["value4"] = value4  # 温度
-            
-            # 针对不同设备类型的特殊处理
-            if device_type == "Ventilation":
-                # 新风设备状态日志
-                _LOGGER.debug(f"新风设备 {device_id} 状态更新: value1={status}, value2={value2}, value3={value3}, value4={value4}")
-                # 根据实际日志分析，新风设备的风速档位由value1控制
-                # 实际操控顺序：慢 → 快 → 停
-                # 正确映射关系：value1=0 → 慢，value1=50 → 停，value1=100 → 快
-                if status == 0:
-                    is_on = True
-                    fan_speed = "慢"
-                elif status == 50:
-                    is_on = False
-                    fan_speed = "停"
-                elif status == 100:
-                    is_on = True
-                    fan_speed = "快"
-                else:
-                    # 未知状态
-                    is_on = (status != 50)
-                    fan_speed = "未知"
-                _LOGGER.debug(f"新风设备 {device_id} 状态解析: 开启状态={is_on}, 风速档位={fan_speed}")
-                # 更新设备状态
-                self.device_states[device_id]["state"] = is_on
-                self.device_states[device_id]["fan_speed"] = fan_speed
-            elif device_type == "Air Conditioner":
-                # 空调设备温度解析
-                is_on = (status == 0)
-                self.device_states[device_id]["state"] = is_on
-                if value4 > 0:
-                    target_temperature = (value4 >> 16) // 100
-                    current_temperature = (value4 & 0xFFFF) // 100
-                    self.device_states[device_id]["target_temperature"] = target_temperature
-                    self.device_states[device_id]["current_temperature"] = current_temperature
-                    # _LOGGER.info(f"设备 {device_id} 温度解析 - 目标温度: {target_temperature}°C, 当前温度: {current_temperature}°C")
-            else:
-                # 其他设备默认处理
-                is_on = (status == 0)
-                self.device_states[device_id]["state"] = is_on
-            
-            self.async_set_updated_data(self.device_states)
-
-        # 创建全局SSL客户端
+            device_state = self.device_states.get(device_id)
+            if device_state is None:
+                return
+            # 按设备型号的编解码器解析原始值（空调未携带温度时保留原有温度）
+            if device_state.update(**device_state.codec.decode(device_state, status, value2, value3, value4, pushed=True)):
+                self.async_notify_device(device_id)
+
+        # 创建本账号的SSL客户端
         self.ssl_client = SSLClient(
             hass=self.hass,
             ssl_host=SSL_HOST,
@@ -194,9 +168,28 @@ class OrviboSwitchCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
             family_id=self.https_client.family_id,
             on_status_update=on_status_update,
             on_session_id_obtained=on_session_id_obtained,
-            retry_interval = SSL_RECONNECT_INTERVAL
+            retry_interval = SSL_RECONNECT_INTERVAL,
+            on_link_change=self._on_link_change,
+            registry=self.registry,
+            packet_log=self.packet_log
         )
 
+    @callback
+    def _on_link_change(self, healthy: bool) -> None:
+        """SSL推送链路健康状态变化：调整HTTPS轮询间隔"""
+        previous, self._push_healthy = self._push_healthy, healthy
+        if not self.push_first:
+            return
+        self.update_interval = PUSH_CONSISTENCY_INTERVAL if healthy else UPDATE_INTERVAL
+        if healthy:
+            _LOGGER.info("SSL推送链路正常，HTTPS轮询间隔放宽为%s", self.update_interval)
+        else:
+            _LOGGER.info("SSL推送链路中断，HTTPS轮询恢复为%s", self.update_interval)
+        # 首次拉取完成前不额外刷新；之后每次切换立即拉取一次，
+        # 既补上链路中断期间可能丢失的推送，也让新的轮询间隔立即生效
+        if previous is not None and self.data is not None:
+            self.hass.async_create_task(self.async_request_refresh())
+
     async def toggle_switch(self, device_id: str) -> bool:
         """发送控制指令"""
         if not self.ssl_client:
@@ -210,148 +203,192 @@ class OrviboSwitchCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
         if not self.ssl_client:
             _LOGGER.error("SSL客户端未初始化，无法发送控制指令")
             return False
-        result = await self.ssl_client.async_turn_on(device_id)
-        # 更新本地状态
-        if result and self.device_states and device_id in self.device_states:
-            self.device_states[device_id]["state"] = True
-            self.async_set_updated_data(self.device_states)
-        return result
+        status = await self.ssl_client.async_turn_on(device_id)
+        # 服务器确认成功（status=0）后才更新本地状态
+        if status == 0:
+            self._apply_local_state(device_id, state=True)
+        return status == 0
 
     async def async_turn_off(self, device_id: str) -> bool:
         """发送关闭指令"""
         if not self.ssl_client:
             _LOGGER.error("SSL客户端未初始化，无法发送控制指令")
             return False
-        result = await self.ssl_client.async_turn_off(device_id)
-        # 更新本地状态
-        if result and self.device_states and device_id in self.device_states:
-            self.device_states[device_id]["state"] = False
-            self.async_set_updated_data(self.device_states)
-        return result
+        status = await self.ssl_client.async_turn_off(device_id)
+        # 服务器确认成功（status=0）后才更新本地状态
+        if status == 0:
+            self._apply_local_state(device_id, state=False)
+        return status == 0
+
+    def _apply_local_state(self, device_id: str, **fields) -> None:
+        """更新本地设备状态，仅在有字段变化时通知实体"""
+        device_state = self.device_states.get(device_id)
+        if device_state is not None and device_state.update(**fields):
+            self.async_notify_device(device_id)
+
+    def _apply_local_values(self, device_id: str, value1: int, value2: Optional[int] = None,
+                            value3: Optional[int] = None, value4: Optional[int] = None) -> None:
+        """指令应答成功后按编解码器把下发的原始值应用到本地状态"""
+        device_state = self.device_states.get(device_id)
+        if device_state is not None and device_state.update(
+                **device_state.codec.decode(device_state, value1, value2, value3, value4, pushed=True)):
+            self.async_notify_device(device_id)
+
+    @callback
+    def async_add_device_listener(self, device_id: str, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """订阅单个设备的状态变化，返回取消订阅的函数"""
+        listeners = self._device_listeners.setdefault(device_id, [])
+        listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            listeners.remove(update_callback)
+            if not listeners:
+                self._device_listeners.pop(device_id, None)
+
+        return remove_listener
+
+    @callback
+    def async_notify_device(self, device_id: str) -> None:
+        """通知订阅该设备的实体；启用合并时延迟到本轮事件循环结束统一通知"""
+        if not self.batch_device_updates:
+            self._dispatch_device(device_id)
+            return
+        self._dirty_devices.add(device_id)
+        if self._dispatch_handle is None:
+            self._dispatch_handle = self.hass.loop.call_soon(self._flush_device_updates)
+
+    @callback
+    def _flush_device_updates(self) -> None:
+        """通知本轮事件循环内状态发生变化的设备"""
+        self._dispatch_handle = None
+        dirty, self._dirty_devices = self._dirty_devices, set()
+        for device_id in dirty:
+            self._dispatch_device(device_id)
+
+    def _dispatch_device(self, device_id: str) -> None:
+        for update_callback in tuple(self._device_listeners.get(device_id, ())):
+            update_callback()
 
     def get_device_state(self, device_id):
-        if self.device_states is None:
+        device_state = self.device_states.get(device_id)
+        if device_state is None:
             return False
-        return self.device_states.get(device_id).get("state")
+        return device_state.state
 
     async def async_control_air_conditioner(self, device_id: str, value1: int, value2: int, value3: int, value4: int) -> bool:
         """发送空调控制指令"""
         if not self.ssl_client:
             _LOGGER.error("SSL客户端未初始化，无法发送控制指令")
             return False
-        result = await self.ssl_client.async_control_air_conditioner(device_id, value1, value2, value3, value4)
-        # 更新本地状态
-        if result and self.device_states and device_id in self.device_states:
-            # 更新基本状态
-            self.device_states[device_id]["value1"] = value1
-            self.device_states[device_id]["state"] = (value1 == 0)
-            self.device_states[device_id]["value2"] = value2
-            self.device_states[device_id]["value3"] = value3
-            self.device_states[device_id]["value4"] = value4
-            
-            # 更新解析后的温度
-            target_temperature = (value4 >> 16) // 100
-            indoor_temperature = (value4 & 0xFFFF) // 100
-            self.device_states[device_id]["target_temperature"] = target_temperature
-            self.device_states[device_id]["current_temperature"] = indoor_temperature
-            
-            self.async_set_updated_data(self.device_states)
-        return result
+        status = await self.ssl_client.async_control_air_conditioner(device_id, value1, value2, value3, value4)
+        # 更新本地状态（温度由value4派生）
+        if status == 0:
+            self._apply_local_values(device_id, value1, value2, value3, value4)
+        return status == 0
     
-    async def async_air_conditioner_state_update(self, device_id: str, value1: int, value2: int, value3: int, value4: int) -> bool:
-        """使用CMD_STATE_UPDATE命令发送空调控制指令"""
+    async def async_air_conditioner_state_update(self, device_id: str, value1: Optional[int] = None,
+                                                 value2: Optional[int] = None, value3: Optional[int] = None,
+                                                 value4: Optional[int] = None) -> bool:
+        """使用CMD_STATE_UPDATE命令发送空调控制指令
+
+        只需传入要修改的字段；合并窗口内同一设备的多次修改合并为一条指令，
+        指令应答后所有等待的调用方得到同一结果。
+        """
         if not self.ssl_client:
             _LOGGER.error("SSL客户端未初始化，无法发送控制指令")
             return False
-        result = await self.ssl_client.async_air_conditioner_state_update(device_id, value1, value2, value3, value4)
-        # 更新本地状态
-        if result and self.device_states and device_id in self.device_states:
-            # 更新基本状态
-            self.device_states[device_id]["value1"] = value1
-            self.device_states[device_id]["state"] = (value1 == 0)
-            self.device_states[device_id]["value2"] = value2
-            self.device_states[device_id]["value3"] = value3
-            self.device_states[device_id]["value4"] = value4
-            
-            # 更新解析后的温度
-            target_temperature = (value4 >> 16) // 100
-            indoor_temperature = (value4 & 0xFFFF) // 100
-            self.device_states[device_id]["target_temperature"] = target_temperature
-            self.device_states[device_id]["current_temperature"] = indoor_temperature
-            
-            self.async_set_updated_data(self.device_states)
-        return result
-    
+        changes = {key: value for key, value in
+                   (("value1", value1), ("value2", value2), ("value3", value3), ("value4", value4))
+                   if value is not None}
+
+        pending = self._pending_ac_updates.get(device_id)
+        if pending is None:
+            pending = {"values": {}, "waiters": []}
+            self._pending_ac_updates[device_id] = pending
+            pending["task"] = self.hass.async_create_background_task(
+                self._async_flush_ac_update(device_id), f"{DEVICE_NAME} AC update {device_id}"
+            )
+        # 后到的修改覆盖先到的同名字段
+        pending["values"].update(changes)
+        waiter = self.hass.loop.create_future()
+        pending["waiters"].append(waiter)
+        return await asyncio.shield(waiter)
+
+    async def _async_flush_ac_update(self, device_id: str) -> None:
+        """合并窗口结束后，将挂起的修改与当前状态合并并发送一条指令
+
+        上一条指令仍在等待应答时先等它结束：它成功后本地状态才会更新，
+        否则本条指令会按旧状态合并，把上一条的修改改回去。
+        """
+        pending = None
+        success = False
+        try:
+            await asyncio.sleep(COMMAND_COALESCE_WINDOW)
+            pending = self._pending_ac_updates.pop(device_id)
+            previous = self._inflight_ac_updates.get(device_id)
+            self._inflight_ac_updates[device_id] = pending
+            if previous is not None:
+                await asyncio.wait((previous["task"],))
+            device_state = self.device_states.get(device_id)
+            if device_state is None:
+                _LOGGER.error(f"找不到空调{device_id}的状态，无法发送控制指令")
+                return
+            values = {
+                "value1": device_state.value1,
+                "value2": device_state.value2,
+                "value3": device_state.value3,
+                "value4": device_state.value4,
+                **pending["values"],
+            }
+            _LOGGER.debug("合并%d次空调%s调整为一条指令: %s", len(pending["waiters"]), device_id, values)
+            try:
+                status = await self.ssl_client.async_air_conditioner_state_update(device_id, **values)
+            except Exception as e:
+                _LOGGER.error("发送空调%s控制指令失败: %s", device_id, e, exc_info=True)
+                return
+            # 更新本地状态（温度由value4派生）
+            if status == 0:
+                self._apply_local_values(device_id, **values)
+            success = status == 0
+        finally:
+            if pending is None:
+                pending = self._pending_ac_updates.pop(device_id, {})
+            elif self._inflight_ac_updates.get(device_id) is pending:
+                del self._inflight_ac_updates[device_id]
+            for waiter in pending.get("waiters", ()):
+                if not waiter.done():
+                    waiter.set_result(success)
+
     async def async_control_ventilation(self, device_id: str, value1: int) -> bool:
         """发送新风设备控制指令"""
         if not self.ssl_client:
             _LOGGER.error("SSL客户端未初始化，无法发送控制指令")
             return False
-        result = await self.ssl_client.async_control_ventilation(device_id, value1)
-        # 更新本地状态
-        if result and self.device_states and device_id in self.device_states:
-            # 根据value1更新设备状态
-            if value1 == 0:
-                # 慢档
-                is_on = True
-                fan_speed = "慢"
-            elif value1 == 50:
-                # 停止
-                is_on = False
-                fan_speed = "停"
-            elif value1 == 100:
-                # 快档
-                is_on = True
-                fan_speed = "快"
-            else:
-                # 未知状态
-                is_on = (value1 != 50)
-                fan_speed = "未知"
-            
-            # 更新设备状态
-            self.device_states[device_id]["value1"] = value1
-            self.device_states[device_id]["state"] = is_on
-            self.device_states[device_id]["fan_speed"] = fan_speed
-            
-            self.async_set_updated_data(self.device_states)
-        return result
+        status = await self.ssl_client.async_control_ventilation(device_id, value1)
+        # 更新本地状态（风速档位由value1派生）
+        if status == 0:
+            self._apply_local_values(device_id, value1)
+        return status == 0
     
     async def async_ventilation_state_update(self, device_id: str, value1: int) -> bool:
         """使用CMD_STATE_UPDATE命令发送新风设备控制指令"""
         if not self.ssl_client:
             _LOGGER.error("SSL客户端未初始化，无法发送控制指令")
             return False
-        result = await self.ssl_client.async_ventilation_state_update(device_id, value1)
-        # 更新本地状态
-        if result and self.device_states and device_id in self.device_states:
-            # 根据value1更新设备状态
-            if value1 == 0:
-                # 慢档
-                is_on = True
-                fan_speed = "慢"
-            elif value1 == 50:
-                # 停止
-                is_on = False
-                fan_speed = "停"
-            elif value1 == 100:
-                # 快档
-                is_on = True
-                fan_speed = "快"
-            else:
-                # 未知状态
-                is_on = (value1 != 50)
-                fan_speed = "未知"
-            
-            # 更新设备状态
-            self.device_states[device_id]["value1"] = value1
-            self.device_states[device_id]["state"] = is_on
-            self.device_states[device_id]["fan_speed"] = fan_speed
-            
-            self.async_set_updated_data(self.device_states)
-        return result
+        status = await self.ssl_client.async_ventilation_state_update(device_id, value1)
+        # 更新本地状态（风速档位由value1派生）
+        if status == 0:
+            self._apply_local_values(device_id, value1)
+        return status == 0
 
     async def async_cleanup(self):
         """组件卸载时清理资源"""
+        for pending in list(self._pending_ac_updates.values()) + list(self._inflight_ac_updates.values()):
+            pending["task"].cancel()
+        if self._dispatch_handle is not None:
+            self._dispatch_handle.cancel()
+            self._dispatch_handle = None
         if self.ssl_client:
             await self.ssl_client.disconnect()
-            _LOGGER.debug("全局SSL连接已清理")
+            _LOGGER.debug("SSL连接已清理")
@@ -0,0 +1,62 @@
+# custom_components/wifi_switch/device_state.py
+from dataclasses import dataclass, field
+
+from .codec import DeviceCodec, SWITCH_CODEC, AirConditionerCodec, VentilationCodec, get_codec
+
+
+@dataclass(slots=True)
+class DeviceState:
+    """单个设备的状态记录（替代每设备15个键的字典）"""
+    device_id: str
+    device_name: str = ""
+    device_uid: str = ""
+    model: str = ""
+    room_id: str = ""
+    online: int = 1
+    state: bool = False
+    value1: int = 1     # 原始值：开关状态（新风为风速档位）
+    value2: int = 0     # 原始值：模式
+    value3: int = 0     # 原始值：风速
+    value4: int = 0     # 原始值：高16位目标温度、低16位室内温度（×100）
+    # 按型号解析一次的编解码器，型号变化时重新解析
+    codec: DeviceCodec = field(default=SWITCH_CODEC, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.codec = get_codec(self.model)
+
+    @property
+    def device_type(self) -> str:
+        return self.codec.device_type
+
+    @property
+    def mode(self) -> int:
+        return self.value2
+
+    @property
+    def target_temperature(self) -> int:
+        """解析value4高16位为目标温度"""
+        return AirConditionerCodec.target_temperature(self.value4)
+
+    @property
+    def current_temperature(self) -> int:
+        """解析value4低16位为室内温度"""
+        return AirConditionerCodec.current_temperature(self.value4)
+
+    @property
+    def fan_speed(self):
+        """新风设备返回档位名称，其他设备返回value3"""
+        codec = self.codec
+        if isinstance(codec, VentilationCodec):
+            return codec.preset_mode(self.value1)
+        return self.value3
+
+    def update(self, **fields) -> set[str]:
+        """更新字段，返回实际发生变化的字段名集合"""
+        changed = set()
+        for name, value in fields.items():
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                changed.add(name)
+        if "model" in changed:
+            self.codec = get_codec(self.model)
+        return changed
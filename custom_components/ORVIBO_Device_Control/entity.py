@@ -0,0 +1,96 @@
+# custom_components/orvibo_switch/entity.py
+import logging
+from operator import attrgetter
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from .coordinator import OrviboSwitchCoordinator
+from .functions import format_mac
+from .hass import (
+    get_room_name_by_room_id,
+    get_model_name_by_model_id
+)
+from .const import(
+    MANUFACTURER,
+    DEVICE_TYPE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class OrviboDeviceEntity(CoordinatorEntity):
+    """欧瑞博设备实体基类
+
+    HTTPS轮询通过CoordinatorEntity的监听、SSL推送通过按设备订阅，统一进入_handle_coordinator_update；
+    只有实体展示用到的字段（状态指纹）变化时才写入状态。
+    """
+
+    # unique_id前缀，与各平台原有的unique_id保持一致
+    UNIQUE_ID_PREFIX = DEVICE_TYPE
+    # 参与状态指纹的DeviceState字段，子类按实体展示的状态覆盖
+    FINGERPRINT_FIELDS = ("online", "state")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fingerprint_getter = attrgetter(*cls.FINGERPRINT_FIELDS)
+
+    def __init__(self, coordinator: OrviboSwitchCoordinator, device_id):
+        super().__init__(coordinator)
+
+        device_state = coordinator.device_states[device_id]
+        # 核心属性（依赖核心字段）
+        self.device_id = device_id
+        self._attr_unique_id = f"{self.UNIQUE_ID_PREFIX}_{device_id}"
+        self._attr_name = f"{device_state.device_name}"
+        self._attr_entity_category = None
+        self._last_fingerprint = None
+
+        room_id = device_state.room_id
+        model_id = device_state.model
+        # 设备属性（HA 界面「属性」面板中显示）
+        self._attr_extra_state_attributes = {
+            "room_name": get_room_name_by_room_id(coordinator.registry, room_id) if room_id else "",
+            "online_status": "在线" if device_state.online else "离线",
+            "mac_address": format_mac(device_state.device_uid),
+            "product_name": get_model_name_by_model_id(coordinator.registry, model_id) if model_id else "",
+        }
+        self._attr_device_info = {  # 绑定设备（关键，HA要求实体归属设备才易展示）
+            "identifiers": {(f"{DEVICE_TYPE}_integration", f"device_{device_id}")},
+            "name": f"{self._attr_name}",
+            "model": f"{model_id}",
+            "manufacturer": MANUFACTURER,
+        }
+
+    @property
+    def available(self) -> bool:
+        """返回设备是否可用（在线）"""
+        device_state = self.coordinator.device_states.get(self.device_id)
+        if device_state is None:
+            return False
+        # 根据用户反馈，online=1表示在线，0为离线
+        return device_state.online != 0
+
+    def _fingerprint(self):
+        """实体展示用到的状态字段"""
+        device_state = self.coordinator.device_states.get(self.device_id)
+        if device_state is None:
+            return None
+        return self._fingerprint_getter(device_state)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """协调器或设备订阅通知更新时，仅在状态指纹变化时写入状态"""
+        fingerprint = self._fingerprint()
+        if fingerprint == self._last_fingerprint:
+            return
+        self._last_fingerprint = fingerprint
+        self.async_write_ha_state()
+
+    async def async_added_to_hass(self):
+        # CoordinatorEntity注册唯一的协调器监听（HTTPS轮询）
+        await super().async_added_to_hass()
+        # 加入后HA会立即写入一次状态，以此时的状态作为指纹基准
+        self._last_fingerprint = self._fingerprint()
+        # SSL推送只通知本设备的实体
+        self.async_on_remove(
+            self.coordinator.async_add_device_listener(self.device_id, self._handle_coordinator_update)
+        )
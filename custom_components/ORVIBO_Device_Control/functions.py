@@ -31,24 +31,29 @@ def generate_uuid(remove_hyphen: bool = True) -> str:
         return uuid_str.replace("-", "")
     return uuid_str
 
+# 按密钥缓存已写入密钥的HMAC状态，每次签名复制一份，省去重复的密钥填充与两次压缩
+_HMAC_STATES: dict[str, hmac.HMAC] = {}
+
+
+def _keyed_hmac(key: str) -> hmac.HMAC:
+    state = _HMAC_STATES.get(key)
+    if state is None:
+        state = _HMAC_STATES[key] = hmac.new(key.encode('utf-8'), digestmod=hashlib.sha256)
+    return state
+
+
 def hmac_sha256(key, data):
-    # 创建HMAC SHA256实例
-    h = hmac.new(key.encode('utf-8'), data.encode('utf-8'), hashlib.sha256)
-
-    # 计算HMAC并转换为十六进制字符串（模拟Java代码中的字节到十六进制转换）
-    # Java代码中使用了自定义的十六进制编码，这里保持一致
-    hex_digits = '0123456789abcdef'
-    digest = h.digest()
-    result = []
-    for b in digest:
-        # 与Java代码中的逻辑完全对应：(b & 255) 确保为无符号字节
-        i = b & 0xff
-        # 高4位和低4位分别转换
-        result.append(hex_digits[i >> 4])
-        result.append(hex_digits[i & 0x0f])
-
-    # 转为大写并返回
-    return ''.join(result).upper()
+    """HmacSHA256签名，返回大写十六进制字符串（与Java端逐字节转换的结果一致）"""
+    h = _keyed_hmac(key).copy()
+    h.update(data.encode('utf-8'))
+    return h.hexdigest().upper()
+
+
+def canonical_sign_string(params, key):
+    """按key自然顺序拼接非空参数：k1=v1&k2=v2&...&key=密钥（与TextUtils.isEmpty()的判空一致）"""
+    parts = [f"{k}={v}" for k, v in sorted(params.items()) if not text_utils_is_empty(v)]
+    parts.append(f"key={key}")
+    return '&'.join(parts)
 
 def print_formatted_json(data, indent=2, ensure_ascii=False):
     """
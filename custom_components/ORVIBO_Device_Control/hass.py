@@ -1,26 +1,22 @@
 
 from .const import (
-    DOMAIN,
     ORVIBO_SWITCH_MODEL
 )
+from .registry import DeviceRegistry
+
+# 以下访问函数均作用于单个配置项（账号/家庭）的设备注册表
 
 def get_data_from_list(data: list[dict], key1: str, value1, key2: str, def_value):
     import logging
     _LOGGER = logging.getLogger(__name__)
     try:
-        _LOGGER.debug("get_data_from_list调用: key1=%s, value1=%s, key2=%s, def_value=%s", key1, value1, key2, def_value)
-        _LOGGER.debug("数据列表: %s", data)
         if not isinstance(data, list):
             _LOGGER.error("数据不是列表类型: %s", type(data))
             return def_value
         
         for device in data:
-            _LOGGER.debug("检查设备: %s", device)
             if device.get(key1) == value1:
-                _LOGGER.debug("找到匹配项: %s=%s, 返回%s=%s", key1, value1, key2, device.get(key2, def_value))
                 return device.get(key2, def_value)
-        
-        _LOGGER.debug("未找到匹配项，返回默认值: %s", def_value)
         return def_value
     except Exception as e:
         _LOGGER.error("get_data_from_list错误: %s", e)
@@ -48,83 +44,77 @@ def deduplicate_by_key(data: list[dict], key: str):
                 result_dict[device_id] = item
     return list(result_dict.values())
 
-def get_current_floors(hass):
-    return hass.data[DOMAIN]["floor"]
+def get_current_floors(registry):
+    return registry.floor
 
-def get_current_family(hass):
-    return hass.data[DOMAIN]["family"]
+def get_current_family(registry):
+    return registry.family
 
-def get_current_rooms(hass):
-    return hass.data[DOMAIN]["room_list"]
+def get_current_rooms(registry):
+    return registry.rooms
 
-def get_current_devices(hass):
-    return hass.data[DOMAIN]["device_list"]
+def get_current_devices(registry):
+    return registry.devices
 
-def get_current_state(hass):
-    return hass.data[DOMAIN]["state_list"]
+def get_current_state(registry):
+    return registry.states
 
-def get_name_by_id(hass, device_id):
-    return get_data_from_list(hass.data[DOMAIN]["device_list"], "deviceId", device_id, "deviceName", "")
+def get_name_by_id(registry, device_id):
+    return registry.get_device_value(device_id, "deviceName", "")
 
-def get_uid_by_id(hass, device_id):
-    return get_data_from_list(hass.data[DOMAIN]["device_list"], "deviceId", device_id, "uid", "")
+def get_uid_by_id(registry, device_id):
+    return registry.get_device_value(device_id, "uid", "")
 
-def get_model_by_id(hass, device_id):
-    return get_data_from_list(hass.data[DOMAIN]["device_list"], "deviceId", device_id, "model", "")
+def get_model_by_id(registry, device_id):
+    return registry.get_device_value(device_id, "model", "")
 
-def get_room_id_by_id(hass, device_id):
-    return get_data_from_list(hass.data[DOMAIN]["device_list"], "deviceId", device_id, "roomId", "")
+def get_room_id_by_id(registry, device_id):
+    return registry.get_device_value(device_id, "roomId", "")
 
-def get_name_by_uid(hass, uid):
-    return get_data_from_list(hass.data[DOMAIN]["device_list"], "uid", uid, "deviceName", "")
+def get_name_by_uid(registry, uid):
+    device = registry.get_device_by_uid(uid)
+    return device.get("deviceName", "") if device else ""
 
-def get_id_by_uid(hass, uid):
-    import logging
-    _LOGGER = logging.getLogger(__name__)
-    device_list = hass.data[DOMAIN]["device_list"]
-    _LOGGER.debug("get_id_by_uid调用: UID=%s, 设备列表=%s", uid, device_list)
-    
-    # 遍历设备列表，查找匹配的UID
-    for device in device_list:
-        device_uid = device.get("uid")
-        device_id = device.get("deviceId")
-        _LOGGER.debug("检查设备: UID=%s, device_id=%s, 名称=%s", device_uid, device_id, device.get('deviceName'))
-        if device_uid == uid:
-            _LOGGER.debug("找到匹配的设备: UID=%s, device_id=%s, 名称=%s", device_uid, device_id, device.get('deviceName'))
-            return device_id
-    
-    _LOGGER.debug("未找到匹配的设备，UID=%s", uid)
-    return ""
-
-def get_state_by_id(hass, device_id):
-    return get_data_from_list(hass.data[DOMAIN]["state_list"], "deviceId", device_id, "value1", 1)
-
-def get_model_name_by_model_id(hass, model_id):
+def get_id_by_uid(registry, uid):
+    return registry.get_id_by_uid(uid)
+
+def has_device(registry, device_id):
+    return registry.has_device(device_id)
+
+def get_state_by_id(registry, device_id):
+    return registry.get_state_value(device_id, "value1", 1)
+
+def get_model_name_by_model_id(registry, model_id):
     return ORVIBO_SWITCH_MODEL.get(model_id,"")
 
-def get_room_name_by_room_id(hass, room_id):
-    return get_data_from_list(hass.data[DOMAIN]["room_list"], "roomId", room_id, "roomName", "")
+def get_room_name_by_room_id(registry, room_id):
+    room = registry.get_room(room_id)
+    return room.get("roomName", "") if room else ""
+
+def set_state_by_id(registry, device_id, state):
+    return registry.set_state_value(device_id, "value1", state)
 
-def set_state_by_id(hass, device_id, state):
-    return set_data_in_list(hass.data[DOMAIN]["state_list"], "deviceId", device_id, "value1", state)
+def set_state_by_uid(registry, uid, state):
+    return registry.set_state_value(registry.get_id_by_uid(uid), "value1", state)
 
-def set_state_by_uid(hass, uid, state):
-    return set_data_in_list(hass.data[DOMAIN]["state_list"], "uid", uid, "value1", state)
+def set_current_floor(registry, floor):
+    registry.floor = floor
 
-def set_current_floor(hass, floor):
-    hass.data[DOMAIN]["floor"] = floor
+def set_current_family(registry, family):
+    registry.family = family
 
-def set_current_family(hass, family):
-    hass.data[DOMAIN]["family"] = family
+def set_current_rooms(registry, rooms):
+    registry.replace_rooms(rooms)
 
-def set_current_rooms(hass, rooms):
-    hass.data[DOMAIN]["room_list"] = rooms
+def set_current_devices(registry, devices):
+    registry.replace_devices(devices)
 
-def set_current_devices(hass, devices):
-    hass.data[DOMAIN]["device_list"] = devices
+def set_current_state(registry, state_list):
+    registry.replace_states(state_list)
 
-def set_current_state(hass, state_list):
-    hass.data[DOMAIN]["state_list"] = state_list
+def update_current_state(registry, state_list):
+    for state in state_list:
+        registry.upsert_state(state)
 
-def set_device_state(hass, device_id, state):
-    set_data_in_list(hass.data[DOMAIN]["state_list"], "deviceId", device_id, "state", state)
\ No newline at end of file
+def set_device_state(registry, device_id, state):
+    registry.set_state_value(device_id, "state", state)
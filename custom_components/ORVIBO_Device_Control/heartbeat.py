@@ -0,0 +1,154 @@
+# custom_components/wifi_switch/heartbeat.py
+import time
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from .const import (
+    SSL_HEARTBEAT_INTERVAL, SSL_HEARTBEAT_MIN_INTERVAL, SSL_HEARTBEAT_MIN_TIMEOUT,
+    SSL_COMMAND_TIMEOUT, SSL_IDLE_TIMEOUT, SSL_READ_DEADLINE_GRACE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HeartbeatScheduler:
+    """按链路空闲时间调度心跳（只记录状态，不做IO）
+
+    链路空闲达到interval才需要发送心跳；心跳往返耗时按平滑RTT/RTT偏差估计，
+    RTT明显升高或心跳丢失时间隔减半（不低于min_interval），正常应答时逐步放宽回max_interval。
+    """
+
+    # 判定RTT升高的偏差倍数（与TCP重传超时的估计方式相同）
+    RTT_DEVIATION_FACTOR = 4
+    # 正常应答时每次放宽的比例
+    RELAX_FACTOR = 1.5
+
+    def __init__(
+        self,
+        max_interval: float = SSL_HEARTBEAT_INTERVAL,
+        min_interval: float = SSL_HEARTBEAT_MIN_INTERVAL,
+        max_timeout: float = SSL_COMMAND_TIMEOUT,
+    ):
+        # 服务器空闲SSL_IDLE_TIMEOUT秒后断开，间隔至少留出一半余量
+        self.max_interval = min(max_interval, SSL_IDLE_TIMEOUT / 2)
+        self.min_interval = min(min_interval, self.max_interval)
+        self.max_timeout = max_timeout
+        self.interval = self.max_interval
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.last_rtt: Optional[float] = None
+        self.misses = 0
+
+    def reset(self):
+        """新连接开始时恢复初始状态"""
+        self.interval = self.max_interval
+        self.srtt = None
+        self.rttvar = None
+        self.last_rtt = None
+        self.misses = 0
+
+    def delay(self, idle: float) -> float:
+        """距离下一次需要发送心跳的秒数，<=0表示现在发送"""
+        return self.interval - idle
+
+    @property
+    def ack_timeout(self) -> float:
+        """等待心跳应答的超时：平滑RTT加偏差，限制在[SSL_HEARTBEAT_MIN_TIMEOUT, max_timeout]"""
+        if self.srtt is None:
+            return self.max_timeout
+        rto = self.srtt + self.RTT_DEVIATION_FACTOR * self.rttvar
+        return min(self.max_timeout, max(SSL_HEARTBEAT_MIN_TIMEOUT, rto))
+
+    def on_ack(self, rtt: float):
+        """收到心跳应答"""
+        self.last_rtt = rtt
+        self.misses = 0
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+            return
+        rising = rtt > self.srtt + self.RTT_DEVIATION_FACTOR * self.rttvar
+        self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+        self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        if rising:
+            self._set_interval(self.interval / 2, "心跳RTT升高至%.3f秒", rtt)
+        else:
+            self._set_interval(self.interval * self.RELAX_FACTOR, None)
+
+    def on_alive(self):
+        """心跳未应答，但等待期间其他请求收到了应答：链路存活，清零丢失计数，不更新RTT"""
+        self.misses = 0
+
+    def on_miss(self):
+        """心跳发送失败或等待应答超时"""
+        self.misses += 1
+        self._set_interval(self.interval / 2, "心跳连续丢失%d次", self.misses)
+
+    def _set_interval(self, interval: float, reason: Optional[str], *args):
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        if interval != self.interval and reason:
+            _LOGGER.debug(reason + "，心跳间隔调整为%.1f秒", *args, interval)
+        self.interval = interval
+
+
+class LivenessMonitor:
+    """连接存活检测：按心跳约定的读超时判定半开连接
+
+    已登录的连接在空闲时每个心跳间隔都会收到心跳应答，因此超过
+    interval + ack_timeout + grace 仍未收到任何数据包即判定连接失效。
+    只使用一个事件循环定时器，收到数据包时只需更新last_rx，不为每次读取创建超时任务。
+    """
+
+    def __init__(
+        self,
+        heartbeat: HeartbeatScheduler,
+        on_dead: Callable[[str], None],
+        grace: float = SSL_READ_DEADLINE_GRACE,
+    ):
+        self.heartbeat = heartbeat
+        self.on_dead = on_dead
+        self.grace = grace
+        # 最近一次收到数据包的时刻（time.monotonic()）
+        self.last_rx = time.monotonic()
+        # 检测到失效的次数，以及最近一次从最后收到数据包到判定失效的耗时
+        self.detections = 0
+        self.last_time_to_detect: Optional[float] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def deadline(self) -> float:
+        """读超时（秒）"""
+        return self.heartbeat.interval + self.heartbeat.ack_timeout + self.grace
+
+    def start(self):
+        """开始检测（登录成功后调用）"""
+        self.stop()
+        self.last_rx = time.monotonic()
+        self._schedule(self.deadline)
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def expire(self, reason: str):
+        """判定连接失效：记录检测耗时并通知调用方"""
+        if self._handle is None:
+            return
+        self.stop()
+        self.detections += 1
+        self.last_time_to_detect = time.monotonic() - self.last_rx
+        _LOGGER.warning("SSL连接已失效（%s），距最后收到数据包%.1f秒", reason, self.last_time_to_detect)
+        self.on_dead(reason)
+
+    def _schedule(self, delay: float):
+        self._handle = asyncio.get_running_loop().call_later(delay, self._check)
+
+    def _check(self):
+        deadline = self.deadline
+        silent = time.monotonic() - self.last_rx
+        if silent >= deadline:
+            self.expire("%.0f秒未收到数据包" % silent)
+        else:
+            self._schedule(deadline - silent)
@@ -2,31 +2,30 @@
 # -*- coding: utf-8 -*-
 
 import logging
-import json
 import ssl
+import time
 import asyncio
 import aiohttp
 from homeassistant.core import HomeAssistant  #引入HA核心类
 from typing import Optional, Any
+from . import json_codec
 from .packet import HomemateJsonData
+from .device_state import DeviceState
+from .registry import DeviceRegistry
 from .const import (
     ID_UNSET,
-    ORVIBO_SWITCH_MODEL,
-    HTTP_HEADERS
+    HTTP_HEADERS,
+    FULL_SYNC_INTERVAL,
+    READTABLE_WATERMARK_OVERLAP,
+    HOMEPAGE_CHUNK_SIZE,
 )
 from .hass import  (
-    get_name_by_id,
-    get_uid_by_id,
-    get_model_by_id,
-    get_room_id_by_id,
-    deduplicate_by_key,
     set_current_floor,
     set_current_family,
     set_current_rooms,
     set_current_devices,
     set_current_state,
-    get_current_devices,
-    get_current_state,
+    update_current_state,
 )
 
 
@@ -39,11 +38,18 @@ class HttpsClient():
             self,
             hass: HomeAssistant,
             username: str,
-            password: str
+            password: str,
+            registry: Optional[DeviceRegistry] = None,
+            session: Optional[aiohttp.ClientSession] = None
     ):
+        """
+        :param registry: 本账号的设备注册表（多账号时各自独立）
+        :param session: 共享的HTTPS会话（连接池），为空时自行创建
+        """
         self.hass = hass
         self.username = username
         self.password = password
+        self.registry = registry if registry is not None else DeviceRegistry()
 
         self.user_id = None
         self.session_id: Optional[str] = None  # 从SSL客户端接收
@@ -52,8 +58,16 @@ class HttpsClient():
         self.family_name: Optional[str] = None
         self.room_id: Optional[str] = None
 
+        # 按家庭记录readtable的更新水位（秒）和上次全量同步时间
+        self._last_update_time: dict[str, int] = {}
+        self._last_full_sync: dict[str, float] = {}
+        # 按家庭记录已应用的每个设备的最新状态行（deviceId -> (updateTime, 状态行)），用于过滤水位重叠重复返回的记录
+        self._applied_states: dict[str, dict[str, tuple[int, dict]]] = {}
+
         self.proxy = ""
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.session: Optional[aiohttp.ClientSession] = session
+        # 共享会话由账号管理器关闭，只有自行创建的会话才在断开时关闭
+        self._owns_session = session is None
 
     @property
     def is_logged_in(self) -> bool:
@@ -76,7 +90,7 @@ class HttpsClient():
 
 
     async def _connect(self):
-        if self.session:
+        if self.session and not self.session.closed:
             return
 
         #ssl_context = ssl.create_default_context()
@@ -85,11 +99,12 @@ class HttpsClient():
         connector = aiohttp.TCPConnector(ssl=ssl_context)
 
         self.session = aiohttp.ClientSession(connector=connector)
+        self._owns_session = True
         _LOGGER.debug("HTTPS 会话创建成功")
 
     async def _disconnect(self):
         """关闭 HTTP 会话"""
-        if self.session and not self.session.closed:
+        if self.session and not self.session.closed and self._owns_session:
             await self.session.close()
             self.session = None
             _LOGGER.debug("HTTPS 会话关闭")
@@ -99,7 +114,7 @@ class HttpsClient():
         """接收SSL客户端的session_id（线程安全）"""
         self.session_id = session_id
 
-    async def _send_request(self, url, data):
+    async def _send_request(self, url, data, decode=json_codec.loads):
         if not self.session:
             raise ConnectionError("客户端未连接")
         
@@ -128,10 +143,11 @@ class HttpsClient():
                     )
                 
                 resp.raise_for_status()
-                data = await resp.text()
-                _LOGGER.debug(f"服务器原始响应数据: {data}")
-                resp = json.loads(data)
-                return resp
+                # 直接从响应字节解析，不生成中间字符串
+                body = await resp.read()
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug("服务器原始响应数据: %s", body.decode("utf-8", "replace"))
+                return decode(body)
             except aiohttp.ClientResponseError as e:
                 # 只对特定的HTTP错误进行重试
                 if e.status in [502, 503, 504] and attempt < max_retries - 1:
@@ -221,13 +237,14 @@ class HttpsClient():
             _LOGGER.error("HTTPS 请求失败: %s", e)
             return {}
 
-    async def _fetch_device_status(self, access_token, session_id, user_id, user_name, family_id) -> dict:
+    async def _fetch_device_status(self, access_token, session_id, user_id, user_name, family_id, last_update_time=0) -> dict:
         try:
             ret = HomemateJsonData.get_devices_status(access_token=access_token,
                                                       session_id=session_id,
                                                       user_id=user_id,
                                                       user_name=user_name,
-                                                      family_id=family_id)
+                                                      family_id=family_id,
+                                                      last_update_time=last_update_time)
             resp = await self._send_request(ret['url'], ret['data'])
             if "message" in resp:
                 _LOGGER.error(resp["message"])
@@ -251,7 +268,8 @@ class HttpsClient():
             ret = HomemateJsonData.get_homepage_data(family_id=family_id,
                                                      user_id=user_id,
                                                      access_token=access_token)
-            resp = await self._send_request(ret['url'], ret['data'])
+            # 首页数据是最大的响应，按行结构解码
+            resp = await self._send_request(ret['url'], ret['data'], json_codec.loads_homepage)
             if "message" in resp:
                 _LOGGER.error(resp["message"])
                 return {}
@@ -279,28 +297,41 @@ class HttpsClient():
             if not await self.ensure_login():
                 _LOGGER.error("HTTPS 未登录")
                 return False
+
+            # 超过全量同步间隔（或尚无水位）时从0开始拉取全表，否则只拉取水位之后变化的记录
+            family_id = self.family_id
+            request_time = int(time.time())
+            full_sync = (family_id not in self._last_update_time or
+                         time.monotonic() - self._last_full_sync.get(family_id, 0) >= FULL_SYNC_INTERVAL.total_seconds())
+            last_update_time = 0 if full_sync else self._last_update_time[family_id]
             data = await self._fetch_device_status(
                                     self.access_token,
                                     self.session_id,
                                     self.user_id,
                                     self.username,
-                                    self.family_id)
+                                    family_id,
+                                    last_update_time)
             assert data
             device = data.get("device", [])
             if isinstance(device, list) and len(device) > 0:
                 device = device[0]
-            self.room_id = device.get("roomId", "")
+                self.room_id = device.get("roomId", "")
             _state_list = data.get("deviceStatus", [])
-            if _state_list:
-                # 只保留switch设备的状态
-                device_list = get_current_devices(self.hass) or []
-                switch_id_list = [item['deviceId'] for item in device_list if 'deviceId' in item]
-                if switch_id_list:
-                    _state_list = [item for item in _state_list if item.get('deviceId') in switch_id_list]
-                _state_list = deduplicate_by_key(_state_list, 'deviceId')
-                set_current_state(self.hass, _state_list)
-                return True
-            return False
+            if full_sync:
+                if not _state_list:
+                    return False
+                applied = self._applied_states[family_id] = {}
+                set_current_state(self.registry, self._dedupe_states(_state_list, applied))
+                self._last_full_sync[family_id] = time.monotonic()
+            else:
+                # 增量记录按deviceId去重后合并进注册表（只接受已登记设备的状态）
+                new_states = self._dedupe_states(_state_list, self._applied_states.setdefault(family_id, {}))
+                if new_states:
+                    update_current_state(self.registry, new_states)
+            _LOGGER.debug("readtable %s同步: lastUpdateTime=%s, 返回%d条状态",
+                          "全量" if full_sync else "增量", last_update_time, len(_state_list))
+            self._last_update_time[family_id] = self._get_watermark(_state_list, last_update_time, request_time)
+            return True
         except aiohttp.ClientError as e:
             _LOGGER.error("拉取设备状态失败（网络错误）：%s",e)
             return False
@@ -308,6 +339,141 @@ class HttpsClient():
             _LOGGER.error("拉取设备状态失败：%s",e)
             return False
 
+    @staticmethod
+    def _update_time(state: dict) -> Optional[int]:
+        """记录的updateTime（统一为秒），未携带或不是数值时返回None"""
+        update_time = state.get("updateTime")
+        if isinstance(update_time, bool) or not isinstance(update_time, (int, float)):
+            return None
+        if update_time > 10 ** 12:
+            update_time //= 1000    # 毫秒转换为秒
+        return int(update_time)
+
+    @classmethod
+    def _get_watermark(cls, state_list: list[dict], last_update_time: int, request_time: int) -> int:
+        """根据返回记录的updateTime计算新的水位（秒）
+
+        水位只按服务器时间推进，并回退READTABLE_WATERMARK_OVERLAP秒，避免漏掉与最新记录同一秒内的更新；
+        本地请求时间只在尚无水位且没有任何记录携带updateTime时使用，以免本地时钟超前导致漏拉。水位不后退。
+        """
+        update_times = [t for t in map(cls._update_time, state_list) if t is not None]
+        if update_times:
+            watermark = max(update_times) - READTABLE_WATERMARK_OVERLAP
+        elif last_update_time:
+            return last_update_time
+        else:
+            watermark = request_time - READTABLE_WATERMARK_OVERLAP
+        return max(last_update_time, watermark, 0)
+
+    @classmethod
+    def _dedupe_states(cls, state_list: list[dict], applied: dict[str, tuple[int, dict]]) -> list[dict]:
+        """按deviceId去重：同一设备只保留updateTime最新的一行，并跳过不比已应用记录新的行
+
+        水位回退后重叠区间内的记录会被重复返回：比已应用的更旧、或与已应用的完全相同的行被丢弃，
+        同一秒内内容不同的行仍然保留。未携带updateTime的记录总是保留。applied随之更新。
+        """
+        latest: dict[Any, dict] = {}
+        for index, state in enumerate(state_list):
+            device_id = state.get("deviceId")
+            update_time = cls._update_time(state)
+            if device_id is None or update_time is None:
+                latest[("row", index)] = state
+                continue
+            current = latest.get(device_id)
+            if current is not None and update_time < cls._update_time(current):
+                continue
+            previous = applied.get(device_id)
+            if previous is not None and (update_time < previous[0] or
+                                         (update_time == previous[0] and state == previous[1])):
+                continue
+            latest[device_id] = state
+        for device_id, state in latest.items():
+            if isinstance(device_id, str):
+                applied[device_id] = (cls._update_time(state), state)
+        return list(latest.values())
+
+    async def _stream_https_homepage(self, family_id, user_id, access_token) -> int:
+        """流式拉取首页数据：边接收边解析，设备与状态逐行写入注册表，返回设备数量
+
+        与_send_request一致，遇到502/503/504或网络错误时重试，每次重试重新开始一轮同步。
+        """
+        ret = HomemateJsonData.get_homepage_data(family_id=family_id,
+                                                 user_id=user_id,
+                                                 access_token=access_token)
+        max_retries = 3
+        retry_delay = 1  # 秒
+
+        for attempt in range(max_retries):
+            try:
+                return await self._stream_homepage_once(ret['url'], ret['data'])
+            except aiohttp.ClientResponseError as e:
+                # 只对特定的HTTP错误进行重试
+                if e.status in [502, 503, 504] and attempt < max_retries - 1:
+                    _LOGGER.warning(f"首页数据请求失败，正在重试 ({attempt + 1}/{max_retries}): {e}")
+                    await asyncio.sleep(retry_delay)
+                else:
+                    raise
+            except aiohttp.ClientError as e:
+                # 对其他网络错误（含接收中途断开、读取超时）进行重试
+                if attempt < max_retries - 1:
+                    _LOGGER.warning(f"首页数据接收失败，正在重试 ({attempt + 1}/{max_retries}): {e}")
+                    await asyncio.sleep(retry_delay)
+                else:
+                    raise
+
+    async def _stream_homepage_once(self, url, data) -> int:
+        """发送一次首页数据请求并流式写入注册表；中途失败时本轮同步不移除任何记录"""
+        registry = self.registry
+        parser = json_codec.HomepageStreamParser()
+        collected = {"devices": 0, "room": [], "floor": None, "familyConfig": None}
+        complete = False
+        registry.begin_sync()
+        try:
+            async with self.session.post(
+                url=url,
+                # 不限制总时长，只限制单次读取的间隔
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=10),
+                data=data,
+                headers=HTTP_HEADERS,
+                skip_auto_headers=["Accept", "Connection"],
+                proxy=self.proxy,
+                ssl=False
+            ) as resp:
+                resp.raise_for_status()
+                async for chunk in resp.content.iter_chunked(HOMEPAGE_CHUNK_SIZE):
+                    self._apply_homepage_rows(registry, parser.feed(chunk), collected)
+            self._apply_homepage_rows(registry, parser.close(), collected)
+
+            if "message" in parser.top:
+                _LOGGER.error(parser.top["message"])
+                return 0
+            if not parser.has_data:
+                _LOGGER.error("响应包中未找到[data]")
+                return 0
+            # 没有设备时保留现有注册表（与非流式处理一致）
+            complete = collected["devices"] > 0
+        finally:
+            registry.end_sync(complete)
+
+        set_current_floor(self.registry, collected["floor"] or {})
+        set_current_family(self.registry, collected["familyConfig"] or {})
+        set_current_rooms(self.registry, collected["room"])
+        return collected["devices"]
+
+    @staticmethod
+    def _apply_homepage_rows(registry, rows, collected: dict):
+        for section, row in rows:
+            if section == "device":
+                registry.sync_device(row)
+                collected["devices"] += 1
+            elif section == "deviceStatus":
+                registry.sync_state(row)
+            elif section == "room":
+                collected["room"].append(row)
+            elif collected[section] is None:
+                # floor/familyConfig只取第一行
+                collected[section] = row
+
     async def fetch_homepage_data(self)->bool:
         """获取首页数据，所需参数：family_id,user_id,access_token"""
         try:
@@ -315,63 +481,23 @@ class HttpsClient():
                 _LOGGER.error("HTTPS 未登录")
                 return False
 
-            data = await self._fetch_https_homepage(self.family_id, self.user_id, self.access_token)
-            assert data
-
-            device_list = data.get("device", [])
-            state_list = data.get("deviceStatus", [])
-
-            set_current_floor(self.hass, data.get("floor", [{}])[0] if data.get("floor") else {})
-            set_current_family(self.hass, data.get("familyConfig", [{}])[0] if data.get("familyConfig") else {})
-            set_current_rooms(self.hass, data.get("room", []))
-
-            # 确保device_list是一个列表
-            if not isinstance(device_list, list):
-                device_list = []
-                _LOGGER.warning("设备列表不是预期的列表类型")
-            
-            # 记录所有设备型号和详细信息
-            all_models = set([item.get('model') for item in device_list if item.get('model')])
-            _LOGGER.debug(f"所有设备型号: {all_models}")
-            _LOGGER.debug(f"已配置的型号映射: {list(ORVIBO_SWITCH_MODEL.items())}")
-            
-            # 记录所有设备的详细信息
-            for device in device_list:
-                device_id = device.get('deviceId')
-                model = device.get('model')
-                device_name = device.get('deviceName')
-                device_type = ORVIBO_SWITCH_MODEL.get(model, "未知类型")
-                _LOGGER.debug(f"设备ID: {device_id}, 名称: {device_name}, 型号: {model}, 类型: {device_type}")
-            
-            # 不按型号过滤设备，而是记录所有设备
-            _LOGGER.debug(f"发现的设备总数: {len(device_list)}")
-            if not device_list:
+            try:
+                device_count = await self._stream_https_homepage(self.family_id, self.user_id, self.access_token)
+            except ValueError as e:
+                # 流式解析失败（数据结构不符合预期）时退回整包解析
+                _LOGGER.warning("首页数据流式解析失败，改为整包解析: %s", e)
+                device_count = await self._load_https_homepage()
+
+            _LOGGER.debug(f"发现的设备总数: {device_count}")
+            if not device_count:
                 return False
-            
-            # 检查并去重设备ID，优先保留delFlag=0的设备
-            _LOGGER.debug("原始设备列表: %s", device_list)
-            device_list = deduplicate_by_key(device_list, 'deviceId')
-            _LOGGER.debug("去重后的设备列表: %s", device_list)
-            
-            # 记录设备列表结构和UID-device_id映射
-            _LOGGER.debug("设备列表结构和UID-device_id映射:")
-            for device in device_list:
-                device_id = device.get('deviceId')
-                uid = device.get('uid')
-                device_name = device.get('deviceName')
-                _LOGGER.debug("设备: ID=%s, UID=%s, 名称=%s, 模型=%s, 房间ID=%s", 
-                              device_id, uid, device_name, device.get('model'), device.get('roomId'))
-                _LOGGER.debug("UID %s 映射到设备ID %s", uid, device_id)
-            
-            # 只保留switch设备的状态
-            switch_id_list = [item['deviceId'] for item in device_list if 'deviceId' in item]
-            if switch_id_list:
-                state_list = [item for item in state_list if item.get('deviceId') in switch_id_list]
-            state_list = deduplicate_by_key(state_list, 'deviceId')
-            
-            # 保存过滤和去重后的设备列表和状态列表
-            set_current_devices(self.hass, device_list)
-            set_current_state(self.hass, state_list)
+
+            # 首页数据即一次全量同步，据此初始化readtable水位
+            registry = self.registry
+            self._last_update_time[self.family_id] = self._get_watermark(registry.states, 0, int(time.time()))
+            self._applied_states[self.family_id] = {}
+            self._dedupe_states(registry.states, self._applied_states[self.family_id])
+            self._last_full_sync[self.family_id] = time.monotonic()
             return True
         except aiohttp.ClientError as e:
             _LOGGER.error("获取主页数据失败（网络错误）：%s",e)
@@ -380,21 +506,46 @@ class HttpsClient():
             _LOGGER.error("获取主页数据失败：%s", e)
             return False
 
-    async def update_state_list(self) -> None | dict[str, dict[str, Any]]:
+    async def _load_https_homepage(self) -> int:
+        """整包拉取并解析首页数据，写入注册表，返回设备数量"""
+        data = await self._fetch_https_homepage(self.family_id, self.user_id, self.access_token)
+        if not data:
+            return 0
+
+        device_list = data.get("device", [])
+        state_list = data.get("deviceStatus", [])
+
+        set_current_floor(self.registry, data.get("floor", [{}])[0] if data.get("floor") else {})
+        set_current_family(self.registry, data.get("familyConfig", [{}])[0] if data.get("familyConfig") else {})
+        set_current_rooms(self.registry, data.get("room", []))
+
+        # 确保device_list是一个列表
+        if not isinstance(device_list, list):
+            device_list = []
+            _LOGGER.warning("设备列表不是预期的列表类型")
+        if not device_list:
+            return 0
+
+        # 注册表按deviceId去重（优先保留delFlag=0的设备），并增量维护uid/roomId索引
+        set_current_devices(self.registry, device_list)
+        # 注册表只接受已登记设备的状态
+        set_current_state(self.registry, state_list)
+        return len(device_list)
+
+    async def update_state_list(self, device_states: Optional[dict[str, DeviceState]] = None) -> None | dict[str, DeviceState]:
         """
         拉取设备列表（核心方法）
+        :param device_states: 已有的设备状态记录，存在时原地更新而不是重建
         """
         try:
-            device_list = get_current_devices(self.hass) or []
-            if not device_list or not self.session_id:
+            registry = self.registry
+            if not registry.devices or not self.session_id:
                 if not await self.fetch_homepage_data():
                     _LOGGER.debug("获取主页数据失败，尝试使用现有设备列表")
-                    device_list = get_current_devices(self.hass) or []
-                else:
-                    device_list = get_current_devices(self.hass) or []
             else:
                 await self.fetch_device_state()
-            state_list = get_current_state(self.hass)
+            device_list = registry.devices
+            state_list = registry.states
 
 
             if not device_list:
@@ -407,18 +558,21 @@ class HttpsClient():
 
             _LOGGER.debug("获取到%d个设备，以及%d个设备状态", len(device_list), len(state_list))
 
+            previous = device_states or {}
             device_states = {}
+            # 逐设备日志只在DEBUG启用时输出，避免每次轮询按设备构造字符串
+            debug = _LOGGER.isEnabledFor(logging.DEBUG)
             for state in state_list:
                 device_id = state.get("deviceId", "")
                 if not device_id:
                     continue
                     
                 # 输出完整的设备状态信息，用于验证服务器返回的数据结构
-                _LOGGER.debug(f"设备ID: {device_id} 的完整状态信息: {state}")
+                if debug:
+                    _LOGGER.debug("设备ID: %s 的完整状态信息: %s", device_id, state)
                 
-                # 获取设备类型
-                device_model = get_model_by_id(self.hass, device_id)
-                device_type = ORVIBO_SWITCH_MODEL.get(device_model, "Switch")
+                device = registry.get_device(device_id) or {}
+                device_model = device.get("model", "")
                 
                 # 解析设备状态值
                 value1 = state.get("value1", 1)
@@ -427,75 +581,43 @@ class HttpsClient():
                 value4 = state.get("value4", 0)
                 online = state.get("online", 1)
                 
-                # 根据设备类型使用不同的状态转换逻辑
-                if device_type == "Ventilation":
-                    # 新风设备：value1=0→慢（开），value1=50→停（关），value1=100→快（开）
-                    status = False if value1 == 50 else True
-                    # 根据value1设置风速档位
-                    if value1 == 0:
-                        fan_speed = "慢"
-                    elif value1 == 50:
-                        fan_speed = "停"
-                    elif value1 == 100:
-                        fan_speed = "快"
-                    else:
-                        fan_speed = "未知"
-                elif device_type == "Air Conditioner":
-                    # 空调设备：value1=1→关，value1=0→开
-                    status = False if value1 == 1 else True
-                else:
-                    # 默认逻辑：value1=0→开，其他→关
-                    status = value1 == 0
-                
-                # 解析value4为目标温度和室内温度
-                target_temperature = (value4 >> 16) // 100
-                indoor_temperature = (value4 & 0xFFFF) // 100
+                device_name = device.get("deviceName", "")
+                device_uid = device.get("uid", "")
+                room_id = device.get("roomId", "")
                 
-                _LOGGER.debug(f"设备ID: {device_id}, value1: {value1}, 转换后状态: {status}, online: {online}")
-                _LOGGER.debug(f"模式: {value2}, 风速: {value3}, 目标温度: {target_temperature}°C, 室内温度: {indoor_temperature}°C")
-
-                device_name = get_name_by_id(self.hass, device_id)
-                device_uid = get_uid_by_id(self.hass, device_id)
-                device_model = get_model_by_id(self.hass, device_id)
-                room_id = get_room_id_by_id(self.hass, device_id)
-                
-                _LOGGER.debug("处理设备状态: device_id=%s, device_name=%s, device_uid=%s, status=%s", 
-                              device_id, device_name, device_uid, status)
+                if debug:
+                    _LOGGER.debug("处理设备状态: device_id=%s, device_name=%s, device_uid=%s, "
+                                  "value1=%s, value2=%s, value3=%s, value4=%s, online=%s",
+                                  device_id, device_name, device_uid, value1, value2, value3, value4, online)
                 
                 if device_name:
-                    device_states[device_id] = {
-                        "device_id": device_id,
-                        "device_name": device_name,
-                        "device_uid": device_uid,
-                        "model": device_model,
-                        "state": status,
-                        "online": online,
-                        "room_id": room_id,
-                        "value1": value1,  # 原始值：0为慢，50为停，100为快
-                        "value2": value2,  # 原始值
-                        "value3": value3,  # 原始值
-                        "value4": value4,  # 原始值
-                        "current_temperature": indoor_temperature,  # 解析后的室内温度
-                        "target_temperature": target_temperature,  # 解析后的目标温度
-                        "mode": value2,  # 保存模式
-                        "fan_speed": fan_speed if device_type == "Ventilation" else value3  # 保存风速
-                    }
+                    record = previous.get(device_id) or DeviceState(device_id)
+                    record.update(
+                        device_name=device_name,
+                        device_uid=device_uid,
+                        model=device_model,
+                        room_id=room_id,
+                        online=online,
+                    )
+                    # 按设备型号的编解码器把原始值转换为状态
+                    record.update(**record.codec.decode(record, value1, value2, value3, value4))
+                    device_states[device_id] = record
             
             # 为所有在设备列表中但不在设备状态中的设备创建基本状态
-            device_ids_in_states = set(device_states.keys())
             for device in device_list:
                 device_id = device.get("deviceId")
-                if device_id and device_id not in device_ids_in_states:
-                    _LOGGER.warning(f"为设备{device_id}创建默认状态")
-                    device_states[device_id] = {
-                        "device_id": device_id,
-                        "device_name": device.get("deviceName", "未知设备"),
-                        "device_uid": device.get("uid", ""),
-                        "model": device.get("model", ""),
-                        "state": False,
-                        "online": 1,
-                        "room_id": device.get("roomId", ""),
-                    }
+                if device_id and device_id not in device_states:
+                    record = previous.get(device_id)
+                    if record is None:
+                        _LOGGER.warning(f"为设备{device_id}创建默认状态")
+                        record = DeviceState(device_id)
+                    record.update(
+                        device_name=device.get("deviceName", "未知设备"),
+                        device_uid=device.get("uid", ""),
+                        model=device.get("model", ""),
+                        room_id=device.get("roomId", ""),
+                    )
+                    device_states[device_id] = record
             
             return device_states
         except aiohttp.ClientError as e:
@@ -0,0 +1,336 @@
+# custom_components/wifi_switch/json_codec.py
+"""JSON编解码适配：已安装orjson/msgspec时使用，否则退回标准库json"""
+import re
+import json
+import codecs
+import logging
+from typing import Any, Optional, Union
+
+_LOGGER = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+    _loads = orjson.loads
+    JSONDecodeError = (orjson.JSONDecodeError, UnicodeDecodeError)
+elif msgspec is not None:
+    JSON_BACKEND = "msgspec"
+    _loads = msgspec.json.decode
+    JSONDecodeError = (msgspec.DecodeError, UnicodeDecodeError)
+else:
+    JSON_BACKEND = "json"
+    _loads = json.loads
+    JSONDecodeError = (json.JSONDecodeError, UnicodeDecodeError)
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """直接从字节（或字符串）解析JSON，不经过中间字符串"""
+    if JSON_BACKEND == "msgspec" and isinstance(data, str):
+        data = data.encode("utf-8")
+    elif JSON_BACKEND == "json" and isinstance(data, memoryview):
+        data = bytes(data)
+    return _loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """紧凑格式序列化为UTF-8字节（仅用于本地数据，如抓包日志）"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    if msgspec is not None:
+        return msgspec.json.encode(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+
+
+# 首页数据各数组中实际用到的行字段（floor/familyConfig保留整行）
+ROW_FIELDS = {
+    "device": ("deviceId", "uid", "deviceName", "model", "roomId", "delFlag"),
+    "deviceStatus": ("deviceId", "uid", "value1", "value2", "value3", "value4", "online", "updateTime", "delFlag"),
+    "room": ("roomId", "roomName", "delFlag"),
+}
+
+
+if msgspec is not None:
+    # 首页数据中实际用到的行字段；其余字段在解码时直接跳过，不创建对象
+    # 字段缺省为UNSET，转换为字典时不出现，与原始行中缺少该键一致
+    UNSET = msgspec.UNSET
+
+    class DeviceRow(msgspec.Struct, kw_only=True):
+        deviceId: str = UNSET
+        uid: str = UNSET
+        deviceName: str = UNSET
+        model: str = UNSET
+        roomId: str = UNSET
+        delFlag: int = UNSET
+
+    class DeviceStatusRow(msgspec.Struct, kw_only=True):
+        deviceId: str = UNSET
+        uid: str = UNSET
+        value1: int = UNSET
+        value2: int = UNSET
+        value3: int = UNSET
+        value4: int = UNSET
+        online: int = UNSET
+        updateTime: int = UNSET
+        delFlag: int = UNSET
+
+    class RoomRow(msgspec.Struct, kw_only=True):
+        roomId: str = UNSET
+        roomName: str = UNSET
+        delFlag: int = UNSET
+
+    class HomepageData(msgspec.Struct, kw_only=True):
+        device: list[DeviceRow] = UNSET
+        deviceStatus: list[DeviceStatusRow] = UNSET
+        room: list[RoomRow] = UNSET
+        floor: list[dict] = UNSET
+        familyConfig: list[dict] = UNSET
+
+    class HomepageResponse(msgspec.Struct, kw_only=True):
+        status: int = UNSET
+        message: str = UNSET
+        data: HomepageData = UNSET
+
+    _homepage_decoder = msgspec.json.Decoder(HomepageResponse)
+
+
+def loads_homepage(data: bytes) -> dict:
+    """解析queryHomepageData响应
+
+    已安装msgspec时按行结构解码，只保留用到的字段；字段类型与预期不符时退回通用解析。
+    """
+    if msgspec is not None:
+        try:
+            return msgspec.to_builtins(_homepage_decoder.decode(data))
+        except msgspec.ValidationError as e:
+            _LOGGER.debug("首页数据不符合行结构，改用通用解析: %s", e)
+    return loads(data)
+
+
+class HomepageStreamParser:
+    """queryHomepageData响应的增量解析器
+
+    按块喂入响应字节，逐个产出data下device/deviceStatus/room/floor/familyConfig数组中的行，
+    只缓存尚未解析完的一行，不构造整个响应。顶层的status/message等字段保存在top中。
+
+    每个值先由_find_end按嵌套深度、字符串与转义找到结尾（跨块时从上次中断处继续，每个字节只扫描一次），
+    完整后才解码一次；data下其余不需要的字段只扫描不解码，已扫描的部分随即从缓冲中丢弃。
+    """
+
+    ROW_SECTIONS = frozenset(("device", "deviceStatus", "room", "floor", "familyConfig"))
+    # 已消费的文本超过该长度时从缓冲中丢弃
+    _COMPACT_SIZE = 64 * 1024
+
+    def __init__(self, fields: Optional[dict] = None):
+        # fields: 数组名 -> 保留的字段，其余字段在产出前丢弃以减少常驻内存
+        self.fields = ROW_FIELDS if fields is None else fields
+        self.top: dict = {}
+        self.has_data = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._scan = json.JSONDecoder().raw_decode
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        self._key = None
+        self._section = None
+        # 跨块扫描未完成的值时，下次继续扫描的位置、嵌套深度以及是否位于字符串内
+        self._scan_pos = None
+        self._depth = 0
+        self._in_string = False
+
+    def feed(self, chunk: bytes) -> list:
+        """喂入一块响应数据，返回本块中解析完成的(数组名, 行)列表"""
+        self._buf += self._decoder.decode(chunk)
+        return self._parse(final=False)
+
+    def close(self) -> list:
+        """响应结束，解析剩余数据；结构不完整时抛出ValueError"""
+        self._buf += self._decoder.decode(b"", final=True)
+        rows = self._parse(final=True)
+        if self._state != "end":
+            raise ValueError("首页数据不完整")
+        return rows
+
+    def _skip_ws(self) -> Optional[str]:
+        self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+        return self._buf[self._pos] if self._pos < len(self._buf) else None
+
+    def _find_end(self, final: bool) -> Optional[int]:
+        """返回当前位置（self._pos）的值结束的位置，只跟踪嵌套深度、字符串与转义，不构造值
+
+        数据不足时返回None并记下扫描进度，下次从中断处继续。
+        """
+        buf = self._buf
+        pos = self._scan_pos
+        if pos is None:
+            pos = self._pos
+            if buf[pos] not in '{["':
+                # 数字/字面量：到下一个分隔符为止；恰好结束在缓冲末尾时，可能还有后续字符未到达
+                match = _SCALAR_END.search(buf, pos)
+                if match is not None:
+                    return match.start()
+                return len(buf) if final else None
+            self._depth = 0
+            self._in_string = False
+        depth = self._depth
+        in_string = self._in_string
+        while True:
+            if in_string:
+                match = _STRING_SPECIAL.search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                    break
+                if match.group() == "\\":
+                    if match.end() == len(buf):
+                        # 转义符之后的字符还未到达，下次从转义符重新扫描
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                in_string = False
+                pos = match.end()
+                if depth == 0:
+                    self._scan_pos = None
+                    return pos
+            else:
+                match = _STRUCTURE.search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                    break
+                char = match.group()
+                pos = match.end()
+                if char == '"':
+                    in_string = True
+                elif char in "{[":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        self._scan_pos = None
+                        return pos
+        if final:
+            raise ValueError("首页数据不完整")
+        self._scan_pos = pos
+        self._depth = depth
+        self._in_string = in_string
+        return None
+
+    def _value(self, final: bool):
+        """解析当前位置的一个完整JSON值；数据不足时返回_INCOMPLETE"""
+        end = self._find_end(final)
+        if end is None:
+            return _INCOMPLETE
+        value, _ = self._scan(self._buf, self._pos)
+        self._pos = end
+        return value
+
+    def _skip_value(self, final: bool) -> bool:
+        """跳过当前位置的一个JSON值而不解码；数据不足时丢弃已扫描的部分并返回False"""
+        end = self._find_end(final)
+        if end is not None:
+            self._pos = end
+            return True
+        if self._scan_pos is not None:
+            self._drop(self._scan_pos)
+        return False
+
+    def _drop(self, pos: int):
+        """从缓冲中丢弃pos之前已消费的文本"""
+        self._buf = self._buf[pos:]
+        self._pos = max(self._pos - pos, 0)
+        if self._scan_pos is not None:
+            self._scan_pos -= pos
+
+    def _parse(self, final: bool) -> list:
+        rows = []
+        while True:
+            char = self._skip_ws()
+            if char is None:
+                break
+            state = self._state
+            if state == "start":
+                if char != "{":
+                    raise ValueError("首页数据不是JSON对象")
+                self._pos += 1
+                self._state = "top_key"
+            elif state in ("top_key", "data_key"):
+                # 对象内：逗号、结束括号或下一个键
+                if char == ",":
+                    self._pos += 1
+                    continue
+                if char == "}":
+                    self._pos += 1
+                    self._state = "end" if state == "top_key" else "top_key"
+                    continue
+                start = self._pos
+                key = self._value(final)
+                if key is _INCOMPLETE:
+                    break
+                if self._skip_ws() is None:
+                    self._pos = start
+                    break
+                if self._buf[self._pos] != ":":
+                    raise ValueError("首页数据格式错误")
+                self._pos += 1
+                self._key = key
+                self._state = "top_value" if state == "top_key" else "data_value"
+            elif state == "top_value":
+                if self._key == "data" and char == "{":
+                    self._pos += 1
+                    self.has_data = True
+                    self._state = "data_key"
+                    continue
+                value = self._value(final)
+                if value is _INCOMPLETE:
+                    break
+                self.top[self._key] = value
+                self._state = "top_key"
+            elif state == "data_value":
+                if self._key in self.ROW_SECTIONS and char == "[":
+                    self._pos += 1
+                    self._section = self._key
+                    self._state = "rows"
+                    continue
+                # 其他字段不需要，只扫描到结尾，不解码
+                if not self._skip_value(final):
+                    break
+                self._state = "data_key"
+            elif state == "rows":
+                if char == ",":
+                    self._pos += 1
+                    continue
+                if char == "]":
+                    self._pos += 1
+                    self._state = "data_key"
+                    continue
+                row = self._value(final)
+                if row is _INCOMPLETE:
+                    break
+                keep = self.fields.get(self._section)
+                if keep and isinstance(row, dict):
+                    row = {key: row[key] for key in keep if key in row}
+                rows.append((self._section, row))
+            else:
+                # 顶层对象之后只允许空白
+                raise ValueError("首页数据结尾有多余内容")
+
+        if self._pos >= self._COMPACT_SIZE:
+            self._drop(self._pos)
+        return rows
+
+
+_INCOMPLETE = object()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# 字符串外影响嵌套的字符、字符串内的结束引号与转义符、数字/字面量之后的分隔符
+_STRUCTURE = re.compile(r'[{}\[\]"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r"[,}\] \t\n\r]")
@@ -0,0 +1,41 @@
+# custom_components/wifi_switch/log.py
+import logging
+
+from .const import LOG_TRACE_SAMPLE_EVERY
+
+# 比DEBUG更细的数据包级日志级别：启用时trace()不再采样
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+
+
+class HotPathLogger:
+    """热路径日志门面：先判断级别，再交给logging按参数惰性格式化
+
+    debug()与logging.debug()一致；trace()用于每个数据包/每次查找的细节，
+    只在DEBUG启用时输出，且默认每LOG_TRACE_SAMPLE_EVERY条采样一条。
+    """
+
+    __slots__ = ("logger", "sample_every", "_count")
+
+    def __init__(self, name: str, sample_every: int = LOG_TRACE_SAMPLE_EVERY):
+        self.logger = logging.getLogger(name)
+        self.sample_every = max(1, sample_every)
+        self._count = 0
+
+    @property
+    def debug_enabled(self) -> bool:
+        return self.logger.isEnabledFor(logging.DEBUG)
+
+    def debug(self, msg, *args):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(msg, *args)
+
+    def trace(self, msg, *args):
+        logger = self.logger
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        if not logger.isEnabledFor(TRACE):
+            self._count += 1
+            if self._count % self.sample_every:
+                return
+        logger.debug(msg, *args)
@@ -0,0 +1,89 @@
+# custom_components/wifi_switch/manager.py
+import ssl
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    DOMAIN,
+    HTTPS_POOL_LIMIT,
+    HTTPS_LIMIT_PER_HOST,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class OrviboAccountManager:
+    """多账号管理：每个配置项（账号/家庭）独立的协调器、设备注册表与SSL会话密钥，
+    所有账号共享一个带单服务器连接数上限的HTTPS连接池
+
+    保存在hass.data[DOMAIN]，各配置项的数据在entries[entry_id]中。
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        # entry_id -> {"username", "password", "registry", "coordinator", "packet_log"}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+
+    @classmethod
+    def get(cls, hass: HomeAssistant) -> "OrviboAccountManager":
+        """获取（首次调用时创建）账号管理器"""
+        manager = hass.data.get(DOMAIN)
+        if manager is None:
+            manager = hass.data[DOMAIN] = cls(hass)
+        return manager
+
+    def get_entry(self, entry_id: str) -> Dict[str, Any]:
+        return self.entries[entry_id]
+
+    async def async_get_session(self) -> aiohttp.ClientSession:
+        """获取共享的HTTPS会话（仅创建1次）"""
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                ssl_context = await self.hass.async_add_executor_job(self._create_ssl_context)
+                connector = aiohttp.TCPConnector(
+                    ssl=ssl_context,
+                    limit=HTTPS_POOL_LIMIT,
+                    limit_per_host=HTTPS_LIMIT_PER_HOST,
+                )
+                self._session = aiohttp.ClientSession(connector=connector)
+                _LOGGER.debug("共享HTTPS会话创建成功")
+            return self._session
+
+    @staticmethod
+    def _create_ssl_context() -> ssl.SSLContext:
+        """同步创建SSL上下文（加载证书为阻塞操作，在线程池执行）"""
+        ssl_context = ssl.create_default_context()
+        # 与HttpsClient保持一致的调试配置（生产环境需改为 True + CERT_REQUIRED）
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+        return ssl_context
+
+    async def async_remove_entry(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        """移除配置项：清理其协调器（SSL连接及加解密器缓存）并写出其数据包日志，
+        最后一个账号移除后关闭共享HTTPS会话"""
+        data = self.entries.pop(entry_id, None)
+        if data is not None and data.get("coordinator") is not None:
+            await data["coordinator"].async_cleanup()
+        if data is not None and data.get("packet_log") is not None:
+            data["packet_log"].close()
+        if not self.entries:
+            await self.async_close()
+        return data
+
+    async def async_close(self):
+        """关闭共享HTTPS会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            _LOGGER.debug("共享HTTPS会话关闭")
+        self._session = None
+
+
+def get_entry_data(hass: HomeAssistant, entry_id: str) -> Dict[str, Any]:
+    """获取配置项的数据（协调器、设备注册表等）"""
+    return OrviboAccountManager.get(hass).get_entry(entry_id)
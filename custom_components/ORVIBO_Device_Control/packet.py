@@ -2,20 +2,29 @@
 # -*- coding: utf-8 -*-
 # pip install hexdump cryptography
 
+import os
+import glob
+import gzip
 import json
+import time
 import struct
 import binascii
 import logging
 import base64
-from typing import List, Any
+import asyncio
+import functools
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Any, Optional, Iterator
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.ciphers import (
     Cipher, algorithms, modes
 )
-from cryptography.hazmat.primitives import padding
+from . import json_codec
 from .functions import (
     text_utils_is_empty,
     hmac_sha256,
+    canonical_sign_string,
     generate_timestamp,
     generate_serial,
     generate_uuid,
@@ -29,6 +38,8 @@ from .const import (
     DEFAULT_KEY, SIGN_KEY, MAGIC,UPLOAD_LOG_URL,HTTPS_HOST,FETCH_LOG_URL,HTTP_HEADERS,
     SOFTWARE_NAME, SOFTWARE_VER, SOFTWARE_VERSION, SYS_VERSION,HARDWARE_VERSION, LANGUAGE, PHONE_NAME, DEBUG_INFO,
     CMD_HELLO, CMD_LOGIN,CMD_CONTROL, CMD_HEARTBEAT, CMD_STATE_UPDATE,
+    PACKET_LOG_MAX_BYTES, PACKET_LOG_MAX_AGE, PACKET_LOG_BACKUP_COUNT,
+    PACKET_LOG_FLUSH_SIZE, PACKET_LOG_FLUSH_INTERVAL,
 )
 
 proxies: dict[str, str] = {
@@ -36,77 +47,211 @@ proxies: dict[str, str] = {
 
 
 class PacketLog:
+    """数据包抓包日志：每个账号一个实例、写入各自的文件
 
-    log: List[dict[str, Any]] = []
-    logfile = None
+    JSON-lines追加写入，缓冲后在单线程执行器中落盘，按大小/时间轮转；close()后不再记录。
+    """
 
     OUT = "out"
     IN = "in"
 
+    def __init__(self, logfile, compress=False, max_bytes=PACKET_LOG_MAX_BYTES,
+                 max_age=PACKET_LOG_MAX_AGE, backup_count=PACKET_LOG_BACKUP_COUNT):
+        if compress and not logfile.endswith(".gz"):
+            logfile += ".gz"
+        self.logfile = logfile
+        self.compress = compress            # 为True时每个分段以gzip格式写入
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backup_count = backup_count
+        self._buffer: List[bytes] = []
+        self._segment_start = time.monotonic()
+        # 定时写出：缓冲非空后PACKET_LOG_FLUSH_INTERVAL秒内一定写出，流量空闲时最后的记录也不会滞留
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # 单个工作线程保证写入顺序
+        self._executor: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="orvibo_packet_log")
+
+    def close(self):
+        """写出剩余缓冲并停止记录"""
+        if self.logfile is None:
+            return
+        self.flush()
+        self.logfile = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def record(self, data, direction, keys=None, client=None):
+        if self.logfile is None:
+            return
+        self._buffer.append(json_codec.dumps({
+            'ts': time.time(),
+            'data': base64.b64encode(data).decode('utf-8'),
+            'direction': direction,
+            'keys': {
+                k: base64.b64encode(v).decode('utf-8') for k, v in (keys or {}).items()
+            },
+            'client': client
+        }))
+        if len(self._buffer) >= PACKET_LOG_FLUSH_SIZE:
+            self.flush()
+        elif self._flush_handle is None:
+            try:
+                self._flush_handle = asyncio.get_running_loop().call_later(PACKET_LOG_FLUSH_INTERVAL, self.flush)
+            except RuntimeError:
+                # 不在事件循环中（如离线回放工具）时直接写出
+                self.flush()
+
+    def flush(self):
+        """把缓冲交给写线程，调用方（事件循环）不做磁盘I/O"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._buffer or self._executor is None:
+            return
+        lines, self._buffer = self._buffer, []
+        self._executor.submit(self._write, self.logfile, lines)
+
+    def _write(self, logfile, lines):
+        """写线程：追加写入，超过大小或时长后轮转"""
+        try:
+            if os.path.exists(logfile) and (
+                    os.path.getsize(logfile) >= self.max_bytes
+                    or time.monotonic() - self._segment_start >= self.max_age):
+                self._rotate(logfile)
+            opener = gzip.open if logfile.endswith(".gz") else open
+            # gzip以追加模式写入会生成多成员文件，读取时按一个流解压
+            with opener(logfile, "ab") as f:
+                f.write(b"\n".join(lines) + b"\n")
+        except OSError as e:
+            _LOGGER.error(f"写入数据包日志失败: {e}")
+
+    def _rotate(self, logfile):
+        base, ext = (logfile[:-3], ".gz") if logfile.endswith(".gz") else (logfile, "")
+        now = time.time()
+        os.replace(logfile, f"{base}.{time.strftime('%Y%m%d%H%M%S', time.localtime(now))}{int(now * 1000) % 1000:03d}{ext}")
+        self._segment_start = time.monotonic()
+        rotated = self.segments(logfile)
+        for old in rotated[:max(len(rotated) - self.backup_count, 0)]:
+            os.remove(old)
+
     @classmethod
-    def enable(cls, logfile):
-        cls.logfile = logfile
+    def segments(cls, logfile) -> List[str]:
+        """按时间顺序返回已轮转的分段与当前文件"""
+        base, ext = (logfile[:-3], ".gz") if logfile.endswith(".gz") else (logfile, "")
+        rotated = sorted(glob.glob(f"{glob.escape(base)}.[0-9]*{ext}"))
+        if ext == "":
+            rotated = [path for path in rotated if not path.endswith(".gz")]
+        return rotated + ([logfile] if os.path.exists(logfile) else [])
 
     @classmethod
-    def record(cls, data, direction, keys=None, client=None):
-        if cls.logfile is not None:
-            cls.log.append({
-                'data': base64.b64encode(data).decode('utf-8'),
-                'direction': direction,
-                'keys': {
-                    k: base64.b64encode(v).decode('utf-8') for k, v in keys.items()
-                },
-                'client': client
-            })
+    def read(cls, logfile) -> Iterator[dict[str, Any]]:
+        """逐条读取所有分段中的记录（data与keys已base64解码），用于回放"""
+        for path in cls.segments(logfile):
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    entry['data'] = base64.b64decode(entry['data'])
+                    entry['keys'] = {k: base64.b64decode(v) for k, v in entry['keys'].items()}
+                    yield entry
+
+class AesEcbCodec:
+    """AES-ECB加解密器：复用同一密钥的加解密上下文，避免每个数据包重复扩展密钥"""
+
+    BLOCK_SIZE = 16
+
+    def __init__(self, key: bytes):
+        cipher = Cipher(
+            algorithms.AES(key),
+            modes.ECB(),
+            backend=default_backend()
+        )
+        # ECB模式无链式状态，输入为整块时update()即输出全部数据，上下文可长期复用
+        self._encryptor = cipher.encryptor()
+        self._decryptor = cipher.decryptor()
+
+    def encrypt(self, data: bytes) -> bytes:
+        """PKCS7填充后加密"""
+        pad = self.BLOCK_SIZE - len(data) % self.BLOCK_SIZE
+        return self._encryptor.update(data + bytes((pad,)) * pad)
+
+    def decrypt(self, data) -> bytes:
+        """解密并去除PKCS7填充"""
+        if not data or len(data) % self.BLOCK_SIZE:
+            raise ValueError("密文长度不是16的整数倍")
+        plain = self._decryptor.update(data)
+        pad = plain[-1]
+        if not 1 <= pad <= self.BLOCK_SIZE or plain[-pad:] != bytes((pad,)) * pad:
+            raise ValueError("Invalid padding bytes.")
+        return plain[:-pad]
 
-            with open(cls.logfile, 'w') as f:
-                json.dump(cls.log, f)
 
 class HomematePacket:
-    def __init__(self, data: bytes, keys: dict):
+    # 按密钥缓存的加解密器，供未传入codecs的调用方（离线工具、基准测试）使用；
+    # SSLClient传入自己的缓存，会话密钥随连接断开移除，账号卸载时整体释放
+    _codecs: dict[bytes, AesEcbCodec] = {}
+
+    # 头部：magic(2) + length(2) + 类型(2) + CRC32(4) + sessionId(32)，共42字节
+    HEADER = struct.Struct(">2sH2sI32s")
+    HEADER_SIZE = HEADER.size
+    PK = bytes([0x70, 0x6b])    # pk：默认密钥加密
+    DK = bytes([0x64, 0x6b])    # dk：会话密钥加密
+
+    def __init__(self, data: bytes, keys: dict, codecs: Optional[dict] = None):
         self.raw = data
         if not data:
             self.magic = MAGIC  # hd
             self.length = 0
-            self.packet_type = bytes([0x70, 0x6b])  # pk
+            self.packet_type = self.PK
             self.crc = None
             self.session_id = None
             self.json_payload = None
             return
 
+        # memoryview切片不复制数据
+        view = memoryview(data)
+        self._parse(view[:self.HEADER_SIZE], view[self.HEADER_SIZE:], keys, len(data), codecs)
+
+    @classmethod
+    def from_frame(cls, header: bytes, ciphertext, keys: dict, codecs: Optional[dict] = None) -> "HomematePacket":
+        """由分别读取的头部和密文直接解析，无需先拼接成完整数据包"""
+        packet = cls.__new__(cls)
+        packet.raw = None
+        packet._parse(header, ciphertext, keys, cls.HEADER_SIZE + len(ciphertext), codecs)
+        return packet
+
+    def _parse(self, header, ciphertext, keys: dict, total_length: int, codecs: Optional[dict] = None):
         try:
+            (self.magic, self.length, self.packet_type,
+             data_crc, self.session_id) = self.HEADER.unpack_from(header)
             # Check the magic bytes
-            self.magic = data[0:2]
             assert self.magic == MAGIC
 
             # Check the 'length' field
-            self.length = struct.unpack(">H", data[2:4])[0]
-            assert self.length == len(data)
+            assert self.length == total_length
 
             # Check the packet type
-            self.packet_type = data[4:6]
-            assert self.packet_type == bytes([0x70, 0x6b]) or \
-                self.packet_type == bytes([0x64, 0x6b])
+            assert self.packet_type == self.PK or self.packet_type == self.DK
 
             # Check the CRC32
-            self.crc = binascii.crc32(data[42:]) & 0xFFFFFFFF
-            data_crc = struct.unpack(">I", data[6:10])[0]
+            self.crc = binascii.crc32(ciphertext) & 0xFFFFFFFF
             assert self.crc == data_crc
-        except AssertionError:
+        except (AssertionError, struct.error):
             _LOGGER.error("Bad packet:")
             from hexdump import hexdump
-            hexdump(data)
+            hexdump(bytes(header) + bytes(ciphertext))
             raise
 
-        self.session_id = data[10:42]
-
         current_key = DEFAULT_KEY.encode("utf-8")
-        if self.packet_type == bytes([0x64, 0x6b]):
+        if self.packet_type == self.DK:
             current_key = keys[self.session_id.decode('utf-8')]
 
-        #self.json_payload = self.decrypt_payload(keys[self.packet_type[0]], data[42:])
-        if data[42:]:
-            self.json_payload = self.decrypt_payload(current_key, data[42:])
+        if ciphertext:
+            self.json_payload = self.decrypt_payload(current_key, ciphertext, codecs)
         else:
             self.json_payload = None
 
@@ -114,59 +259,200 @@ class HomematePacket:
     def parse_length(cls, data: bytes):
         try:
             # Check the magic bytes
-            magic = data[0:2]
+            magic, length = struct.unpack_from(">2sH", data)
             assert magic == MAGIC
-            length = struct.unpack(">H", data[2:4])[0]
             return length
         except Exception as e:
             _LOGGER.error("Bad packet: %s", str(e))
             raise
 
     @classmethod
-    def decrypt_payload(cls, key: bytes, encrypted_payload: bytes):
-        decryptor = Cipher(
-            algorithms.AES(key),
-            modes.ECB(),
-            backend=default_backend()
-        ).decryptor()
-        data = decryptor.update(encrypted_payload)
-        unpadder = padding.PKCS7(128).unpadder()
-        unpad = unpadder.update(data)
-        unpad += unpadder.finalize()
+    def get_codec(cls, key: bytes, codecs: Optional[dict] = None) -> AesEcbCodec:
+        if codecs is None:
+            codecs = cls._codecs
+        codec = codecs.get(key)
+        if codec is None:
+            codec = codecs[key] = AesEcbCodec(key)
+        return codec
+
+    @classmethod
+    def decrypt_payload(cls, key: bytes, encrypted_payload: bytes, codecs: Optional[dict] = None):
+        unpad = cls.get_codec(key, codecs).decrypt(encrypted_payload)
 
         # sometimes payload has an extra trailing null
         if unpad[-1] == 0x00:
             unpad = unpad[:-1]
-        return json.loads(unpad.decode('utf-8'))
+        return json_codec.loads(unpad)
 
     @classmethod
-    def encrypt_payload(cls, key: bytes, payload: str):
-        data = payload.encode('utf-8')
-
-        padder = padding.PKCS7(128).padder()
-        padded_data = padder.update(data)
-        padded_data += padder.finalize()
-
-        encryptor = Cipher(
-            algorithms.AES(key),
-            modes.ECB(),
-            backend=default_backend()
-        ).encryptor()
-
-        encrypted_payload = encryptor.update(padded_data)
-        return encrypted_payload
+    def encrypt_payload(cls, key: bytes, payload: str, codecs: Optional[dict] = None):
+        return cls.get_codec(key, codecs).encrypt(payload.encode('utf-8'))
 
     @classmethod
-    def build_packet(cls, packet_type: bytes, key: bytes, session_id: bytes, payload: dict):
-        payload_str = json.dumps(payload, separators=(',', ':'))
-        encrypted_payload = cls.encrypt_payload(key, payload_str)
-        crc = struct.pack('>I', binascii.crc32(encrypted_payload) & 0xFFFFFFFF)
-        length = struct.pack('>H', len(encrypted_payload) + len(MAGIC + packet_type + crc + session_id) + 2)
+    def build_packet(cls, packet_type: bytes, key: bytes, session_id: bytes, payload: dict,
+                     codecs: Optional[dict] = None):
+        if isinstance(payload, TemplatedPayload):
+            # 模板payload只读，内容总是生成时的值，按模板拼接，结果与json.dumps一致
+            payload_bytes = payload.encode()
+        else:
+            payload_bytes = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        encrypted_payload = cls.get_codec(key, codecs).encrypt(payload_bytes)
+        crc = binascii.crc32(encrypted_payload) & 0xFFFFFFFF
+        length = cls.HEADER_SIZE + len(encrypted_payload)
+        return cls.HEADER.pack(MAGIC, length, packet_type, crc, session_id) + encrypted_payload
+
+_encode_json_str = json.encoder.encode_basestring_ascii
+
+
+class PayloadTemplate:
+    """预编译的payload模板：常量字段预先序列化为字节骨架，只拼接变化字段"""
+
+    def __init__(self, fields: dict, variables: tuple):
+        # fields按发送顺序列出全部字段，variables中的字段值在build时给出
+        self.fields = {key: fields.get(key) for key in fields}
+        self.variables = frozenset(variables)
+        segments = []
+        current = []
+        for index, (key, value) in enumerate(self.fields.items()):
+            current.append(("{" if index == 0 else ",") + json.dumps(key) + ":")
+            if key in self.variables:
+                segments.append((key, "".join(current)))
+                current = []
+            else:
+                current.append(json.dumps(value, separators=(',', ':')))
+        current.append("}")
+        # 每个变化字段前的常量片段，以及最后一个变化字段之后的常量片段（ensure_ascii，均为ASCII）
+        self._segments = tuple(segments)
+        self._tail = "".join(current)
+        self.size = len(self.fields)
+        # 每个模板一个payload子类，模板挂在类上，生成时不必再逐个设置属性
+        payload_type = type("TemplatedPayload", (TemplatedPayload,), {"__slots__": (), "template": self})
+        # build(**values)：以常量字段为底直接构造payload，更新已有字段不改变字段顺序；
+        # 缺少的变化字段保留None（拼接时按json.dumps处理），多出的字段由encode按字段数识别
+        self.build = functools.partial(payload_type, self.fields)
+
+    def render(self, payload: dict) -> bytes:
+        """按json.dumps(separators=(',', ':'))的规则拼接变化字段，一次编码为字节"""
+        parts = []
+        for key, segment in self._segments:
+            parts.append(segment)
+            value = payload[key]
+            value_type = type(value)
+            if value_type is int:
+                parts.append(int.__repr__(value))
+            elif value_type is str:
+                parts.append(_encode_json_str(value))
+            else:
+                parts.append(json.dumps(value, separators=(',', ':')))
+        parts.append(self._tail)
+        return "".join(parts).encode("ascii")
+
+
+class TemplatedPayload(Mapping):
+    """由PayloadTemplate生成的只读payload，可按字典读取，不能修改（需要修改时先复制：dict(payload)）
+
+    只读保证发送时的内容就是生成时的内容，build_packet可以直接按模板拼接，不必检查是否被改过。
+    """
+
+    __slots__ = ("_data",)
+    template: PayloadTemplate
+
+    def __init__(self, fields: dict, **values):
+        self._data = dict(fields, **values)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def copy(self) -> dict:
+        return dict(self._data)
+
+    def __repr__(self):
+        return repr(self._data)
+
+    def encode(self) -> bytes:
+        """字段与模板一致时只拼接变化字段，有模板以外的字段时完整序列化"""
+        data = self._data
+        if len(data) == self.template.size:
+            return self.template.render(data)
+        return json.dumps(data, separators=(',', ':')).encode('utf-8')
 
-        packet = MAGIC + length + packet_type + crc + session_id + encrypted_payload
-        return packet
 
 class HomemateJsonData:
+    # 控制类指令的payload模板（字段顺序即发送顺序，值为None的是变化字段）
+    SWITCH_CONTROL_TEMPLATE = PayloadTemplate({
+        "uid": None,
+        "userName": None,
+        "deviceId": None,
+        "groupId": "",
+        "order": None,
+        "value1": None,
+        "value2": None,
+        "value3": None,
+        "value4": None,
+        "delayTime": 0,
+        "qualityOfService": 1,
+        "defaultResponse": 1,
+        "propertyResponse": 0,
+        "cmd": CMD_CONTROL,
+        "serial": None,
+        "clientType": 1,
+        "uniSerial": None,
+        "serverRecord": False,
+        "ver": SOFTWARE_VER,
+        "debugInfo": DEBUG_INFO,
+    }, variables=("uid", "userName", "deviceId", "order", "value1", "value2", "value3", "value4",
+                  "serial", "uniSerial"))
+
+    STATE_UPDATE_TEMPLATE = PayloadTemplate({
+        "uid": None,
+        "userName": None,
+        "deviceId": None,
+        "groupId": "",
+        "value1": None,
+        "value2": None,
+        "value3": None,
+        "value4": None,
+        "delayTime": 0,
+        "qualityOfService": 1,
+        "defaultResponse": 1,
+        "propertyResponse": 0,
+        "cmd": CMD_STATE_UPDATE,
+        "serial": None,
+        "clientType": 1,
+        "uniSerial": None,
+        "serverRecord": False,
+        "ver": SOFTWARE_VER,
+        "debugInfo": DEBUG_INFO,
+    }, variables=("uid", "userName", "deviceId", "value1", "value2", "value3", "value4", "serial", "uniSerial"))
+
+    VENTILATION_STATE_UPDATE_TEMPLATE = PayloadTemplate({
+        **STATE_UPDATE_TEMPLATE.fields,
+        "value2": 0,
+        "value3": 0,
+        "value4": 0,
+    }, variables=("uid", "userName", "deviceId", "value1", "serial", "uniSerial"))
+
+    HEARTBEAT_TEMPLATE = PayloadTemplate({
+        "cmd": CMD_HEARTBEAT,
+        "serial": None,
+        "clientType": 1,
+        "uniSerial": None,
+        "serverRecord": False,
+        "ver": SOFTWARE_VER,
+    }, variables=("serial", "uniSerial"))
+
     def __init__(self, data: bytes):
         self.raw = data
 
@@ -205,31 +491,18 @@ class HomemateJsonData:
                            value2: int = 0,
                            value3: int = 0,
                            value4: int = 0):
-        serial = generate_serial()
-        uniSerial = generate_serial(use_time=True)
-        payload = {
-            "uid": device_mac,
-            "userName": username,
-            "deviceId": device_id,
-            "groupId": "",
-            "order": "on" if state==0 else "off",
-            "value1": 1 if state else 0,
-            "value2": value2,
-            "value3": value3,
-            "value4": value4,
-            "delayTime": 0,
-            "qualityOfService": 1,
-            "defaultResponse": 1,
-            "propertyResponse": 0,
-            "cmd": CMD_CONTROL,
-            "serial": serial,
-            "clientType": 1,
-            "uniSerial": uniSerial,
-            "serverRecord": False,
-            "ver": SOFTWARE_VER,
-            "debugInfo": DEBUG_INFO,
-        }
-        return payload
+        return cls.SWITCH_CONTROL_TEMPLATE.build(
+            uid=device_mac,
+            userName=username,
+            deviceId=device_id,
+            order="on" if state==0 else "off",
+            value1=1 if state else 0,
+            value2=value2,
+            value3=value3,
+            value4=value4,
+            serial=generate_serial(),
+            uniSerial=generate_serial(use_time=True),
+        )
     
     @classmethod
     # ssl请求更新空调状态（使用CMD_STATE_UPDATE命令）
@@ -241,30 +514,17 @@ class HomemateJsonData:
                            value2: int,
                            value3: int,
                            value4: int):
-        serial = generate_serial()
-        uniSerial = generate_serial(use_time=True)
-        payload = {
-            "uid": device_mac,
-            "userName": username,
-            "deviceId": device_id,
-            "groupId": "",
-            "value1": value1,
-            "value2": value2,
-            "value3": value3,
-            "value4": value4,
-            "delayTime": 0,
-            "qualityOfService": 1,
-            "defaultResponse": 1,
-            "propertyResponse": 0,
-            "cmd": CMD_STATE_UPDATE,
-            "serial": serial,
-            "clientType": 1,
-            "uniSerial": uniSerial,
-            "serverRecord": False,
-            "ver": SOFTWARE_VER,
-            "debugInfo": DEBUG_INFO,
-        }
-        return payload
+        return cls.STATE_UPDATE_TEMPLATE.build(
+            uid=device_mac,
+            userName=username,
+            deviceId=device_id,
+            value1=value1,
+            value2=value2,
+            value3=value3,
+            value4=value4,
+            serial=generate_serial(),
+            uniSerial=generate_serial(use_time=True),
+        )
     
     @classmethod
     # ssl请求更新新风设备状态（使用CMD_STATE_UPDATE命令）
@@ -273,30 +533,14 @@ class HomemateJsonData:
                            device_id: str,
                            device_mac: str,
                            value1: int):
-        serial = generate_serial()
-        uniSerial = generate_serial(use_time=True)
-        payload = {
-            "uid": device_mac,
-            "userName": username,
-            "deviceId": device_id,
-            "groupId": "",
-            "value1": value1,
-            "value2": 0,
-            "value3": 0,
-            "value4": 0,
-            "delayTime": 0,
-            "qualityOfService": 1,
-            "defaultResponse": 1,
-            "propertyResponse": 0,
-            "cmd": CMD_STATE_UPDATE,
-            "serial": serial,
-            "clientType": 1,
-            "uniSerial": uniSerial,
-            "serverRecord": False,
-            "ver": SOFTWARE_VER,
-            "debugInfo": DEBUG_INFO,
-        }
-        return payload
+        return cls.VENTILATION_STATE_UPDATE_TEMPLATE.build(
+            uid=device_mac,
+            userName=username,
+            deviceId=device_id,
+            value1=value1,
+            serial=generate_serial(),
+            uniSerial=generate_serial(use_time=True),
+        )
 
     @classmethod
     def ssl_login(cls,
@@ -325,22 +569,11 @@ class HomemateJsonData:
     @classmethod
     # 发送http/https请求时对数据包的签名
     def create_sign(cls, params, key=SIGN_KEY):
-        # 1. 按key的自然顺序排序
-        sorted_keys = sorted(params.keys())
-
-        # 2. 拼接字符串
-        sb = []
-        for k in sorted_keys:
-            value = params[k]
-            if not text_utils_is_empty(value):
-                sb.append(f"{k}={value}&")
-
-        # 添加密钥
-        sb.append(f"key={key}")
-        sign_str = ''.join(sb)
+        # 1. 按key的自然顺序排序并一次拼接
+        sign_str = canonical_sign_string(params, key)
         # _LOGGER.debug(f"待加密字符串: {sign_str}")
 
-        # 3. 使用HmacSHA256加密
+        # 2. 使用HmacSHA256加密
         sign = hmac_sha256(key, sign_str)
 
         # _LOGGER.debug(f"生成的签名: {sign}")
@@ -450,17 +683,10 @@ class HomemateJsonData:
     @classmethod
     # ssl心跳包
     def ssl_heartbeat(cls):
-        serial = generate_serial()
-        uniSerial = generate_serial(use_time=True)
-        payload = {
-            "cmd": CMD_HEARTBEAT,
-            "serial": serial,
-            "clientType": 1,
-            "uniSerial": uniSerial,
-            "serverRecord": False,
-            "ver": SOFTWARE_VER,
-        }
-        return payload
+        return cls.HEARTBEAT_TEMPLATE.build(
+            serial=generate_serial(),
+            uniSerial=generate_serial(use_time=True),
+        )
 
     @classmethod
     # 查询家庭成员统计信息: familyId和familyName（https）
@@ -492,15 +718,15 @@ class HomemateJsonData:
 
     @classmethod
     # 获取开关设备状态信息？（https）
-    def get_devices_status(cls, access_token, session_id, user_id, user_name, family_id):
+    # last_update_time: 只返回该时间（秒）之后变化的记录，0表示全量
+    def get_devices_status(cls, access_token, session_id, user_id, user_name, family_id, last_update_time=0):
         url = f"https://{HTTPS_HOST}/v2/cmd/app/readtable"
 
         random_str = generate_uuid()
         serial = generate_serial()
         timestamp = generate_timestamp()
 
-        lastUpdateTime = int(generate_timestamp() / 1000) - 30000
-        lastUpdateTime = 1761670123
+        lastUpdateTime = int(last_update_time)
 
         req_data = {
             "accessToken": access_token,
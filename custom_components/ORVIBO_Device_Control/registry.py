@@ -0,0 +1,225 @@
+# custom_components/wifi_switch/registry.py
+import logging
+from typing import Any, Iterable, Optional
+
+from .const import HOMEPAGE_MAX_PARKED_STATES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DeviceRegistry:
+    """设备/状态注册表：按deviceId、uid、roomId建立哈希索引，替代对列表的线性查找"""
+
+    def __init__(self):
+        self.floor: dict = {}
+        self.family: dict = {}
+        self._devices: dict[str, dict] = {}         # deviceId -> 设备行
+        self._states: dict[str, dict] = {}          # deviceId -> 状态行
+        self._rooms: dict[str, dict] = {}           # roomId -> 房间行
+        self._uid_index: dict[str, str] = {}        # uid -> deviceId
+        self._room_index: dict[str, set[str]] = {}  # roomId -> {deviceId}
+        self._sync: Optional[dict] = None           # 进行中的流式全量同步（暂存区）
+        self.sync_dropped_states = 0                # 上一次流式同步丢弃的状态行数（没有对应设备或暂存已满）
+
+    # ------------------------------
+    # 设备
+    # ------------------------------
+    @property
+    def devices(self) -> list[dict]:
+        return list(self._devices.values())
+
+    def has_device(self, device_id: str) -> bool:
+        return device_id in self._devices
+
+    def get_device(self, device_id: str) -> Optional[dict]:
+        return self._devices.get(device_id)
+
+    def get_device_by_uid(self, uid: str) -> Optional[dict]:
+        device_id = self._uid_index.get(uid)
+        return self._devices.get(device_id) if device_id else None
+
+    def get_device_value(self, device_id: str, key: str, def_value=None):
+        device = self._devices.get(device_id)
+        if device is None:
+            return def_value
+        return device.get(key, def_value)
+
+    def get_id_by_uid(self, uid: str) -> str:
+        return self._uid_index.get(uid, "")
+
+    def get_device_ids_in_room(self, room_id: str) -> set[str]:
+        return set(self._room_index.get(room_id, ()))
+
+    def upsert_device(self, device: dict) -> bool:
+        """插入或更新设备行，已存在时优先保留delFlag=0的记录（与deduplicate_by_key一致）"""
+        device_id = device.get("deviceId")
+        if device_id is None:
+            return False
+        existing = self._devices.get(device_id)
+        if existing is not None:
+            if existing.get("delFlag") != 1 and device.get("delFlag") == 1:
+                return False
+            self._unindex_device(existing)
+        self._devices[device_id] = device
+        self._index_device(device)
+        return True
+
+    def remove_device(self, device_id: str):
+        device = self._devices.pop(device_id, None)
+        if device is not None:
+            self._unindex_device(device)
+        self._states.pop(device_id, None)
+
+    def replace_devices(self, devices: Iterable[dict]):
+        """以一次完整的设备列表为准，增量更新索引并移除已不存在的设备"""
+        seen: dict[str, dict] = {}
+        for device in devices:
+            device_id = device.get("deviceId")
+            if device_id is None:
+                continue
+            previous = seen.get(device_id)
+            if previous is not None and not (previous.get("delFlag") == 1 and device.get("delFlag") != 1):
+                continue
+            seen[device_id] = device
+
+        for device_id in [d for d in self._devices if d not in seen]:
+            self.remove_device(device_id)
+        for device in seen.values():
+            self._put_device(device)
+
+    def _put_device(self, device: dict):
+        """无条件写入设备行并维护索引"""
+        existing = self._devices.get(device["deviceId"])
+        if existing is not None:
+            self._unindex_device(existing)
+        self._devices[device["deviceId"]] = device
+        self._index_device(device)
+
+    def _index_device(self, device: dict):
+        device_id = device["deviceId"]
+        uid = device.get("uid")
+        if uid:
+            self._uid_index[uid] = device_id
+        room_id = device.get("roomId")
+        if room_id:
+            self._room_index.setdefault(room_id, set()).add(device_id)
+
+    def _unindex_device(self, device: dict):
+        device_id = device["deviceId"]
+        uid = device.get("uid")
+        if uid and self._uid_index.get(uid) == device_id:
+            del self._uid_index[uid]
+        room_id = device.get("roomId")
+        if room_id and room_id in self._room_index:
+            self._room_index[room_id].discard(device_id)
+            if not self._room_index[room_id]:
+                del self._room_index[room_id]
+
+    # ------------------------------
+    # 状态
+    # ------------------------------
+    @property
+    def states(self) -> list[dict]:
+        return list(self._states.values())
+
+    def get_state(self, device_id: str) -> Optional[dict]:
+        return self._states.get(device_id)
+
+    def get_state_value(self, device_id: str, key: str, def_value=None):
+        state = self._states.get(device_id)
+        if state is None:
+            return def_value
+        return state.get(key, def_value)
+
+    def set_state_value(self, device_id: str, key: str, value: Any) -> bool:
+        state = self._states.get(device_id)
+        if state is None:
+            return False
+        state[key] = value
+        return True
+
+    def upsert_state(self, state: dict) -> bool:
+        """插入或更新状态行，只接受已登记设备的状态"""
+        device_id = state.get("deviceId")
+        if device_id not in self._devices:
+            return False
+        existing = self._states.get(device_id)
+        if existing is not None and existing.get("delFlag") != 1 and state.get("delFlag") == 1:
+            return False
+        self._states[device_id] = state
+        return True
+
+    def replace_states(self, states: Iterable[dict]):
+        """以一次完整的状态列表为准，替换全部状态"""
+        self._states = {}
+        for state in states:
+            self.upsert_state(state)
+
+    # ------------------------------
+    # 流式全量同步
+    # ------------------------------
+    def begin_sync(self):
+        """开始一次流式全量同步：逐行写入暂存区，end_sync(complete=True)时一次性替换设备与状态"""
+        self._sync = {"devices": {}, "states": {}, "parked": {}, "parked_count": 0, "dropped": 0}
+
+    def sync_device(self, device: dict):
+        """暂存同步中的一行设备（本次同步内按deviceId去重，与replace_devices规则一致）"""
+        device_id = device.get("deviceId")
+        if device_id is None or self._sync is None:
+            return
+        seen = self._sync["devices"]
+        previous = seen.get(device_id)
+        if previous is not None and not (previous.get("delFlag") == 1 and device.get("delFlag") != 1):
+            return
+        seen[device_id] = device
+        # 设备行晚于其状态行到达时，补写先前暂存的状态
+        parked = self._sync["parked"].pop(device_id, ())
+        self._sync["parked_count"] -= len(parked)
+        for state in parked:
+            self.sync_state(state)
+
+    def sync_state(self, state: dict):
+        """暂存同步中的一行状态；所属设备尚未到达时先挂起，挂起的行数超过HOMEPAGE_MAX_PARKED_STATES时丢弃"""
+        sync = self._sync
+        device_id = state.get("deviceId")
+        if device_id is None or sync is None:
+            return
+        if device_id not in sync["devices"]:
+            if sync["parked_count"] >= HOMEPAGE_MAX_PARKED_STATES:
+                sync["dropped"] += 1
+                return
+            sync["parked"].setdefault(device_id, []).append(state)
+            sync["parked_count"] += 1
+            return
+        seen = sync["states"]
+        previous = seen.get(device_id)
+        if previous is not None and previous.get("delFlag") != 1 and state.get("delFlag") == 1:
+            return
+        seen[device_id] = state
+
+    def end_sync(self, complete: bool = True):
+        """结束流式同步；数据完整时以暂存区一次性替换设备与状态，否则丢弃暂存区、保留现有记录"""
+        sync, self._sync = self._sync, None
+        if sync is None:
+            return
+        self.sync_dropped_states = sync["dropped"] + sync["parked_count"]
+        if self.sync_dropped_states:
+            _LOGGER.warning("首页同步丢弃了%d条状态行（没有对应的设备行，或暂存超过%d行）",
+                            self.sync_dropped_states, HOMEPAGE_MAX_PARKED_STATES)
+        if not complete:
+            return
+        self.replace_devices(sync["devices"].values())
+        self._states = sync["states"]
+
+    # ------------------------------
+    # 房间
+    # ------------------------------
+    @property
+    def rooms(self) -> list[dict]:
+        return list(self._rooms.values())
+
+    def get_room(self, room_id: str) -> Optional[dict]:
+        return self._rooms.get(room_id)
+
+    def replace_rooms(self, rooms: Iterable[dict]):
+        self._rooms = {room["roomId"]: room for room in rooms if room.get("roomId")}
@@ -7,33 +7,36 @@ import ssl
 import asyncio
 import time
 from pathlib import Path
-from datetime import datetime
 from typing import Optional, Callable
 from homeassistant.core import HomeAssistant  #引入HA核心类
-from .packet import (HomematePacket, HomemateJsonData)
+from .packet import (HomematePacket, HomemateJsonData, PacketLog, AesEcbCodec)
+from .log import HotPathLogger
+from .heartbeat import HeartbeatScheduler, LivenessMonitor
+from .connection import ConnectionState, ReconnectBackoff, CircuitBreaker
+from .registry import DeviceRegistry
 
 from.hass import (
     get_uid_by_id,
     get_id_by_uid,
     get_name_by_uid,
     get_name_by_id,
-    get_current_devices,
-    get_current_state,
     get_state_by_id,
+    has_device,
     set_state_by_id,
     set_state_by_uid
 )
 
 from .const import (
-    SSL_HOST, SSL_PORT, CLIENT_CERT, CLIENT_KEY, SERVER_CA, ID_UNSET, DEFAULT_KEY,
-    SSL_MAX_RECONNECT_ATTEMPTS,
+    SSL_HOST, SSL_PORT, CLIENT_CERT, CLIENT_KEY, SERVER_CA, ID_UNSET, DEFAULT_KEY, SSL_HEARTBEAT_INTERVAL,
+    SSL_RECONNECT_INTERVAL, SSL_COMMAND_TIMEOUT, SSL_HANDSHAKE_TIMEOUT, SSL_HEARTBEAT_MAX_MISSES,
+    SSL_MAX_IN_FLIGHT, SSL_SEND_QUEUE_SIZE, SSL_WRITE_BATCH_SIZE,
     CMD_HELLO, CMD_LOGIN, CMD_STATE_UPDATE, CMD_CONTROL, CMD_HEARTBEAT, CMD_HANDSHAKE,
 )
 
 _LOGGER = logging.getLogger(__name__)
+_TRACE = HotPathLogger(__name__)
 
 class SSLClient:
-    _initial_keys: dict[str, bytes] = {}
     """独立的SSL长连接客户端：处理SSL连接、登录、控制指令发送、状态监听"""
     def __init__(
         self,
@@ -45,8 +48,15 @@ class SSLClient:
         family_id: str,
         on_session_id_obtained: Callable[[str], None],
         on_status_update: Callable[[str, int, int, int, int], None],
-        heartbeat_interval: int = 30,
-        retry_interval: int = 5
+        heartbeat_interval: float = SSL_HEARTBEAT_INTERVAL,
+        retry_interval: float = SSL_RECONNECT_INTERVAL,
+        command_timeout: float = SSL_COMMAND_TIMEOUT,
+        handshake_timeout: float = SSL_HANDSHAKE_TIMEOUT,
+        max_in_flight: int = SSL_MAX_IN_FLIGHT,
+        write_batch_size: int = SSL_WRITE_BATCH_SIZE,
+        on_link_change: Optional[Callable[[bool], None]] = None,
+        registry: Optional[DeviceRegistry] = None,
+        packet_log: Optional[PacketLog] = None
     ):
         """
         初始化SSL长连接客户端
@@ -58,8 +68,15 @@ class SSLClient:
         :param family_id: 家庭id号
         :param on_session_id_obtained: 获取到session_id后回调
         :param on_status_update: 状态更新回调（参数：device_id, status, value2, value3, value4）
-        :param heartbeat_interval: 心跳包发送间隔（秒）
-        :param retry_interval: 重连间隔（秒）
+        :param heartbeat_interval: 链路空闲多久后发送心跳（秒），RTT升高或心跳丢失时自动缩短
+        :param retry_interval: 重连退避的基础间隔（秒），实际间隔按去相关抖动增长
+        :param command_timeout: 控制指令等待响应的超时时间（秒）
+        :param handshake_timeout: hello/登录各自等待响应的超时时间（秒）
+        :param max_in_flight: 同时等待响应的控制指令上限
+        :param write_batch_size: 发送任务单次合并写出的数据包上限
+        :param on_link_change: 推送链路健康状态（已登录且心跳无丢失）变化时回调（参数：是否健康）
+        :param registry: 本账号的设备注册表（多账号时各自独立）
+        :param packet_log: 本账号的数据包日志，为空时不记录
         """
         self.hass = hass  # 存储HA实例
         self.ssl_host = ssl_host
@@ -67,12 +84,28 @@ class SSLClient:
         self.username = username
         self.password = password
         self.family_id = family_id
+        self.registry = registry if registry is not None else DeviceRegistry()
+        # 本连接的会话密钥（session_id -> key），每个客户端独立，多账号之间互不影响
+        self._session_keys: dict[str, bytes] = {}
+        # 本连接按密钥缓存的加解密器，会话密钥随连接断开移除，主动断开（账号卸载）时全部释放
+        self._codecs: dict[bytes, AesEcbCodec] = {}
+        self.packet_log = packet_log
 
         self.on_session_id_obtained = on_session_id_obtained
         self.on_status_update = on_status_update
+        self.on_link_change = on_link_change
+        self._link_healthy = False
         self.heartbeat_interval = heartbeat_interval
         self.retry_interval = retry_interval
+        self.command_timeout = command_timeout
+        self.handshake_timeout = handshake_timeout
+        self.write_batch_size = write_batch_size
         self._heartbeat_task = None  # 心跳任务
+        self._heartbeat = HeartbeatScheduler(heartbeat_interval, max_timeout=command_timeout)
+        # 最近一次收发数据包的时刻（time.monotonic()），心跳按空闲时间调度
+        self._last_active_time = time.monotonic()
+        # 按心跳约定的读超时检测半开连接
+        self._liveness = LivenessMonitor(self._heartbeat, self._on_link_dead)
 
         BASE_DIR = Path(__file__).parent.resolve()
         self.certfile=BASE_DIR / CLIENT_CERT
@@ -85,23 +118,84 @@ class SSLClient:
         self.writer: Optional[asyncio.StreamWriter] = None
         self.session_id: Optional[str] = None
         self.session_key: Optional[bytes] = None
-        self.connected: bool = False
         self._listening_task: Optional[asyncio.Task] = None
 
-    @classmethod
-    def add_key(cls, session_id: str, key: bytes):
-        cls._initial_keys[session_id] = key
-
-    @classmethod
-    def get_key(cls, session_id:str) -> bytes:
+        # 连接状态机：唯一的连接管理任务负责连接、登录与退避重连
+        self.state = ConnectionState.DISCONNECTED
+        self._state_changed: Optional[asyncio.Future] = None
+        self._run_task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._backoff = ReconnectBackoff(retry_interval)
+        self._breaker = CircuitBreaker()
+        # 连接断开事件及原因（由监听/发送任务或存活检测设置）
+        self._lost_event = asyncio.Event()
+        self._lost_reason: Optional[str] = None
+
+        # 等待响应的请求（serial -> (请求的cmd, future)），future的结果为响应数据包
+        self._pending: dict[int, tuple[int, asyncio.Future]] = {}
+        # 最近一次收到与等待中请求匹配的响应的时刻（time.monotonic()），作为链路存活的证据
+        self._last_response_time = 0.0
+        # 最近一次指令往返耗时
+        self.last_command_rtt: Optional[float] = None
+
+        # 握手事件：hello响应（获得会话密钥）与登录响应
+        self._hello_event = asyncio.Event()
+        self._login_event = asyncio.Event()
+        self._login_ok: bool = False
+
+        # 发送队列及唯一的发送任务；队列有界，满时调用方等待
+        self._send_queue: asyncio.Queue = asyncio.Queue(maxsize=SSL_SEND_QUEUE_SIZE)
+        self._writer_task: Optional[asyncio.Task] = None
+        # 连接代数：每建立一次连接加1，队列中的数据包只由同一代连接的发送任务写出
+        self._generation = 0
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+
+    def add_key(self, session_id: str, key: bytes):
+        self._session_keys[session_id] = key
+
+    def remove_key(self, session_id: str):
+        key = self._session_keys.pop(session_id, None)
+        self._codecs.pop(key, None)
+
+    def get_key(self, session_id:str) -> bytes:
         try:
-            return cls._initial_keys[session_id]
+            return self._session_keys[session_id]
         except KeyError:
             return DEFAULT_KEY.encode("utf-8")
 
     @property
-    def is_connected(self):
-        return self.connected
+    def is_connected(self) -> bool:
+        """TLS连接已建立（握手中或已就绪）"""
+        return self.state in (ConnectionState.HELLO, ConnectionState.LOGGING_IN, ConnectionState.READY)
+
+    @property
+    def last_heartbeat_rtt(self) -> Optional[float]:
+        """最近一次心跳往返耗时（秒）"""
+        return self._heartbeat.last_rtt
+
+    @property
+    def last_time_to_detect(self) -> Optional[float]:
+        """最近一次检测到连接失效时，距最后收到数据包的耗时（秒）"""
+        return self._liveness.last_time_to_detect
+
+    @property
+    def is_ready(self) -> bool:
+        """SSL连接已建立且登录成功"""
+        return self.state is ConnectionState.READY
+
+    @property
+    def link_healthy(self) -> bool:
+        """推送链路健康：已登录且最近的心跳没有丢失"""
+        return self.state is ConnectionState.READY and self._heartbeat.misses == 0
+
+    def _notify_link(self):
+        """链路健康状态变化时通知调用方（主动断开时不通知）"""
+        healthy = self.link_healthy
+        if healthy == self._link_healthy or self._closing:
+            return
+        self._link_healthy = healthy
+        if self.on_link_change is not None:
+            self.on_link_change(healthy)
 
     async def _create_ssl_context(self):
         """异步创建SSL上下文（通过HA线程池执行同步操作）"""
@@ -128,8 +222,6 @@ class SSLClient:
 
     async def _connect(self):
         """建立SSL连接（消除阻塞警告）（先确保上下文已创建）"""
-        if self.connected:
-            return True
         try:
             if not self.ssl_context:
                 self.ssl_context = await self._create_ssl_context()
@@ -144,7 +236,11 @@ class SSLClient:
                 timeout=10.0  # 10秒超时
             )
             self._update_activity("SSL连接成功")
-            self.connected = True
+            # 启动唯一的发送任务
+            self._generation += 1
+            self._writer_task = self.hass.async_create_background_task(
+                self._write_loop(),
+                name="ssl_packet_writer")
             return True
         except asyncio.TimeoutError:
             _LOGGER.error("SSL连接服务器 [%s:%s] 超时", SSL_HOST, SSL_PORT)
@@ -158,15 +254,25 @@ class SSLClient:
 
     async def _disconnect(self):
         """退出监听任务并断开连接"""
-        # 取消心跳任务
-        if self._heartbeat_task and not self._heartbeat_task.done():
+        self._liveness.stop()
+        # 取消心跳任务（在任务自身内部断开时不能取消并等待自己）
+        current_task = asyncio.current_task()
+        if self._heartbeat_task and not self._heartbeat_task.done() and self._heartbeat_task is not current_task:
             self._heartbeat_task.cancel()
             try:
                 await self._heartbeat_task
             except asyncio.CancelledError:
                 pass
 
-        if self._listening_task and not self._listening_task.done():
+        if self._writer_task and not self._writer_task.done() and self._writer_task is not current_task:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+        self._fail_queued()
+
+        if self._listening_task and not self._listening_task.done() and self._listening_task is not current_task:
             self._listening_task.cancel()
             try:
                 await self._listening_task
@@ -183,82 +289,311 @@ class SSLClient:
             except Exception as e:
                 _LOGGER.debug("关闭SSL连接失败: %s", e)
 
+        # 丢弃会话密钥及其缓存的加解密器
+        if self.session_id:
+            self.remove_key(self.session_id)
+        self._codecs.pop(self.session_key, None)
+
         self.reader = None
         self.writer = None
         self.session_id = None
         self.session_key = None
-        self.connected = False
-        _LOGGER.debug(f"SSL连接已断开")
+        self._login_ok = False
+        self._hello_event.clear()
+        self._login_event.clear()
+        self._cancel_pending()
+        _LOGGER.debug("SSL连接已断开")
+
+    def _set_state(self, state: ConnectionState):
+        """切换连接状态并唤醒等待状态变化的调用方"""
+        if state is self.state:
+            return
+        _LOGGER.debug("SSL连接状态: %s -> %s", self.state.value, state.value)
+        self.state = state
+        waiter, self._state_changed = self._state_changed, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+        self._notify_link()
+
+    async def _wait_settled(self) -> bool:
+        """等待连接就绪，熔断打开或已主动断开时返回False"""
+        while True:
+            if self.state is ConnectionState.READY:
+                return True
+            if self._closing or self._breaker.is_open:
+                return False
+            if self._state_changed is None:
+                self._state_changed = asyncio.get_running_loop().create_future()
+            await asyncio.shield(self._state_changed)
+
+    def _ensure_running(self):
+        """启动唯一的连接管理任务（已在运行时不重复启动）"""
+        self._closing = False
+        if self._run_task is None or self._run_task.done():
+            self._run_task = self.hass.async_create_background_task(
+                self._run(),
+                name="ssl_connection_manager")
+
+    async def _run(self):
+        """连接管理任务：唯一负责建立连接、登录、断线后退避重连"""
+        try:
+            while not self._closing:
+                if self._breaker.is_open:
+                    self._set_state(ConnectionState.BACKOFF)
+                    await asyncio.sleep(self._breaker.remaining)
+                    continue
+
+                if await self._establish():
+                    self._breaker.record_success()
+                    self._backoff.reset()
+                    self._set_state(ConnectionState.READY)
+                    self._start_heartbeat_task()
+                    self._liveness.start()
+                    # 保持连接，直到监听/发送任务或存活检测报告连接断开
+                    await self._lost_event.wait()
+                    _LOGGER.warning("SSL连接已断开: %s", self._lost_reason)
+                else:
+                    self._breaker.record_failure()
 
-    async def _reconnect(self):
-        """重连逻辑"""
+                await self._disconnect()
+                if self._closing:
+                    break
+                self._set_state(ConnectionState.BACKOFF)
+                if not self._breaker.is_open:
+                    delay = self._backoff.next()
+                    _LOGGER.debug("%.1f秒后尝试重连", delay)
+                    await asyncio.sleep(delay)
+        finally:
+            if self._closing:
+                self._set_state(ConnectionState.DISCONNECTED)
+
+    async def _establish(self) -> bool:
+        """建立连接并完成登录流程：hello与登录均等待服务器响应事件，而非固定延时"""
+        self._lost_event.clear()
+        self._lost_reason = None
+        self._hello_event.clear()
+        self._login_event.clear()
+        self._login_ok = False
         try:
-            await self._disconnect()
+            self._set_state(ConnectionState.CONNECTING)
+            if not await self._connect():
+                return False
+
+            # 启动监听任务
+            self._listening_task = self.hass.async_create_background_task(
+                self._listen_loop(),
+                name="server_response_listener")
+
+            # 发送获取会话密钥请求，等待响应带回session_id和session_key
+            self._set_state(ConnectionState.HELLO)
+            await self._send_hello()
+            await asyncio.wait_for(self._hello_event.wait(), self.handshake_timeout)
+            if self._lost_event.is_set():
+                return False
+
+            # SSL 登录，等待登录响应
+            self._set_state(ConnectionState.LOGGING_IN)
+            if await self._send_login():
+                await asyncio.wait_for(self._login_event.wait(), self.handshake_timeout)
+            if self._login_ok and not self._lost_event.is_set():
+                return True
+            _LOGGER.warning("SSL登录未成功")
+        except asyncio.TimeoutError:
+            _LOGGER.warning("SSL握手等待响应超时（%s秒）", self.handshake_timeout)
         except Exception as e:
-            _LOGGER.error("错误: %s", e)
-
-        if self.retry_interval > 0:
-            _LOGGER.debug(f"{self.retry_interval}秒后尝试重连...")
-            await asyncio.sleep(self.retry_interval)
-            await self.connect_and_login()
+            _LOGGER.warning("SSL连接/登录失败: %s", e)
+        return False
 
-    async def connect_and_login(self):
-        """建立连接并完成登录流程"""
-        if self.connected:
+    def _connection_lost(self, reason: str):
+        """监听/发送任务或存活检测报告连接断开，由连接管理任务统一处理"""
+        if self._lost_event.is_set():
+            return
+        self._lost_reason = reason
+        self._lost_event.set()
+        # 新指令不再进入已断开的连接，而是等待重连完成
+        if self.state is ConnectionState.READY:
+            self._set_state(ConnectionState.BACKOFF)
+        # 唤醒握手等待，握手阶段断开时立即结束本次尝试
+        self._hello_event.set()
+        self._login_event.set()
+
+    async def connect_and_login(self) -> bool:
+        """启动连接管理任务并等待首次登录完成；连续失败触发熔断时返回False（后台仍会按熔断时间重试）"""
+        self._ensure_running()
+        return await self._wait_settled()
+
+    async def wait_ready(self) -> bool:
+        """等待SSL会话就绪：熔断打开时立即失败，否则最多等待handshake_timeout秒"""
+        if self.state is ConnectionState.READY:
             return True
-        for retry in range(SSL_MAX_RECONNECT_ATTEMPTS):
+        if self._breaker.is_open:
+            return False
+        self._ensure_running()
+        try:
+            return await asyncio.wait_for(self._wait_settled(), self.handshake_timeout)
+        except asyncio.TimeoutError:
+            return False
+
+    async def disconnect(self):
+        """主动断开连接并停止重连"""
+        self._closing = True
+        if self._run_task and not self._run_task.done():
+            self._run_task.cancel()
             try:
-                # 建立 SSL 连接
-                _LOGGER.debug("SSL正在连接和登录...")
-                self.connected = await self._connect()
-                if self.connected:
-                    # 发送获取会话密钥请求
-                    await self._send_hello()
-
-                    # 启动监听任务
-                    self._listening_task = self.hass.async_create_background_task(
-                        self._listen_loop(),
-                        name="server_response_listener")
-
-                    # 等待获取session_id和session_key
-                    await asyncio.sleep(3)
-                    # SSL 登录
-                    await self._send_login()
-                    return True
-            except Exception as e:
-                _LOGGER.warning(f"连接/登录重试 {retry+1}/{SSL_MAX_RECONNECT_ATTEMPTS}")
-                await asyncio.sleep(self.retry_interval * (retry + 1))  # 指数退避
-        return False
+                await self._run_task
+            except asyncio.CancelledError:
+                pass
+        self._run_task = None
+        await self._disconnect()
+        self._codecs.clear()
+        self._set_state(ConnectionState.DISCONNECTED)
+
+    async def _send_packet(self, data: dict, key: bytes) -> bool:
+        """将数据包放入发送队列，由唯一的发送任务加密并写出；队列满时等待（背压）"""
+        if not self._writer_task or self._writer_task.done():
+            _LOGGER.error("SSL连接未建立，无法发送数据包")
+            return False
+        generation = self._generation
+        future = asyncio.get_running_loop().create_future()
+        await self._send_queue.put((generation, data, key, future))
+        # 队列满时等待期间连接可能已断开，此时数据包属于旧会话，不能留给下一条连接发送
+        if generation != self._generation or not self._writer_task or self._writer_task.done():
+            if not future.done():
+                future.set_result(False)
+            return False
+        return await future
 
-    async def _send_packet(self, data: dict, key: bytes):
-        """加密并发送数据包"""
-        try:
-            if key == DEFAULT_KEY.encode("utf-8"):
-                packet_type = bytes([0x70, 0x6b])   #pk开头的使用默认密钥加密
-                self.session_id = bytes(ID_UNSET).decode("utf-8")
-            else:
-                packet_type = bytes([0x64, 0x6b])   #dk开头的使用服务器会话密钥加密
-            if not self.session_id:
-                _LOGGER.error("会话ID为空，无法发送数据包")
-                return
-            ciphertext = HomematePacket.build_packet(
-                packet_type=packet_type,
-                key=key,
-                session_id=self.session_id.encode("utf-8"),
-                payload=data
-            )
-            if not self.writer:
-                await self._reconnect()
-            if not self.writer:
-                _LOGGER.error("重连失败，无法发送指令")
+    def _build_frame(self, data: dict, key: bytes) -> Optional[bytes]:
+        """按当前会话加密数据包"""
+        if key == DEFAULT_KEY.encode("utf-8"):
+            packet_type = HomematePacket.PK     #pk开头的使用默认密钥加密
+            self.session_id = bytes(ID_UNSET).decode("utf-8")
+        else:
+            packet_type = HomematePacket.DK     #dk开头的使用服务器会话密钥加密
+        if not self.session_id:
+            _LOGGER.error("会话ID为空，无法发送数据包")
+            return None
+        return HomematePacket.build_packet(
+            packet_type=packet_type,
+            key=key,
+            session_id=self.session_id.encode("utf-8"),
+            payload=data,
+            codecs=self._codecs
+        )
+
+    async def _write_loop(self):
+        """唯一的发送任务：把队列中已积累的数据包合并为一次write()/drain()"""
+        while True:
+            batch = [await self._send_queue.get()]
+            while len(batch) < self.write_batch_size and not self._send_queue.empty():
+                batch.append(self._send_queue.get_nowait())
+
+            frames = []
+            sent = []
+            for generation, data, key, future in batch:
+                if generation != self._generation:
+                    # 旧连接遗留的数据包（按旧会话加密），直接丢弃
+                    if not future.done():
+                        future.set_result(False)
+                    continue
+                try:
+                    frame = self._build_frame(data, key)
+                except Exception as e:
+                    _LOGGER.error("数据包加密失败: %s", e)
+                    frame = None
+                if frame is None:
+                    if not future.done():
+                        future.set_result(False)
+                    continue
+                frames.append(frame)
+                sent.append(future)
+                if self.packet_log is not None:
+                    self.packet_log.record(frame, PacketLog.OUT, {self.session_id: key}, self.username)
+            if not frames:
+                continue
+
+            try:
+                self._update_activity("发送%d个数据包", len(frames))
+                self.writer.write(b"".join(frames))
+                await self.writer.drain()
+            except Exception as e:
+                _LOGGER.error("发送失败: %s", e)
+                for future in sent:
+                    if not future.done():
+                        future.set_result(False)
+                self._connection_lost("发送失败: %s" % e)
                 return
-            self._update_activity("发送指令")
-            self.writer.write(ciphertext)
-            await self.writer.drain()
-        except Exception as e:
-            _LOGGER.error("发送失败: %s", e)
-            if 'lost' in str(e) or 'close' in str(e) or '_write_appdata' in str(e):
-                await self._reconnect()
+            for future in sent:
+                if not future.done():
+                    future.set_result(True)
+
+    def _fail_queued(self):
+        """连接断开时结束发送队列中尚未写出的数据包"""
+        while not self._send_queue.empty():
+            _, _, _, future = self._send_queue.get_nowait()
+            if not future.done():
+                future.set_result(False)
+
+    async def _send_command(self, payload: dict, timeout: Optional[float] = None) -> Optional[int]:
+        """发送指令并等待服务器按serial返回的响应，返回响应状态码（发送失败、超时或响应未携带status返回None）"""
+        serial = payload["serial"]
+        timeout = timeout or self.command_timeout
+        # 限制同时等待响应的指令数量，超出时在此排队
+        async with self._in_flight:
+            # 排队期间连接可能已断开
+            if not self.is_ready:
+                _LOGGER.debug("指令[serial=%s]发送前SSL连接已断开", serial)
+                return None
+            response, rtt = await self._request(payload, timeout)
+            if response is None:
+                return None
+            self.last_command_rtt = rtt
+            status = response.get("status")
+            _LOGGER.debug("指令[serial=%s]响应状态: %s, 往返耗时: %.3f秒", serial, status, rtt)
+            return status
+
+    async def _request(self, payload: dict, timeout: float) -> tuple[Optional[dict], Optional[float]]:
+        """登记等待并发送数据包，返回(响应数据包, 往返耗时)；发送失败或超时返回(None, None)
+
+        往返耗时从数据包写出后开始计算，不包含在发送队列中等待的时间。
+        """
+        serial = payload["serial"]
+        future = asyncio.get_running_loop().create_future()
+        self._pending[serial] = (payload["cmd"], future)
+        try:
+            if not await self._send_packet(payload, self.session_key):
+                return None, None
+            start = time.monotonic()
+            response = await asyncio.wait_for(future, timeout)
+            if response is None:
+                return None, None
+            return response, time.monotonic() - start
+        except asyncio.TimeoutError:
+            _LOGGER.warning("请求[cmd=%s, serial=%s]等待响应超时（%s秒）", payload["cmd"], serial, timeout)
+            return None, None
+        finally:
+            self._pending.pop(serial, None)
+
+    def _resolve_pending(self, data: dict):
+        """按serial与cmd匹配等待中的请求，以响应数据包作为结果
+
+        服务器主动推送的状态（respByAcc）即使serial相同也不是对请求的响应，不参与匹配。
+        """
+        pending = self._pending.get(data.get("serial"))
+        if pending is None or data.get("respByAcc"):
+            return
+        cmd, future = pending
+        if data.get("cmd") != cmd or future.done():
+            return
+        self._last_response_time = time.monotonic()
+        future.set_result(data)
+
+    def _cancel_pending(self):
+        """连接断开时结束所有等待中的请求"""
+        for _, future in self._pending.values():
+            if not future.done():
+                future.set_result(None)
+        self._pending.clear()
 
     async def _send_hello(self):
         """发送申请会话密钥请求"""
@@ -267,26 +602,25 @@ class SSLClient:
 
     async def _send_login(self):
         """发送登录请求"""
-        if not self.connected:
-            _LOGGER.warning(f"未建立SSL连接，无法登录")
+        if not self.is_connected:
+            _LOGGER.warning("未建立SSL连接，无法登录")
             return False
         payload = HomemateJsonData.ssl_login(username=self.username,
                                              password_md5=self.password,
                                              family_id=self.family_id)
         if self.session_key and self.session_key != DEFAULT_KEY.encode("utf-8"):
-            await self._send_packet(payload, self.session_key)
-            # 启动心跳任务
-            self._start_heartbeat_task()
-            return True
+            return await self._send_packet(payload, self.session_key)
         return False
 
-    async def _send_control(self, device_id: str, device_uid: str, state: int, value2: int = 0, value3: int = 0, value4: int = 0):
-        """发送控制指令，支持完整的空调参数"""
-        await self.connect_and_login()
+    async def _send_control(self, device_id: str, device_uid: str, state: int, value2: int = 0, value3: int = 0, value4: int = 0) -> Optional[int]:
+        """发送控制指令，支持完整的空调参数，返回响应状态码（0为成功，None为发送失败或超时）"""
         # 移除assert检查，改为条件判断
         if not device_uid:
             _LOGGER.warning("设备%s没有UID信息，无法发送控制指令", device_id)
-            return False
+            return None
+        if not await self.wait_ready():
+            _LOGGER.warning("SSL会话未就绪，无法给[%s]发送控制指令", device_id)
+            return None
 
         payload = HomemateJsonData.ssl_switch_control(username=self.username,
                                                       device_id=device_id,
@@ -295,39 +629,30 @@ class SSLClient:
                                                       value2=value2,
                                                       value3=value3,
                                                       value4=value4)
-        if self.session_key and self.session_key != DEFAULT_KEY.encode("utf-8"):
-            for retry in range(SSL_MAX_RECONNECT_ATTEMPTS):
-                if self.connected:
-                    await self._send_packet(payload, self.session_key)
-                    return True
-                _LOGGER.warning("SSL连接未建立，2秒后重试...")
-                await asyncio.sleep(2)
-        _LOGGER.warning("无法给[%s]发送控制指令", device_id)
-        return False
+        return await self._send_command(payload)
 
     async def async_control_air_conditioner(self, device_id: str, value1: int, value2: int, value3: int, value4: int):
         """控制空调设备的完整参数"""
-        uid = get_uid_by_id(self.hass, device_id)
+        uid = get_uid_by_id(self.registry, device_id)
         if uid:
             # value1: 1为关，0为开
-            result = await self._send_control(device_id, uid, state=1 if value1 == 1 else 0, value2=value2, value3=value3, value4=value4)
-            if result:
+            status = await self._send_control(device_id, uid, state=1 if value1 == 1 else 0, value2=value2, value3=value3, value4=value4)
+            if status == 0:
                 # 更新本地状态
-                set_state_by_id(self.hass, device_id, value1)
-                return True
-        return False
+                set_state_by_id(self.registry, device_id, value1)
+            return status
+        return None
     
-    async def async_air_conditioner_state_update(self, device_id: str, value1: int, value2: int, value3: int, value4: int):
-        """使用CMD_STATE_UPDATE命令更新空调设备的状态"""
-        uid = get_uid_by_id(self.hass, device_id)
+    async def async_air_conditioner_state_update(self, device_id: str, value1: int, value2: int, value3: int, value4: int) -> Optional[int]:
+        """使用CMD_STATE_UPDATE命令更新空调设备的状态，返回响应状态码"""
+        uid = get_uid_by_id(self.registry, device_id)
         if not uid:
             _LOGGER.warning("设备%s没有UID信息，无法发送状态更新指令", device_id)
-            return False
+            return None
             
-        await self.connect_and_login()
-        if not self.connected:
-            _LOGGER.warning("SSL连接未建立，无法发送状态更新指令")
-            return False
+        if not await self.wait_ready():
+            _LOGGER.warning("SSL会话未就绪，无法发送状态更新指令")
+            return None
             
         # 构建CMD_STATE_UPDATE指令的payload
         payload = HomemateJsonData.ssl_air_conditioner_state_update(
@@ -339,40 +664,28 @@ class SSLClient:
             value3=value3,
             value4=value4
         )
-        
-        if self.session_key and self.session_key != DEFAULT_KEY.encode("utf-8"):
-            for retry in range(SSL_MAX_RECONNECT_ATTEMPTS):
-                if self.connected:
-                    await self._send_packet(payload, self.session_key)
-                    _LOGGER.debug("已发送空调状态更新指令: device_id=%s, value1=%s, value2=%s, value3=%s, value4=%s", 
-                               device_id, value1, value2, value3, value4)
-                    return True
-                _LOGGER.warning("SSL连接未建立，2秒后重试...")
-                await asyncio.sleep(2)
-        _LOGGER.warning("无法给[%s]发送空调状态更新指令", device_id)
-        return False
+        _LOGGER.debug("发送空调状态更新指令: device_id=%s, value1=%s, value2=%s, value3=%s, value4=%s", 
+                      device_id, value1, value2, value3, value4)
+        return await self._send_command(payload)
     
-    async def async_control_ventilation(self, device_id: str, value1: int):
-        """控制新风设备的风速"""
-        uid = get_uid_by_id(self.hass, device_id)
+    async def async_control_ventilation(self, device_id: str, value1: int) -> Optional[int]:
+        """控制新风设备的风速，返回响应状态码"""
+        uid = get_uid_by_id(self.registry, device_id)
         if uid:
             # value1: 0为慢档，50为停，100为快档
-            result = await self._send_control(device_id, uid, state=value1, value2=0, value3=0, value4=0)
-            if result:
-                return True
-        return False
+            return await self._send_control(device_id, uid, state=value1, value2=0, value3=0, value4=0)
+        return None
     
-    async def async_ventilation_state_update(self, device_id: str, value1: int):
-        """使用CMD_STATE_UPDATE命令更新新风设备的状态"""
-        uid = get_uid_by_id(self.hass, device_id)
+    async def async_ventilation_state_update(self, device_id: str, value1: int) -> Optional[int]:
+        """使用CMD_STATE_UPDATE命令更新新风设备的状态，返回响应状态码"""
+        uid = get_uid_by_id(self.registry, device_id)
         if not uid:
             _LOGGER.warning("设备%s没有UID信息，无法发送状态更新指令", device_id)
-            return False
+            return None
             
-        await self.connect_and_login()
-        if not self.connected:
-            _LOGGER.warning("SSL连接未建立，无法发送状态更新指令")
-            return False
+        if not await self.wait_ready():
+            _LOGGER.warning("SSL会话未就绪，无法发送状态更新指令")
+            return None
             
         # 构建CMD_STATE_UPDATE指令的payload
         payload = HomemateJsonData.ssl_ventilation_state_update(
@@ -381,39 +694,53 @@ class SSLClient:
             device_mac=uid,
             value1=value1
         )
-        
-        if self.session_key and self.session_key != DEFAULT_KEY.encode("utf-8"):
-            for retry in range(SSL_MAX_RECONNECT_ATTEMPTS):
-                if self.connected:
-                    await self._send_packet(payload, self.session_key)
-                    _LOGGER.debug("已发送新风状态更新指令: device_id=%s, value1=%s", device_id, value1)
-                    return True
-                _LOGGER.warning("SSL连接未建立，2秒后重试...")
-                await asyncio.sleep(2)
-        _LOGGER.warning("无法给[%s]发送新风状态更新指令", device_id)
-        return False
+        _LOGGER.debug("发送新风状态更新指令: device_id=%s, value1=%s", device_id, value1)
+        return await self._send_command(payload)
 
     def _start_heartbeat_task(self):
         """启动心跳任务"""
         if self._heartbeat_task and not self._heartbeat_task.done():
             self._heartbeat_task.cancel()
         
+        self._heartbeat.reset()
         self._heartbeat_task = self.hass.async_create_background_task(
             self._send_heartbeat(),
             name="ssl_heartbeat_task"
         )
 
     async def _send_heartbeat(self):
-        """定期发送心跳包"""
-        _LOGGER.debug("心跳任务已启动，间隔: %d秒", self.heartbeat_interval)
+        """链路空闲时发送心跳包：收发数据包都会推迟下一次心跳，应答的RTT与丢失调整心跳间隔"""
+        heartbeat = self._heartbeat
+        _LOGGER.debug("心跳任务已启动，空闲间隔: %.1f秒", heartbeat.interval)
         try:
-            while self.connected:
+            while self.state is ConnectionState.READY:
                 try:
-                    payload = HomemateJsonData.ssl_heartbeat()
-                    if self.session_key and self.session_key != DEFAULT_KEY.encode("utf-8"):
-                        await self._send_packet(payload, self.session_key)
-                        _LOGGER.debug("心跳包发送成功")
-                    await asyncio.sleep(self.heartbeat_interval)
+                    delay = heartbeat.delay(time.monotonic() - self._last_active_time)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                        continue
+                    if not self.session_key or self.session_key == DEFAULT_KEY.encode("utf-8"):
+                        await asyncio.sleep(heartbeat.interval)
+                        continue
+                    # 心跳不占用控制指令的并发窗口，窗口占满时也能按时发出
+                    sent_at = time.monotonic()
+                    response, rtt = await self._request(HomemateJsonData.ssl_heartbeat(), heartbeat.ack_timeout)
+                    if response is None and self._last_response_time >= sent_at:
+                        # 等待期间其他请求收到了应答，说明链路仍然存活（如服务器繁忙时心跳应答较慢）
+                        heartbeat.on_alive()
+                        self._notify_link()
+                    elif response is None:
+                        heartbeat.on_miss()
+                        self._notify_link()
+                        if heartbeat.misses >= SSL_HEARTBEAT_MAX_MISSES:
+                            self._liveness.expire("心跳连续%d次未应答" % heartbeat.misses)
+                            return
+                        # 发送失败时活跃时间不会刷新，等待一个间隔再重试
+                        await asyncio.sleep(heartbeat.interval)
+                    else:
+                        heartbeat.on_ack(rtt)
+                        self._notify_link()
+                        _TRACE.trace("心跳应答，RTT: %.3f秒，下次间隔: %.1f秒", heartbeat.last_rtt, heartbeat.interval)
                 except Exception as e:
                     _LOGGER.warning("发送心跳包失败: %s", e)
                     await asyncio.sleep(1)  # 短暂延迟后重试
@@ -429,22 +756,28 @@ class SSLClient:
             while True:
                 try:
                     # 读取42字节长度的头部数据
-                    header_data = await self.reader.readexactly(42)
+                    header_data = await self.reader.readexactly(HomematePacket.HEADER_SIZE)
                     if not header_data:
                         await asyncio.sleep(1)
                         continue
                     length = HomematePacket.parse_length(header_data)
-                    ciphertext = await self.reader.readexactly(length-42)
+                    ciphertext = await self.reader.readexactly(length - HomematePacket.HEADER_SIZE)
+                    self._liveness.last_rx = time.monotonic()
                     if self.session_key is None:
                         self.session_key = DEFAULT_KEY.encode("utf-8")
-                    # 解密
-                    packet = HomematePacket(header_data+ciphertext, {self.session_id: self.session_key})
+                    keys = {self.session_id: self.session_key}
+                    if self.packet_log is not None:
+                        self.packet_log.record(header_data + ciphertext, PacketLog.IN, keys, self.username)
+                    # 头部与密文分别解析，不再拼接整包
+                    packet = HomematePacket.from_frame(header_data, ciphertext, keys, self._codecs)
                     self.session_id = bytes(packet.session_id).decode('utf-8')
                     data = packet.json_payload
 
                     cmd = data.get("cmd")
                     if cmd :
-                        self._update_activity(f"收到服务器响应: cmd={cmd}")
+                        self._update_activity("收到服务器响应: cmd=%s", cmd)
+                    # 唤醒按serial等待该响应的指令
+                    self._resolve_pending(data)
                     if cmd == CMD_HELLO:
                         await self._handle_hello(data)
                     elif cmd == CMD_LOGIN:
@@ -459,7 +792,7 @@ class SSLClient:
                         pass  # 忽略心跳响应
                     else:
                         _LOGGER.warning("未知命令: %s", cmd)
-                        _LOGGER.debug("响应包: %s", data)
+                        _TRACE.trace("响应包: %s", data)
                 except asyncio.IncompleteReadError as e:
                     _LOGGER.warning("读取失败: %s，连接中断: %s", e, self.reader.at_eof())
                     break
@@ -473,53 +806,53 @@ class SSLClient:
                     _LOGGER.error("接收错误: %s，连接中断: %s", e, self.reader.at_eof())
                     break
         except asyncio.CancelledError:
+            # 主动断开时被取消，不再重连
             _LOGGER.debug("监听任务已取消")
+            raise
         finally:
             _LOGGER.debug("已退出SSL服务器监听状态")
-            # 断开后重连
-            await self._reconnect()
+        # 连接异常中断，交由连接管理任务退避重连
+        self._connection_lost("监听任务退出")
 
     async def _handle_hello(self, data: dict):
         """处理会话密钥响应"""
         self.session_key = str(data.get("key")).encode("utf-8")
         if self.session_id:
-            SSLClient.add_key(self.session_id, self.session_key)
+            self.add_key(self.session_id, self.session_key)
             _LOGGER.debug("SSL 会话创建成功, sessionId: %s, sessionKey: %s",self.session_id, data.get("key"))
             self.on_session_id_obtained(self.session_id)
+        self._hello_event.set()
 
     async def _handle_login(self, data: dict):
         """处理登录响应"""
         if "userId" in data:
             _LOGGER.info("SSL 登录成功，userId: %s",data.get("userId"))
-            self._connected = True
-            # 可选：请求当前状态
+            self._login_ok = True
         else:
             _LOGGER.error("SSL 登录失败: %s", data.get("msg"))
+            self._login_ok = False
+        self._login_event.set()
 
     async def _handle_control(self, data: dict):
         """处理开关控制响应"""
         if "uid" in data or "deviceId" in data:
             # 优先从响应数据中获取deviceId
+            # 设备名称只用于日志，未启用DEBUG时不查找
+            if not _TRACE.debug_enabled:
+                return
             device_id = data.get("deviceId")
-            device_name = None
-            
-            if device_id:
-                device_name = get_name_by_id(self.hass, device_id)
-                _LOGGER.debug("从deviceId获取设备名称: %s", device_name)
-        
+            device_name = get_name_by_id(self.registry, device_id) if device_id else None
             # 如果deviceId不存在或获取设备名称失败，再从UID获取（保持兼容性）
             uid = data.get("uid") if "uid" in data else None
             if not device_name and uid:
-                device_name = get_name_by_uid(self.hass, uid)
-                _LOGGER.debug("从UID获取设备名称: %s", device_name)
-                
+                device_name = get_name_by_uid(self.registry, uid)
             _LOGGER.debug("开关[%s]控制成功", device_name if device_name else device_id or uid)
         else:
             _LOGGER.warning("开关控制失败: %s", data.get("msg"))
 
     async def _handle_state_update(self, data: dict):
         """处理状态更新推送"""
-        _LOGGER.debug("完整的状态更新数据: %s", data)
+        _TRACE.trace("完整的状态更新数据: %s", data)
         if data.get("respByAcc"):
             # 优先从推送数据中获取deviceId
             device_id = data.get("deviceId","")
@@ -530,36 +863,20 @@ class SSLClient:
             value3 = data.get("value3", 0)  # 风速
             value4 = data.get("value4", 0)  # 温度
             
-            # 添加详细日志记录原始推送的所有关键状态字段
-            _LOGGER.debug("设备状态更新原始数据 - deviceId: %s, value1(开关): %s, value2(模式): %s, value3(风速): %s, value4(温度): %s", 
-                        device_id, device_state, value2, value3, value4)
-            
             # 如果deviceId不存在，再从UID获取（保持兼容性）
+            uid = ""
             if not device_id:
                 uid = data.get("uid","")
-                _LOGGER.debug("接收到设备状态更新: UID=%s, 状态=%s", uid, device_state)
-                device_id = get_id_by_uid(self.hass, uid)
-                _LOGGER.debug("UID %s 映射到设备ID %s", uid, device_id)
-            else:
-                _LOGGER.debug("直接从推送数据中获取到设备ID: %s, 状态=%s", device_id, device_state)
+                device_id = get_id_by_uid(self.registry, uid)
+                _TRACE.trace("UID %s 映射到设备ID %s", uid, device_id)
             
             # 验证device_id是否有效
             if device_id:
                 # 检查device_id是否存在于当前的设备列表中
-                device_list = get_current_devices(self.hass)
-                device_exists = any(device.get("deviceId") == device_id for device in device_list)
-                _LOGGER.debug("设备ID %s 是否存在于设备列表中: %s", device_id, device_exists)
-                
-                if device_exists:
-                    # 根据deviceId获取设备名称
-                    device_name = get_name_by_id(self.hass, device_id)
-                    _LOGGER.debug("设备ID %s 对应的设备名称: %s", device_id, device_name)
-                    
-                    # 更新状态列表 - 注释掉直接更新value1的代码，因为on_status_update会正确处理状态解析
-                    # if set_state_by_id(self.hass, device_id, device_state):
-                    #     _LOGGER.debug("开关[%s]状态更新为: %s", device_name, "关闭" if device_state==1 else "开启")
-                    # 触发完整的状态更新回调，包含所有空调状态字段
-                    _LOGGER.debug("触发设备ID %s 的完整状态更新", device_id)
+                if has_device(self.registry, device_id):
+                    # 触发完整的状态更新回调，包含所有空调状态字段（on_status_update负责解析状态）
+                    _TRACE.trace("设备状态更新 - deviceId: %s, value1(开关): %s, value2(模式): %s, value3(风速): %s, value4(温度): %s",
+                                 device_id, device_state, value2, value3, value4)
                     self.on_status_update(device_id, device_state, value2, value3, value4)
                 else:
                     _LOGGER.warning("设备ID %s 不存在于设备列表中，跳过状态更新", device_id)
@@ -573,47 +890,51 @@ class SSLClient:
             return {
             'utc': int(time.time())
         }
-        _LOGGER.debug(f"heartbeat: {data}")
+        _TRACE.trace("heartbeat: %s", data)
 
     async def _handle_handshake(self, data: dict):
         """处理握手包(未实现)"""
         if 'localIp' in data:
             entity_id = data['localIp'].replace('.', '_')
 
-        _LOGGER.debug(f"handshark: {data}")
+        _LOGGER.debug("handshark: %s", data)
 
     async def async_toggle_device(self, device_id: str):
         """切换设备状态"""
-        state_list = get_current_state(self.hass)
-        current = get_state_by_id(self.hass, device_id)
+        current = get_state_by_id(self.registry, device_id)
         new_state = 1 if current == 0 else 0
-        device_list = get_current_devices(self.hass)
-        uid = get_uid_by_id(self.hass, device_id)
+        uid = get_uid_by_id(self.registry, device_id)
         if uid:
-            await self._send_control(device_id, uid, new_state)
-            set_state_by_id(self.hass, device_id, new_state)
+            if await self._send_control(device_id, uid, new_state) == 0:
+                set_state_by_id(self.registry, device_id, new_state)
 
-    async def async_turn_on(self, device_id: str):
-        """打开设备"""
-        uid = get_uid_by_id(self.hass, device_id)
+    async def async_turn_on(self, device_id: str) -> Optional[int]:
+        """打开设备，返回响应状态码"""
+        uid = get_uid_by_id(self.registry, device_id)
         if uid:
-            result = await self._send_control(device_id, uid, 0)
-            if result:
-                set_state_by_id(self.hass, device_id, 0)
-                return True
-        return False
-
-    async def async_turn_off(self, device_id: str):
-        """关闭设备"""
-        uid = get_uid_by_id(self.hass, device_id)
+            status = await self._send_control(device_id, uid, 0)
+            if status == 0:
+                set_state_by_id(self.registry, device_id, 0)
+            return status
+        return None
+
+    async def async_turn_off(self, device_id: str) -> Optional[int]:
+        """关闭设备，返回响应状态码"""
+        uid = get_uid_by_id(self.registry, device_id)
         if uid:
-            result = await self._send_control(device_id, uid, 1)
-            if result:
-                set_state_by_id(self.hass, device_id, 1)
-                return True
-        return False
-
-    def _update_activity(self, msg):
-        """更新最后活跃时间"""
-        self._last_active_time = datetime.now()
-        _LOGGER.debug("%s, 激活时间：%s", msg, self._last_active_time)
+            status = await self._send_control(device_id, uid, 1)
+            if status == 0:
+                set_state_by_id(self.registry, device_id, 1)
+            return status
+        return None
+
+    def _on_link_dead(self, reason: str):
+        """存活检测判定连接失效：中止传输，由连接管理任务重连"""
+        self._connection_lost(reason)
+        if self.writer is not None:
+            self.writer.transport.abort()
+
+    def _update_activity(self, msg, *args):
+        """更新最后活跃时间（每个数据包调用，日志按采样输出）"""
+        self._last_active_time = time.monotonic()
+        _TRACE.trace(msg, *args)
@@ -0,0 +1,5 @@
+# 让测试可以直接 import ORVIBO_Device_Control（与Home Assistant加载自定义组件的方式一致）
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "custom_components"))
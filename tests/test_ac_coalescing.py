@@ -0,0 +1,97 @@
+"""空调连续调整：合并窗口内的修改合并为一条CMD_STATE_UPDATE，所有调用方得到同一结果"""
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from ORVIBO_Device_Control import coordinator as coordinator_module
+from ORVIBO_Device_Control.codec import AirConditionerCodec
+from ORVIBO_Device_Control.coordinator import OrviboSwitchCoordinator
+from ORVIBO_Device_Control.device_state import DeviceState
+
+AC_MODEL = "f5f2d6e6f4a14a82bee85032c27dbd1e"
+WINDOW = 0.05
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """在带有HomeAssistant实例的事件循环中运行测试协程，合并窗口缩短为WINDOW秒"""
+    monkeypatch.setattr(coordinator_module, "COMMAND_COALESCE_WINDOW", WINDOW)
+
+    def _run(test):
+        async def main():
+            hass = HomeAssistant(str(tmp_path))
+            try:
+                await test(hass)
+            finally:
+                await hass.async_stop(force=True)
+        asyncio.run(main())
+    return _run
+
+
+def _setup(hass, *statuses, delay=0.0):
+    coordinator = OrviboSwitchCoordinator(hass, "user", "password")
+    coordinator.device_states["ac"] = DeviceState(
+        "ac", model=AC_MODEL, value1=1, value2=3, value3=1, value4=AirConditionerCodec.pack_temperature(26, 25))
+    statuses = list(statuses)
+
+    async def state_update(device_id, **values):
+        await asyncio.sleep(delay)
+        return statuses.pop(0)
+
+    coordinator.ssl_client = Mock(async_air_conditioner_state_update=AsyncMock(side_effect=state_update))
+    return coordinator
+
+
+def test_rapid_changes_are_sent_as_one_update(run):
+    async def test(hass):
+        coordinator = _setup(hass, 0)
+        calls = [
+            coordinator.async_air_conditioner_state_update("ac", value1=0, value4=AirConditionerCodec.pack_temperature(24, 25)),
+            coordinator.async_air_conditioner_state_update("ac", value3=3),
+            coordinator.async_air_conditioner_state_update("ac", value4=AirConditionerCodec.pack_temperature(22, 25)),
+        ]
+        assert await asyncio.gather(*calls) == [True, True, True]
+        send = coordinator.ssl_client.async_air_conditioner_state_update
+        # 未修改的字段取当前状态，同名字段以后到的修改为准
+        send.assert_awaited_once_with(
+            "ac", value1=0, value2=3, value3=3, value4=AirConditionerCodec.pack_temperature(22, 25))
+        state = coordinator.device_states["ac"]
+        assert (state.state, state.target_temperature, state.value3) == (True, 22, 3)
+    run(test)
+
+
+def test_failed_update_resolves_every_caller(run):
+    async def test(hass):
+        coordinator = _setup(hass, 1)
+        calls = [coordinator.async_air_conditioner_state_update("ac", value3=2) for _ in range(3)]
+        assert await asyncio.gather(*calls) == [False, False, False]
+        # 失败时不修改本地状态
+        assert coordinator.device_states["ac"].value3 == 1
+    run(test)
+
+
+def test_next_batch_waits_for_inflight_update(run):
+    async def test(hass):
+        coordinator = _setup(hass, 0, 0, delay=WINDOW * 2)
+        first = asyncio.ensure_future(coordinator.async_air_conditioner_state_update("ac", value1=0))
+        await asyncio.sleep(WINDOW * 1.5)
+        # 上一条指令尚未应答时到达的修改进入下一批，并在上一条成功后按更新后的状态合并
+        second = asyncio.ensure_future(coordinator.async_air_conditioner_state_update("ac", value2=4))
+        assert await asyncio.gather(first, second) == [True, True]
+        send = coordinator.ssl_client.async_air_conditioner_state_update
+        assert send.await_count == 2
+        assert send.await_args.kwargs["value1"] == 0
+        assert send.await_args.kwargs["value2"] == 4
+    run(test)
+
+
+def test_send_error_resolves_callers(run):
+    async def test(hass):
+        coordinator = _setup(hass)
+        coordinator.ssl_client.async_air_conditioner_state_update.side_effect = ConnectionError("lost")
+        assert not await coordinator.async_air_conditioner_state_update("ac", value1=0)
+        assert coordinator._pending_ac_updates == {}
+        assert coordinator._inflight_ac_updates == {}
+    run(test)
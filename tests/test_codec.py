@@ -0,0 +1,80 @@
+"""按型号的编解码器：固定各型号value1-value4与语义状态的映射（HTTPS轮询与SSL推送分别对应原实现的两条路径）"""
+import pytest
+
+from ORVIBO_Device_Control.codec import (
+    AIR_CONDITIONER_CODEC, SWITCH_CODEC, VENTILATION_CODEC, AirConditionerCodec, get_codec,
+)
+from ORVIBO_Device_Control.const import ORVIBO_SWITCH_MODEL
+from ORVIBO_Device_Control.device_state import DeviceState
+
+AC_MODEL = "f5f2d6e6f4a14a82bee85032c27dbd1e"
+VENTILATION_MODEL = "396483ce8b3f4e0d8e9d79079a35a420"
+SWITCH_MODEL = "56d124ba95474fc98aafdb830e933789"
+
+# 设备类型 -> {value1: (HTTPS轮询解码的开关状态, SSL推送解码的开关状态)}
+ON_STATES = {
+    "Switch": {0: (True, True), 1: (False, False), 2: (False, False)},
+    "Air Conditioner": {0: (True, True), 1: (False, False), 2: (True, False)},
+    "Ventilation": {0: (True, True), 50: (False, False), 100: (True, True)},
+}
+
+
+@pytest.mark.parametrize("model", sorted(ORVIBO_SWITCH_MODEL))
+def test_on_state_mapping_per_model(model):
+    codec = get_codec(model)
+    assert codec.device_type == ORVIBO_SWITCH_MODEL[model]
+    for value1, (polled, pushed) in ON_STATES[codec.device_type].items():
+        assert codec.decode(None, value1)["state"] is polled
+        assert codec.decode(None, value1, pushed=True)["state"] is pushed
+
+
+def test_unknown_model_is_a_switch():
+    assert get_codec("unknown") is SWITCH_CODEC
+    assert DeviceState("d0", model="unknown").device_type == "Switch"
+
+
+@pytest.mark.parametrize("value4", [0, -1])
+def test_air_conditioner_value4_without_temperature(value4):
+    state = DeviceState("d0", model=AC_MODEL, value4=(2600 << 16) | 2500)
+    # SSL推送未携带温度时保留原有温度
+    assert "value4" not in AIR_CONDITIONER_CODEC.decode(state, 0, 3, 1, value4, pushed=True)
+    # HTTPS轮询的value4原样接受
+    assert AIR_CONDITIONER_CODEC.decode(state, 0, 3, 1, value4)["value4"] == value4
+
+
+def test_air_conditioner_values():
+    codec = AIR_CONDITIONER_CODEC
+    value4 = AirConditionerCodec.pack_temperature(26, 25)
+    assert value4 == (2600 << 16) | 2500
+    assert (codec.target_temperature(value4), codec.current_temperature(value4)) == (26, 25)
+    assert codec.encode_target_temperature(24, value4) == {"value1": 0, "value4": (2400 << 16) | 2500}
+    assert {value: codec.hvac_mode(True, value) for value in (2, 3, 4, 7, 9)} == {
+        2: "dry", 3: "cool", 4: "heat", 7: "fan_only", 9: "off"}
+    assert codec.hvac_mode(False, 3) == "off"
+    assert codec.encode_hvac_mode("off") == {"value1": 1}
+    assert codec.encode_hvac_mode("heat") == {"value1": 0, "value2": 4}
+    assert codec.encode_hvac_mode("auto") == {"value1": 0, "value2": 3}
+    assert [codec.fan_mode(value) for value in (1, 2, 3, 0)] == ["低风", "中风", "高风", "低风"]
+    assert codec.encode_fan_mode("高风") == {"value3": 3}
+    assert codec.encode_fan_mode("未知") == {"value3": 1}
+
+
+def test_ventilation_values():
+    codec = VENTILATION_CODEC
+    assert [codec.preset_mode(value) for value in (0, 50, 100, 7)] == ["慢", "停", "快", "未知"]
+    assert [codec.encode_preset_mode(mode) for mode in ("慢", "停", "快", "未知")] == [0, 50, 100, None]
+    assert (codec.encode_power(True), codec.encode_power(False)) == (0, 50)
+    assert DeviceState("d0", model=VENTILATION_MODEL, value1=100).fan_speed == "快"
+
+
+def test_switch_values():
+    assert (SWITCH_CODEC.encode_power(True), SWITCH_CODEC.encode_power(False)) == (0, 1)
+    assert SWITCH_CODEC.decode(None, 1, 2, 3, 4) == {
+        "state": False, "value1": 1, "value2": 2, "value3": 3, "value4": 4}
+    assert DeviceState("d0", model=SWITCH_MODEL).codec is SWITCH_CODEC
+
+
+def test_codec_follows_model_change():
+    state = DeviceState("d0", model=SWITCH_MODEL)
+    state.update(model=AC_MODEL)
+    assert state.codec is AIR_CONDITIONER_CODEC
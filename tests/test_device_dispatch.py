@@ -0,0 +1,89 @@
+"""按设备分发：SSL推送只通知订阅了该设备的实体，同一轮事件循环内的多次变化合并为一次通知"""
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from ORVIBO_Device_Control.coordinator import OrviboSwitchCoordinator
+from ORVIBO_Device_Control.device_state import DeviceState
+
+
+@pytest.fixture
+def run(tmp_path):
+    """在带有HomeAssistant实例的事件循环中运行测试协程"""
+    def _run(test):
+        async def main():
+            hass = HomeAssistant(str(tmp_path))
+            try:
+                await test(hass)
+            finally:
+                await hass.async_stop(force=True)
+        asyncio.run(main())
+    return _run
+
+
+def _setup(hass, batch_device_updates=True):
+    coordinator = OrviboSwitchCoordinator(hass, "user", "password", batch_device_updates=batch_device_updates)
+    listeners = {}
+    for device_id in ("d0", "d1"):
+        coordinator.device_states[device_id] = DeviceState(device_id)
+        listeners[device_id] = Mock()
+        coordinator.async_add_device_listener(device_id, listeners[device_id])
+    coordinator.registry.replace_devices([{"deviceId": "d0"}, {"deviceId": "d1"}])
+    coordinator.https_client.family_id = "family"
+    return coordinator, listeners
+
+
+async def _push(coordinator, device_id, value1):
+    """经SSL客户端的推送处理路径送达一条状态推送"""
+    await coordinator._init_ssl_client()
+    await coordinator.ssl_client._handle_state_update(
+        {"respByAcc": 1, "deviceId": device_id, "value1": value1, "value2": 0, "value3": 0, "value4": 0})
+
+
+def test_push_notifies_only_that_device(run):
+    async def test(hass):
+        coordinator, listeners = _setup(hass)
+        coordinator.async_set_updated_data = Mock()
+        await _push(coordinator, "d0", 0)
+        await asyncio.sleep(0)
+        listeners["d0"].assert_called_once()
+        listeners["d1"].assert_not_called()
+        # 不再通知协调器的全部监听者
+        coordinator.async_set_updated_data.assert_not_called()
+    run(test)
+
+
+def test_unchanged_push_notifies_nobody(run):
+    async def test(hass):
+        coordinator, listeners = _setup(hass)
+        await _push(coordinator, "d0", 0)
+        await _push(coordinator, "d0", 0)
+        await asyncio.sleep(0)
+        listeners["d0"].assert_called_once()
+    run(test)
+
+
+@pytest.mark.parametrize("batch_device_updates,calls", [(True, 1), (False, 3)])
+def test_batching_per_event_loop_tick(run, batch_device_updates, calls):
+    async def test(hass):
+        coordinator, listeners = _setup(hass, batch_device_updates)
+        for value1 in (0, 1, 0):
+            await _push(coordinator, "d0", value1)
+        await asyncio.sleep(0)
+        assert listeners["d0"].call_count == calls
+    run(test)
+
+
+def test_removed_listener_is_not_called(run):
+    async def test(hass):
+        coordinator, listeners = _setup(hass)
+        listener = Mock()
+        remove = coordinator.async_add_device_listener("d0", listener)
+        remove()
+        await _push(coordinator, "d0", 0)
+        await asyncio.sleep(0)
+        listener.assert_not_called()
+        listeners["d0"].assert_called_once()
+    run(test)
@@ -0,0 +1,66 @@
+"""DeviceState：紧凑的设备状态记录，update只报告实际变化的字段，轮询时原地更新"""
+import asyncio
+
+import pytest
+
+from ORVIBO_Device_Control.device_state import DeviceState
+from ORVIBO_Device_Control.https_client import HttpsClient
+from ORVIBO_Device_Control.registry import DeviceRegistry
+
+AC_MODEL = "f5f2d6e6f4a14a82bee85032c27dbd1e"
+VENTILATION_MODEL = "396483ce8b3f4e0d8e9d79079a35a420"
+
+
+def test_slotted_record():
+    state = DeviceState("d0")
+    with pytest.raises(AttributeError):
+        state.extra = 1
+    assert not hasattr(state, "__dict__")
+
+
+def test_update_reports_changed_fields_only():
+    state = DeviceState("d0", device_name="插座", value1=0, state=True)
+    assert state.update(device_name="插座", value1=0, state=True) == set()
+    assert state.update(device_name="插座", value1=1, state=False) == {"value1", "state"}
+    assert (state.value1, state.state) == (1, False)
+    assert state.update(online=0, value2=0) == {"online"}
+
+
+def test_derived_fields_follow_raw_values():
+    state = DeviceState("d0", model=AC_MODEL, value4=(2600 << 16) | 2500)
+    assert (state.target_temperature, state.current_temperature) == (26, 25)
+    assert state.update(value4=(2400 << 16) | 2300) == {"value4"}
+    assert (state.target_temperature, state.current_temperature) == (24, 23)
+    assert state.update(value2=4) == {"value2"}
+    assert state.mode == 4
+    ventilation = DeviceState("d1", model=VENTILATION_MODEL, value1=50)
+    assert ventilation.fan_speed == "停"
+    ventilation.update(value1=0)
+    assert ventilation.fan_speed == "慢"
+
+
+def test_poll_updates_existing_records_in_place():
+    registry = DeviceRegistry()
+    registry.replace_devices([
+        {"deviceId": "d0", "uid": "u0", "deviceName": "插座0"},
+        {"deviceId": "d1", "uid": "u1", "deviceName": "插座1"},
+    ])
+    registry.replace_states([{"deviceId": "d0", "value1": 0}])
+    client = HttpsClient(None, "user", "password", registry=registry)
+    client.session_id = "s" * 32
+
+    async def fetch_device_state():
+        return True
+
+    client.fetch_device_state = fetch_device_state
+
+    first = asyncio.run(client.update_state_list())
+    assert first["d0"].state is True
+    assert first["d1"].device_name == "插座1"
+
+    registry.upsert_state({"deviceId": "d0", "value1": 1})
+    second = asyncio.run(client.update_state_list(first))
+    # 已有记录原地更新，实体持有的引用随之变化
+    assert second["d0"] is first["d0"]
+    assert second["d1"] is first["d1"]
+    assert first["d0"].state is False
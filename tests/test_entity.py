@@ -0,0 +1,96 @@
+"""实体只在自身的状态指纹变化时写入状态"""
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from ORVIBO_Device_Control.coordinator import OrviboSwitchCoordinator
+from ORVIBO_Device_Control.device_state import DeviceState
+from ORVIBO_Device_Control.switch import WifiSwitchDevice
+
+SWITCH_MODEL = "56d124ba95474fc98aafdb830e933789"
+
+
+@pytest.fixture
+def run(tmp_path):
+    """在带有HomeAssistant实例的事件循环中运行测试协程"""
+    def _run(test):
+        async def main():
+            hass = HomeAssistant(str(tmp_path))
+            try:
+                await test(hass)
+            finally:
+                await hass.async_stop(force=True)
+        asyncio.run(main())
+    return _run
+
+
+async def _setup(hass, batch_device_updates=True):
+    coordinator = OrviboSwitchCoordinator(hass, "user", "password", batch_device_updates=batch_device_updates)
+    entities = {}
+    for device_id in ("d0", "d1"):
+        coordinator.device_states[device_id] = DeviceState(
+            device_id=device_id, device_name=device_id, model=SWITCH_MODEL, online=1, device_uid="a0b1c2d3e4f5")
+        entity = WifiSwitchDevice(coordinator, device_id)
+        entity.hass = hass
+        entity.async_write_ha_state = Mock()
+        await entity.async_added_to_hass()
+        entities[device_id] = entity
+    return coordinator, entities
+
+
+async def _settle():
+    # 合并的设备通知在本轮事件循环结束时派发
+    await asyncio.sleep(0)
+
+
+def test_unchanged_fingerprint_does_not_write(run):
+    async def test(hass):
+        coordinator, entities = await _setup(hass)
+        coordinator.async_set_updated_data(coordinator.device_states)
+        coordinator.async_notify_device("d0")
+        coordinator._apply_local_state("d1", online=1)
+        await _settle()
+        for entity in entities.values():
+            entity.async_write_ha_state.assert_not_called()
+    run(test)
+
+
+@pytest.mark.parametrize("batch_device_updates", [True, False])
+def test_changed_fingerprint_writes_once(run, batch_device_updates):
+    async def test(hass):
+        coordinator, entities = await _setup(hass, batch_device_updates)
+        # SSL推送：同一轮内多次通知合并为一次写入
+        coordinator._apply_local_state("d0", state=True)
+        coordinator.async_notify_device("d0")
+        await _settle()
+        assert entities["d0"].async_write_ha_state.call_count == 1
+
+        # HTTPS轮询带来的变化同样只写一次
+        coordinator.device_states["d0"].update(online=0)
+        coordinator.async_set_updated_data(coordinator.device_states)
+        await _settle()
+        assert entities["d0"].async_write_ha_state.call_count == 2
+    run(test)
+
+
+def test_update_for_other_device_does_not_touch_entity(run):
+    async def test(hass):
+        coordinator, entities = await _setup(hass)
+        other = entities["d1"]
+        other._fingerprint = Mock(wraps=other._fingerprint)
+        # SSL推送只通知订阅了该设备的实体，d1连指纹都不会计算
+        coordinator._apply_local_state("d0", state=True)
+        await _settle()
+        assert entities["d0"].async_write_ha_state.call_count == 1
+        other._fingerprint.assert_not_called()
+        other.async_write_ha_state.assert_not_called()
+
+        # 轮询会通知全部实体，但d1的指纹不变，仍不写入
+        coordinator.device_states["d0"].update(state=False)
+        coordinator.async_set_updated_data(coordinator.device_states)
+        await _settle()
+        assert entities["d0"].async_write_ha_state.call_count == 2
+        other.async_write_ha_state.assert_not_called()
+    run(test)
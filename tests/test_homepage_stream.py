@@ -0,0 +1,98 @@
+"""首页数据增量解析：任意分块的结果须与整体解析一致，不需要的字段只扫描、不缓存"""
+import json
+import time
+
+import pytest
+
+from ORVIBO_Device_Control.json_codec import HomepageStreamParser
+
+TRICKY = "括号]}{[ 引号\" 反斜杠\\ 转义\\\" \\u0041 换行\n"
+
+RESPONSE = {
+    "status": 0,
+    "message": TRICKY,
+    "data": {
+        "ignored": {"nested": [[{"a": TRICKY}], {"b": [1, -2.5e3, True, None]}], "s": "]]}}"},
+        "deviceStatus": [
+            {"deviceId": f"{i:032x}", "value1": i % 2, "value4": -i, "online": True, "extra": [TRICKY]}
+            for i in range(5)
+        ],
+        "number": -12.5e-3,
+        "literal": False,
+        "device": [{"deviceId": "d0", "deviceName": TRICKY, "roomId": None, "unused": {"x": "}"}}],
+        "room": [],
+        "floor": [{"floorId": "f"}],
+        "familyConfig": [1, "two", [3]],
+        "tail": "结尾\\",
+    },
+    "serial": 42,
+}
+
+
+def _expected(response):
+    parser = HomepageStreamParser()
+    rows = []
+    for section in ("deviceStatus", "device", "room", "floor", "familyConfig"):
+        keep = parser.fields.get(section)
+        for row in response["data"][section]:
+            if keep and isinstance(row, dict):
+                row = {key: row[key] for key in keep if key in row}
+            rows.append((section, row))
+    top = {key: value for key, value in response.items() if key != "data"}
+    return rows, top
+
+
+def _parse(body: bytes, size: int):
+    parser = HomepageStreamParser()
+    rows = []
+    for start in range(0, len(body), size):
+        rows.extend(parser.feed(body[start:start + size]))
+    rows.extend(parser.close())
+    return parser, rows
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 1 << 20])
+def test_any_chunking_matches_whole_parse(size, indent):
+    body = json.dumps(RESPONSE, ensure_ascii=False, indent=indent).encode("utf-8")
+    parser, rows = _parse(body, size)
+    expected_rows, expected_top = _expected(RESPONSE)
+    assert rows == expected_rows
+    assert parser.top == expected_top
+    assert parser.has_data
+
+
+@pytest.mark.parametrize("body", [
+    b'{"status":0,"data":{"ignored":[1,2',
+    b'{"status":0,"data":{"ignored":"abc\\',
+    b'{"status":0,"data":{"device":[{"deviceId":"d0"}',
+    b'{"status":0',
+])
+def test_truncated_response_raises(body):
+    parser = HomepageStreamParser()
+    parser.feed(body)
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_skipped_section_is_linear_and_not_buffered():
+    """5MB的不需要字段逐块扫描丢弃：缓冲不随字段变大"""
+    filler = {"list": [{"name": f"名称{i}", "note": "a\\\"b]}" * 4, "n": i} for i in range(70000)]}
+    body = json.dumps({"status": 0, "data": {"unused": filler, "room": [{"roomId": "r"}]}},
+                      ensure_ascii=False).encode("utf-8")
+    assert len(body) > 5_000_000
+
+    parser = HomepageStreamParser()
+    rows = []
+    largest = 0
+    started = time.perf_counter()
+    for start in range(0, len(body), 16384):
+        rows.extend(parser.feed(body[start:start + 16384]))
+        largest = max(largest, len(parser._buf))
+    rows.extend(parser.close())
+
+    assert rows == [("room", {"roomId": "r"})]
+    # 缓冲中最多是当前块加上一个未扫描完的转义符
+    assert largest <= 16384 + 1
+    # 逐块重新解析整个字段时约需1.6秒
+    assert time.perf_counter() - started < 1.5
@@ -0,0 +1,81 @@
+"""流式拉取首页数据：与整包请求一样对502/503/504和网络错误重试"""
+import asyncio
+import json
+
+import aiohttp
+from aiohttp import web
+
+from ORVIBO_Device_Control import https_client
+from ORVIBO_Device_Control.packet import HomemateJsonData
+from ORVIBO_Device_Control.registry import DeviceRegistry
+
+BODY = json.dumps({
+    "status": 0,
+    "data": {
+        "device": [{"deviceId": "d0", "uid": "u0", "deviceName": "开关", "model": "m", "roomId": "r0"}],
+        "deviceStatus": [{"deviceId": "d0", "value1": 0}],
+        "room": [{"roomId": "r0", "roomName": "客厅"}],
+    },
+}, ensure_ascii=False).encode("utf-8")
+
+
+async def _stream(responses):
+    """依次按responses中的方式应答，返回(设备数量或异常, 请求次数, 注册表)"""
+    requests = []
+
+    async def handler(request):
+        mode = responses[min(len(requests), len(responses) - 1)]
+        requests.append(mode)
+        if mode == "ok":
+            return web.Response(body=BODY)
+        if mode == "cut":
+            # 只发出一半数据后断开连接
+            resp = web.StreamResponse(headers={"Content-Length": str(len(BODY))})
+            await resp.prepare(request)
+            await resp.write(BODY[:len(BODY) // 2])
+            request.transport.close()
+            return resp
+        return web.Response(status=int(mode))
+
+    app = web.Application()
+    app.router.add_post("/homepage", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    registry = DeviceRegistry()
+    async with aiohttp.ClientSession() as session:
+        client = https_client.HttpsClient(None, "user", "password", registry=registry, session=session)
+        original = HomemateJsonData.get_homepage_data
+        HomemateJsonData.get_homepage_data = classmethod(
+            lambda cls, **kwargs: {"url": f"http://127.0.0.1:{port}/homepage", "data": "{}"})
+        try:
+            result = await client._stream_https_homepage("family", "user", "token")
+        except Exception as e:
+            result = e
+        finally:
+            HomemateJsonData.get_homepage_data = original
+    await runner.cleanup()
+    return result, requests, registry
+
+
+def test_retries_server_errors_and_broken_streams():
+    result, requests, registry = asyncio.run(_stream(["503", "cut", "ok"]))
+    assert result == 1
+    assert requests == ["503", "cut", "ok"]
+    assert [device["deviceId"] for device in registry.devices] == ["d0"]
+    assert registry.rooms == [{"roomId": "r0", "roomName": "客厅"}]
+
+
+def test_gives_up_after_three_attempts():
+    result, requests, _registry = asyncio.run(_stream(["502"]))
+    assert isinstance(result, aiohttp.ClientResponseError) and result.status == 502
+    assert len(requests) == 3
+
+
+def test_does_not_retry_client_errors():
+    result, requests, _registry = asyncio.run(_stream(["404", "ok"]))
+    assert isinstance(result, aiohttp.ClientResponseError) and result.status == 404
+    assert requests == ["404"]
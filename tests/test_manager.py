@@ -0,0 +1,62 @@
+"""多账号：各配置项共享同一个HTTPS连接池，卸载时互不影响"""
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+from homeassistant.core import HomeAssistant
+
+import ORVIBO_Device_Control as component
+from ORVIBO_Device_Control.const import CONF_PACKET_LOG
+from ORVIBO_Device_Control.coordinator import OrviboSwitchCoordinator
+from ORVIBO_Device_Control.manager import OrviboAccountManager
+
+
+def _entry(entry_id):
+    entry = Mock(entry_id=entry_id, options={CONF_PACKET_LOG: True})
+    entry.data = {"userName": f"user-{entry_id}", "passWord": "password", "userId": entry_id}
+    return entry
+
+
+def test_accounts_share_pool_and_unload_independently(tmp_path, monkeypatch):
+    # 首次刷新不访问网络
+    monkeypatch.setattr(OrviboSwitchCoordinator, "async_config_entry_first_refresh", AsyncMock())
+
+    async def main():
+        hass = HomeAssistant(str(tmp_path))
+        hass.config_entries = Mock(
+            async_forward_entry_setups=AsyncMock(return_value=True),
+            async_unload_platforms=AsyncMock(return_value=True),
+        )
+        try:
+            entries = [_entry("a"), _entry("b")]
+            for entry in entries:
+                assert await component.async_setup_entry(hass, entry)
+
+            manager = OrviboAccountManager.get(hass)
+            data = [manager.get_entry(entry.entry_id) for entry in entries]
+            coordinators = [d["coordinator"] for d in data]
+            for coordinator in coordinators:
+                coordinator.async_cleanup = AsyncMock()
+            session = coordinators[0].https_client.session
+            assert session is coordinators[1].https_client.session
+            assert session is await manager.async_get_session()
+            # 每个账号独立的设备注册表与数据包日志
+            assert data[0]["registry"] is not data[1]["registry"]
+            assert data[0]["packet_log"].logfile != data[1]["packet_log"].logfile
+
+            assert await component.async_unload_entry(hass, entries[0])
+            coordinators[0].async_cleanup.assert_awaited_once()
+            coordinators[1].async_cleanup.assert_not_called()
+            assert data[0]["packet_log"].logfile is None
+            assert data[1]["packet_log"].logfile is not None
+            assert list(manager.entries) == ["b"]
+            assert not session.closed
+
+            # 最后一个账号卸载时关闭共享会话
+            assert await component.async_unload_entry(hass, entries[1])
+            coordinators[1].async_cleanup.assert_awaited_once()
+            assert data[1]["packet_log"].logfile is None
+            assert session.closed
+        finally:
+            await hass.async_stop(force=True)
+
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+"""多账号：数据包日志与加解密器缓存按账号隔离"""
+from ORVIBO_Device_Control.packet import HomemateJsonData, HomematePacket, PacketLog
+
+KEY = b"0123456789abcdef"
+SESSION_ID = "s" * 32
+
+
+def _close(log: PacketLog):
+    executor = log._executor
+    log.close()
+    executor.shutdown(wait=True)
+
+
+def test_each_account_writes_its_own_log(tmp_path):
+    first = PacketLog(str(tmp_path / "orvibo_packets_a.jsonl"))
+    second = PacketLog(str(tmp_path / "orvibo_packets_b.jsonl"))
+    first.record(b"\x01", PacketLog.OUT, {SESSION_ID: KEY}, "user_a")
+    second.record(b"\x02", PacketLog.IN, None, "user_b")
+    second.record(b"\x03", PacketLog.OUT, None, "user_b")
+    _close(first)
+
+    # 关闭一个账号的日志不影响另一个账号继续记录
+    second.record(b"\x04", PacketLog.IN, None, "user_b")
+    _close(second)
+    second.record(b"\x05", PacketLog.IN, None, "user_b")
+
+    entries = list(PacketLog.read(str(tmp_path / "orvibo_packets_a.jsonl")))
+    assert [(e["client"], e["data"], e["keys"]) for e in entries] == [("user_a", b"\x01", {SESSION_ID: KEY})]
+    entries = list(PacketLog.read(str(tmp_path / "orvibo_packets_b.jsonl")))
+    assert [(e["client"], e["data"]) for e in entries] == [
+        ("user_b", b"\x02"), ("user_b", b"\x03"), ("user_b", b"\x04")]
+
+
+def test_codecs_are_cached_in_the_given_dict():
+    HomematePacket._codecs.pop(KEY, None)
+    first, second = {}, {}
+    frame = HomematePacket.build_packet(
+        HomematePacket.DK, KEY, SESSION_ID.encode(), HomemateJsonData.ssl_heartbeat(), codecs=first)
+    packet = HomematePacket(frame, {SESSION_ID: KEY}, second)
+
+    assert packet.json_payload["cmd"] == HomemateJsonData.ssl_heartbeat()["cmd"]
+    assert list(first) == [KEY] and list(second) == [KEY]
+    assert first[KEY] is not second[KEY]
+    # 传入了缓存的调用方不会写入进程级的默认缓存
+    assert KEY not in HomematePacket._codecs
@@ -0,0 +1,128 @@
+"""控制类指令的payload模板：拼接出的字节须与 json.dumps(separators=(',', ':')) 完全一致
+
+模板payload只读，任何修改方式（包括直接调用dict的方法）都会失败；复制出的dict可以修改，按完整序列化发送。
+"""
+import json
+
+import pytest
+
+from ORVIBO_Device_Control.packet import AesEcbCodec, HomemateJsonData, HomematePacket
+
+KEY = b"0123456789abcdef"
+SESSION_ID = b"s" * 32
+
+USERNAME = "用户@example.com"
+DEVICE_ID = "0123456789abcdef0123456789abcdef"
+DEVICE_MAC = "a0b1c2d3e4f5"
+
+BUILDERS = {
+    "switch_control_on": lambda: HomemateJsonData.ssl_switch_control(USERNAME, DEVICE_ID, DEVICE_MAC, 0),
+    "switch_control_off": lambda: HomemateJsonData.ssl_switch_control(
+        "user", DEVICE_ID, DEVICE_MAC, 1, 3, 1, (2600 << 16) | 2500),
+    "state_update": lambda: HomemateJsonData.ssl_air_conditioner_state_update(
+        USERNAME, DEVICE_ID, DEVICE_MAC, 0, 3, 1, (2600 << 16) | 2500),
+    "ventilation_state_update": lambda: HomemateJsonData.ssl_ventilation_state_update(
+        USERNAME, DEVICE_ID, DEVICE_MAC, 100),
+    "heartbeat": HomemateJsonData.ssl_heartbeat,
+}
+
+# dict的全部修改方式：改变化字段、改常量字段、增删字段
+MUTATIONS = {
+    "set_variable": lambda p: p.__setitem__("serial", 42),
+    "set_constant": lambda p: p.__setitem__("clientType", "客户端\"\\\n"),
+    "set_new_key": lambda p: p.__setitem__("extra", [1, None, True]),
+    "delete": lambda p: p.__delitem__("uniSerial"),
+    "update": lambda p: p.update(serverRecord=True),
+    "pop": lambda p: p.pop("ver"),
+    "setdefault": lambda p: p.setdefault("debugInfo", {"k": 1.5}),
+    "setdefault_new_key": lambda p: p.setdefault("extra", 1),
+    "popitem": lambda p: p.popitem(),
+    "ior": lambda p: p.__ior__({"cmd": 0}),
+    "clear": lambda p: p.clear(),
+}
+# 绕过子类、直接调用dict方法的修改方式
+DICT_MUTATIONS = {
+    "dict.__setitem__": lambda p: dict.__setitem__(p, "serial", 42),
+    "dict.update": lambda p: dict.update(p, serverRecord=True),
+    "dict.setdefault": lambda p: dict.setdefault(p, "extra", 1),
+    "dict.__ior__": lambda p: dict.__ior__(p, {"cmd": 0}),
+    "dict.pop": lambda p: dict.pop(p, "ver"),
+    "dict.clear": lambda p: dict.clear(p),
+}
+
+
+def _dumps(payload) -> bytes:
+    return json.dumps(dict(payload), separators=(',', ':')).encode('utf-8')
+
+
+def _plaintext(payload) -> bytes:
+    """经build_packet加密后再解密出的明文"""
+    frame = HomematePacket.build_packet(HomematePacket.DK, KEY, SESSION_ID, payload)
+    return AesEcbCodec(KEY).decrypt(frame[HomematePacket.HEADER_SIZE:])
+
+
+@pytest.mark.parametrize("builder", BUILDERS.values(), ids=BUILDERS.keys())
+def test_template_matches_json_dumps(builder):
+    payload = builder()
+    assert payload.encode() == _dumps(payload)
+    assert _plaintext(payload) == _dumps(payload)
+
+
+@pytest.mark.parametrize("mutate", {**MUTATIONS, **DICT_MUTATIONS}.values(),
+                         ids={**MUTATIONS, **DICT_MUTATIONS}.keys())
+@pytest.mark.parametrize("builder", BUILDERS.values(), ids=BUILDERS.keys())
+def test_templated_payload_is_read_only(builder, mutate):
+    payload = builder()
+    expected = _dumps(payload)
+    with pytest.raises((TypeError, AttributeError)):
+        mutate(payload)
+    assert _plaintext(payload) == expected
+
+
+@pytest.mark.parametrize("mutate", MUTATIONS.values(), ids=MUTATIONS.keys())
+@pytest.mark.parametrize("builder", BUILDERS.values(), ids=BUILDERS.keys())
+def test_modified_copy_is_fully_serialized(builder, mutate):
+    payload = builder().copy()
+    mutate(payload)
+    assert type(payload) is dict
+    assert _plaintext(payload) == _dumps(payload)
+
+
+@pytest.mark.parametrize("value", [
+    "", "中文", "quote\"back\\slash\ttab", " ", -1, 2 ** 40, True, None, 1.5, [1, "a"], {"a": 0},
+])
+def test_variable_value_types(value):
+    """变化字段可以是任意可序列化的值"""
+    payload = HomemateJsonData.SWITCH_CONTROL_TEMPLATE.build(
+        uid=value, userName=value, deviceId=value, order=value, value1=value, value2=value,
+        value3=value, value4=value, serial=value, uniSerial=value)
+    assert _plaintext(payload) == _dumps(payload)
+
+
+def test_extra_and_missing_fields_fall_back():
+    """build时字段与模板不符（多出或缺少变化字段）也按完整序列化"""
+    extra = HomemateJsonData.HEARTBEAT_TEMPLATE.build(serial=1, uniSerial=2, extra="x")
+    assert list(extra)[-1] == "extra"
+    assert _plaintext(extra) == _dumps(extra)
+
+    missing = HomemateJsonData.HEARTBEAT_TEMPLATE.build(serial=1)
+    assert missing["uniSerial"] is None
+    assert _plaintext(missing) == _dumps(missing)
+
+
+def test_builders_do_not_share_state():
+    """模板的字段不会被某次生成的payload的副本修改"""
+    first = HomemateJsonData.ssl_heartbeat().copy()
+    first["ver"] = "changed"
+    second = HomemateJsonData.ssl_heartbeat()
+    assert second["ver"] != "changed"
+    assert _plaintext(second) == _dumps(second)
+
+
+def test_templated_payload_reads_like_a_dict():
+    payload = HomemateJsonData.ssl_heartbeat()
+    assert payload == dict(payload)
+    assert payload["cmd"] == payload.get("cmd") and "serial" in payload
+    assert payload.get("missing", 1) == 1
+    assert list(payload) == list(HomemateJsonData.HEARTBEAT_TEMPLATE.fields)
+    assert repr(payload) == repr(dict(payload))
@@ -0,0 +1,95 @@
+"""推送优先：SSL推送链路健康时HTTPS轮询放宽为一致性校验，链路中断时恢复原轮询间隔"""
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from ORVIBO_Device_Control.connection import ConnectionState
+from ORVIBO_Device_Control.const import PUSH_CONSISTENCY_INTERVAL, UPDATE_INTERVAL
+from ORVIBO_Device_Control.coordinator import OrviboSwitchCoordinator
+from ORVIBO_Device_Control.ssl_client import SSLClient
+
+
+@pytest.fixture
+def run(tmp_path):
+    """在带有HomeAssistant实例的事件循环中运行测试协程"""
+    def _run(test):
+        async def main():
+            hass = HomeAssistant(str(tmp_path))
+            try:
+                await test(hass)
+            finally:
+                await hass.async_stop(force=True)
+        asyncio.run(main())
+    return _run
+
+
+def _coordinator(hass, push_first=True):
+    coordinator = OrviboSwitchCoordinator(hass, "user", "password", push_first=push_first)
+    coordinator.async_request_refresh = AsyncMock()
+    return coordinator
+
+
+def test_interval_follows_link_health(run):
+    async def test(hass):
+        coordinator = _coordinator(hass)
+        assert coordinator.update_interval == UPDATE_INTERVAL
+        # 首次拉取完成前只调整间隔，不额外刷新
+        coordinator._on_link_change(True)
+        assert coordinator.update_interval == PUSH_CONSISTENCY_INTERVAL
+        await asyncio.sleep(0)
+        coordinator.async_request_refresh.assert_not_called()
+
+        coordinator.data = {}
+        coordinator._on_link_change(False)
+        assert coordinator.update_interval == UPDATE_INTERVAL
+        await asyncio.sleep(0)
+        # 链路中断后立即拉取一次，补上可能丢失的推送
+        assert coordinator.async_request_refresh.await_count == 1
+
+        coordinator._on_link_change(True)
+        assert coordinator.update_interval == PUSH_CONSISTENCY_INTERVAL
+        await asyncio.sleep(0)
+        assert coordinator.async_request_refresh.await_count == 2
+    run(test)
+
+
+def test_polling_unchanged_when_push_first_disabled(run):
+    async def test(hass):
+        coordinator = _coordinator(hass, push_first=False)
+        coordinator.data = {}
+        coordinator._on_link_change(True)
+        await asyncio.sleep(0)
+        assert coordinator.update_interval == UPDATE_INTERVAL
+        coordinator.async_request_refresh.assert_not_called()
+    run(test)
+
+
+def test_ssl_client_reports_link_health_transitions():
+    on_link_change = Mock()
+    client = SSLClient(None, "localhost", 0, "user", "password", "family",
+                       lambda session_id: None, lambda *args: None, on_link_change=on_link_change)
+    client._set_state(ConnectionState.CONNECTING)
+    on_link_change.assert_not_called()
+    client._set_state(ConnectionState.READY)
+    on_link_change.assert_called_once_with(True)
+
+    # 心跳丢失视为不健康，恢复应答后重新报告健康
+    client._heartbeat.on_miss()
+    client._notify_link()
+    client._notify_link()
+    assert on_link_change.call_args_list[1:] == [((False,),)]
+    client._heartbeat.on_ack(0.01)
+    client._notify_link()
+    assert on_link_change.call_args.args == (True,)
+
+    client._set_state(ConnectionState.BACKOFF)
+    assert on_link_change.call_args.args == (False,)
+    assert on_link_change.call_count == 4
+
+    # 主动断开时不再通知
+    client._set_state(ConnectionState.READY)
+    client._closing = True
+    client._set_state(ConnectionState.DISCONNECTED)
+    assert on_link_change.call_count == 5
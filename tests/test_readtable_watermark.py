@@ -0,0 +1,87 @@
+"""readtable增量拉取：水位只按服务器时间推进并回退重叠量，重叠区间内重复返回的记录按设备去重"""
+import asyncio
+
+from ORVIBO_Device_Control.const import READTABLE_WATERMARK_OVERLAP
+from ORVIBO_Device_Control.https_client import HttpsClient
+from ORVIBO_Device_Control.registry import DeviceRegistry
+
+T = 1700000000
+
+
+def test_local_clock_skew_does_not_advance_watermark():
+    # 本地时钟超前一小时，且有记录未携带updateTime：水位仍按服务器时间计算
+    states = [{"deviceId": "d0", "updateTime": T}, {"deviceId": "d1"}]
+    assert HttpsClient._get_watermark(states, 0, T + 3600) == T - READTABLE_WATERMARK_OVERLAP
+    # 没有任何记录携带updateTime时保持原水位，不采用本地时间
+    assert HttpsClient._get_watermark([{"deviceId": "d1"}], T - 100, T + 3600) == T - 100
+    # 尚无水位时才退回到本地请求时间（同样回退重叠量）
+    assert HttpsClient._get_watermark([{"deviceId": "d1"}], 0, T) == T - READTABLE_WATERMARK_OVERLAP
+    # 水位不后退
+    assert HttpsClient._get_watermark([{"deviceId": "d0", "updateTime": T - 100}], T, T) == T
+
+
+def test_same_second_updates_are_fetched_again():
+    watermark = HttpsClient._get_watermark([{"deviceId": "d0", "updateTime": T}], 0, T)
+    # 下一次从水位之后拉取，仍覆盖与最新记录同一秒的更新
+    assert watermark < T
+
+
+def test_millisecond_update_time_is_converted_to_seconds():
+    assert HttpsClient._update_time({"updateTime": T * 1000 + 999}) == T
+    assert HttpsClient._update_time({"updateTime": T}) == T
+    assert HttpsClient._update_time({"updateTime": "1700000000"}) is None
+    states = [{"deviceId": "d0", "updateTime": (T + 2) * 1000}, {"deviceId": "d1", "updateTime": T}]
+    assert HttpsClient._get_watermark(states, 0, T) == T + 2 - READTABLE_WATERMARK_OVERLAP
+
+
+def test_dedupe_keeps_newest_row_per_device():
+    applied = {}
+    rows = [
+        {"deviceId": "d0", "updateTime": T, "value1": 0},
+        {"deviceId": "d0", "updateTime": T + 1, "value1": 1},
+        {"deviceId": "d0", "updateTime": T - 1, "value1": 0},
+        {"deviceId": "d1"},
+    ]
+    assert HttpsClient._dedupe_states(rows, applied) == [rows[1], rows[3]]
+    assert applied == {"d0": (T + 1, rows[1])}
+
+    # 重叠区间重复返回：完全相同或更旧的行丢弃，同一秒内内容不同的行保留
+    again = {"deviceId": "d0", "updateTime": T + 1, "value1": 1}
+    older = {"deviceId": "d0", "updateTime": T, "value1": 0}
+    assert HttpsClient._dedupe_states([again], applied) == []
+    assert HttpsClient._dedupe_states([older], applied) == []
+    same_second = {"deviceId": "d0", "updateTime": T + 1, "value1": 0}
+    assert HttpsClient._dedupe_states([same_second], applied) == [same_second]
+
+
+def test_incremental_poll_does_not_apply_stale_overlap_rows():
+    registry = DeviceRegistry()
+    registry.replace_devices([{"deviceId": "d0", "uid": "u0"}])
+    client = HttpsClient(None, "user", "password", registry=registry)
+    client.session_id = "s" * 32
+    client.family_id = "family"
+    responses = [
+        [{"deviceId": "d0", "updateTime": T, "value1": 0}],
+        [{"deviceId": "d0", "updateTime": T + 10, "value1": 1}],
+        # 水位回退后，重叠区间内返回了更旧的一行
+        [{"deviceId": "d0", "updateTime": T + 8, "value1": 0}],
+    ]
+    requested = []
+
+    async def ensure_login():
+        return True
+
+    async def fetch(*args):
+        requested.append(args[-1])
+        return {"deviceStatus": responses[len(requested) - 1]}
+
+    client.ensure_login = ensure_login
+    client._fetch_device_status = fetch
+
+    async def main():
+        for _ in responses:
+            assert await client.fetch_device_state()
+
+    asyncio.run(main())
+    assert requested == [0, T - READTABLE_WATERMARK_OVERLAP, T + 10 - READTABLE_WATERMARK_OVERLAP]
+    assert registry.get_state("d0")["value1"] == 1
@@ -0,0 +1,104 @@
+"""SSL重连：去相关抖动退避、熔断，以及唯一的连接管理任务"""
+import asyncio
+from unittest.mock import Mock
+
+from ORVIBO_Device_Control import connection
+from ORVIBO_Device_Control.connection import CircuitBreaker, ConnectionState, ReconnectBackoff
+from ORVIBO_Device_Control.ssl_client import SSLClient
+
+
+def test_backoff_is_jittered_and_capped():
+    backoff = ReconnectBackoff(base=1, cap=30)
+    delays = [backoff.next() for _ in range(200)]
+    assert all(1 <= delay <= 30 for delay in delays)
+    # 每次最多增长为上一次的3倍
+    assert delays[0] <= 3
+    assert all(b <= max(a * 3, 1) for a, b in zip(delays, delays[1:]))
+    assert len(set(delays)) > 1
+    backoff.reset()
+    assert backoff.next() <= 3
+
+
+def test_breaker_opens_after_threshold_and_half_opens(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(connection.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(threshold=3, open_time=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open and breaker.remaining == 60
+
+    # 到达半开时刻允许一次尝试，失败则立即重新打开
+    now[0] += 60
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+
+    now[0] += 60
+    breaker.record_success()
+    assert not breaker.is_open and breaker.failures == 0
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+def _client(establish):
+    hass = Mock()
+    hass.async_create_background_task = lambda coro, name=None: asyncio.get_running_loop().create_task(coro)
+    client = SSLClient(hass, "localhost", 0, "user", "password", "family",
+                       lambda session_id: None, lambda *args: None, retry_interval=0.01)
+    client._breaker = CircuitBreaker(threshold=3, open_time=60)
+
+    async def attempt():
+        # 与_establish相同：每次尝试清除断开事件并进入CONNECTING
+        client._lost_event.clear()
+        client._set_state(ConnectionState.CONNECTING)
+        return await establish()
+
+    client._establish = attempt
+    client._start_heartbeat_task = lambda: None
+    return client
+
+
+def test_failures_back_off_then_open_the_breaker():
+    async def main():
+        attempts = []
+
+        async def establish():
+            attempts.append(client.state)
+            return False
+
+        client = _client(establish)
+        # 熔断打开后connect_and_login返回False，指令不再等待重连
+        assert not await asyncio.wait_for(client.connect_and_login(), 1)
+        assert len(attempts) == 3
+        assert client.state is ConnectionState.BACKOFF
+        assert not await client.wait_ready()
+        await client.disconnect()
+        assert client.state is ConnectionState.DISCONNECTED
+    asyncio.run(main())
+
+
+def test_concurrent_callers_share_one_connection_manager():
+    async def main():
+        attempts = []
+
+        async def establish():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            return True
+
+        client = _client(establish)
+        results = await asyncio.gather(*(client.wait_ready() for _ in range(10)), client.connect_and_login())
+        assert all(results)
+        assert len(attempts) == 1
+
+        # 连接断开后由同一任务退避重连
+        run_task = client._run_task
+        client._connection_lost("连接被重置")
+        assert client.state is ConnectionState.BACKOFF
+        assert await asyncio.wait_for(client.wait_ready(), 1)
+        assert client._run_task is run_task
+        assert len(attempts) == 2
+        await client.disconnect()
+    asyncio.run(main())
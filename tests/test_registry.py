@@ -0,0 +1,68 @@
+"""设备注册表：deviceId/uid/roomId索引随设备行的增删改增量维护，hass.py访问函数作用于注册表"""
+from ORVIBO_Device_Control import hass as accessors
+from ORVIBO_Device_Control.registry import DeviceRegistry
+
+
+def _registry():
+    registry = DeviceRegistry()
+    accessors.set_current_devices(registry, [
+        {"deviceId": "d0", "uid": "u0", "roomId": "r0", "deviceName": "插座0", "model": "m0"},
+        {"deviceId": "d1", "uid": "u1", "roomId": "r0"},
+        {"deviceId": "d2", "uid": "u2", "roomId": "r1"},
+    ])
+    accessors.set_current_state(registry, [{"deviceId": "d0", "value1": 0}, {"deviceId": "d1", "value1": 1}])
+    return registry
+
+
+def test_lookups_by_device_uid_and_room():
+    registry = _registry()
+    assert accessors.get_id_by_uid(registry, "u1") == "d1"
+    assert accessors.get_uid_by_id(registry, "d0") == "u0"
+    assert accessors.get_name_by_id(registry, "d0") == "插座0"
+    assert accessors.get_name_by_uid(registry, "u0") == "插座0"
+    assert accessors.get_model_by_id(registry, "d0") == "m0"
+    assert registry.get_device_ids_in_room("r0") == {"d0", "d1"}
+    # 不存在的设备返回与原列表查找相同的默认值
+    assert accessors.get_id_by_uid(registry, "missing") == ""
+    assert accessors.get_uid_by_id(registry, "missing") == ""
+    assert accessors.get_state_by_id(registry, "d2") == 1
+
+
+def test_upsert_moves_indexes():
+    registry = _registry()
+    assert registry.upsert_device({"deviceId": "d0", "uid": "u9", "roomId": "r1"})
+    assert registry.get_id_by_uid("u9") == "d0"
+    assert registry.get_id_by_uid("u0") == ""
+    assert registry.get_device_ids_in_room("r0") == {"d1"}
+    assert registry.get_device_ids_in_room("r1") == {"d0", "d2"}
+
+
+def test_deleted_row_does_not_replace_live_device():
+    registry = _registry()
+    assert not registry.upsert_device({"deviceId": "d0", "uid": "u0", "delFlag": 1})
+    assert registry.get_device("d0")["roomId"] == "r0"
+    # 同一次设备列表中优先保留delFlag=0的记录（与deduplicate_by_key一致）
+    rows = [{"deviceId": "d5", "uid": "old", "delFlag": 1}, {"deviceId": "d5", "uid": "new", "delFlag": 0}]
+    registry.replace_devices(rows)
+    assert accessors.deduplicate_by_key(rows, "deviceId") == [rows[1]]
+    assert registry.devices == [rows[1]]
+
+
+def test_replace_devices_drops_removed_devices_and_their_states():
+    registry = _registry()
+    accessors.set_current_devices(registry, [{"deviceId": "d1", "uid": "u1", "roomId": "r2"}])
+    assert not accessors.has_device(registry, "d0")
+    assert registry.get_state("d0") is None
+    assert registry.get_id_by_uid("u0") == ""
+    assert registry.get_device_ids_in_room("r0") == set()
+    assert registry.get_device_ids_in_room("r2") == {"d1"}
+
+
+def test_states_only_for_known_devices():
+    registry = _registry()
+    accessors.update_current_state(registry, [{"deviceId": "d2", "value1": 0}, {"deviceId": "ghost", "value1": 0}])
+    assert accessors.get_state_by_id(registry, "d2") == 0
+    assert registry.get_state("ghost") is None
+    assert accessors.set_state_by_uid(registry, "u1", 0)
+    assert accessors.get_state_by_id(registry, "d1") == 0
+    assert not accessors.set_state_by_id(registry, "ghost", 0)
@@ -0,0 +1,72 @@
+"""流式全量同步：逐行暂存，完整结束时一次性替换；挂起的状态行有上限，丢弃的行计数并记录日志"""
+import logging
+
+from ORVIBO_Device_Control import registry as registry_module
+from ORVIBO_Device_Control.registry import DeviceRegistry
+
+
+def _registry():
+    registry = DeviceRegistry()
+    registry.replace_devices([{"deviceId": "old", "uid": "u-old", "roomId": "r0"}])
+    registry.replace_states([{"deviceId": "old", "value1": 0}])
+    return registry
+
+
+def test_rows_are_invisible_until_sync_completes():
+    registry = _registry()
+    registry.begin_sync()
+    registry.sync_state({"deviceId": "d0", "value1": 1})
+    registry.sync_device({"deviceId": "d0", "uid": "u0", "roomId": "r1"})
+    # 同步进行中读者看到的仍是同步前的完整注册表
+    assert [d["deviceId"] for d in registry.devices] == ["old"]
+    assert registry.get_state("d0") is None
+    assert registry.get_id_by_uid("u0") == ""
+
+    registry.end_sync(complete=True)
+    assert [d["deviceId"] for d in registry.devices] == ["d0"]
+    assert registry.get_state("d0") == {"deviceId": "d0", "value1": 1}
+    assert registry.get_state("old") is None
+    assert registry.get_id_by_uid("u0") == "d0"
+    assert registry.get_id_by_uid("u-old") == ""
+    assert registry.get_device_ids_in_room("r1") == {"d0"}
+    assert registry.get_device_ids_in_room("r0") == set()
+
+
+def test_incomplete_sync_keeps_existing_registry():
+    registry = _registry()
+    registry.begin_sync()
+    registry.sync_device({"deviceId": "d0", "uid": "u0"})
+    registry.sync_state({"deviceId": "d0", "value1": 1})
+    registry.end_sync(complete=False)
+    assert [d["deviceId"] for d in registry.devices] == ["old"]
+    assert registry.get_state("old") == {"deviceId": "old", "value1": 0}
+    assert registry.get_state("d0") is None
+
+
+def test_orphan_states_are_counted_and_logged(caplog):
+    registry = _registry()
+    registry.begin_sync()
+    registry.sync_device({"deviceId": "d0"})
+    registry.sync_state({"deviceId": "d0", "value1": 1})
+    registry.sync_state({"deviceId": "ghost", "value1": 1})
+    with caplog.at_level(logging.WARNING):
+        registry.end_sync(complete=True)
+    assert registry.sync_dropped_states == 1
+    assert "1条状态行" in caplog.text
+    assert registry.get_state("ghost") is None
+
+
+def test_parked_states_are_bounded(monkeypatch):
+    monkeypatch.setattr(registry_module, "HOMEPAGE_MAX_PARKED_STATES", 3)
+    registry = DeviceRegistry()
+    registry.begin_sync()
+    for i in range(5):
+        registry.sync_state({"deviceId": f"d{i}", "value1": i})
+    # 设备行到达后释放的暂存位置可以再次使用
+    registry.sync_device({"deviceId": "d0"})
+    registry.sync_state({"deviceId": "d9", "value1": 9})
+    registry.sync_device({"deviceId": "d9"})
+    registry.end_sync(complete=True)
+    assert sorted(s["deviceId"] for s in registry.states) == ["d0", "d9"]
+    # d3、d4超出上限被丢弃，d1、d2直到结束也没有设备行
+    assert registry.sync_dropped_states == 4
@@ -0,0 +1,111 @@
+"""SSL发送队列：唯一的发送任务合并写出，旧连接遗留的数据包不会被新连接发送"""
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+from ORVIBO_Device_Control.connection import ConnectionState
+from ORVIBO_Device_Control.const import SSL_WRITE_BATCH_SIZE
+from ORVIBO_Device_Control.packet import HomemateJsonData
+from ORVIBO_Device_Control.ssl_client import SSLClient
+
+SESSION_KEY = b"0123456789abcdef"
+
+
+def _client() -> SSLClient:
+    client = SSLClient(None, "localhost", 0, "user", "password", "family",
+                       lambda session_id: None, lambda *args: None)
+    client.state = ConnectionState.READY
+    client.session_id = "S" * 32
+    client.session_key = SESSION_KEY
+    client.writer = Mock(write=Mock(), drain=AsyncMock())
+    return client
+
+
+def _payload(index):
+    return HomemateJsonData.ssl_switch_control("user", f"d{index}", "a0b1c2d3e4f5", 0)
+
+
+def test_queued_packets_go_out_in_one_write():
+    async def main():
+        client = _client()
+        client._generation = 1
+        client._writer_task = asyncio.ensure_future(client._write_loop())
+        await asyncio.sleep(0)
+        # 发送任务被唤醒前已排队的数据包合并写出，每次最多SSL_WRITE_BATCH_SIZE个
+        count = SSL_WRITE_BATCH_SIZE + 8
+        sends = [asyncio.ensure_future(client._send_packet(_payload(i), SESSION_KEY)) for i in range(count)]
+        assert all(await asyncio.gather(*sends))
+        assert client.writer.write.call_count == 2
+        assert client.writer.drain.await_count == 2
+        client._writer_task.cancel()
+    asyncio.run(main())
+
+
+def test_packets_from_previous_connection_are_dropped():
+    async def main():
+        client = _client()
+        client._generation = 1
+        client._writer_task = asyncio.ensure_future(asyncio.Event().wait())
+        stale = asyncio.ensure_future(client._send_packet(_payload(0), SESSION_KEY))
+        await asyncio.sleep(0)
+        # 重连后发送任务只写出本代连接的数据包
+        client._writer_task.cancel()
+        client._generation = 2
+        client._writer_task = asyncio.ensure_future(client._write_loop())
+        assert await client._send_packet(_payload(1), SESSION_KEY)
+        assert await stale is False
+        client.writer.write.assert_called_once()
+        client._writer_task.cancel()
+    asyncio.run(main())
+
+
+def test_packet_waiting_on_full_queue_is_not_sent_after_reconnect():
+    async def main():
+        client = _client()
+        client._generation = 1
+        client._send_queue = asyncio.Queue(maxsize=1)
+        client._writer_task = asyncio.ensure_future(asyncio.Event().wait())
+        first = asyncio.ensure_future(client._send_packet(_payload(0), SESSION_KEY))
+        blocked = asyncio.ensure_future(client._send_packet(_payload(1), SESSION_KEY))
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        # 队列满时等待期间连接断开：旧数据包被清空，等待中的数据包入队后也不会发送
+        client._generation = 2
+        client._fail_queued()
+        assert await first is False
+        assert await blocked is False
+        client._writer_task.cancel()
+    asyncio.run(main())
+
+
+def test_write_failure_fails_batch_and_reports_lost_connection():
+    async def main():
+        client = _client()
+        client._generation = 1
+        client.writer.drain.side_effect = ConnectionResetError("reset")
+        client._writer_task = asyncio.ensure_future(client._write_loop())
+        sends = [asyncio.ensure_future(client._send_packet(_payload(i), SESSION_KEY)) for i in range(3)]
+        assert await asyncio.gather(*sends) == [False] * 3
+        assert client._lost_event.is_set()
+        assert client.state is ConnectionState.BACKOFF
+    asyncio.run(main())
+
+
+def test_in_flight_window_holds_back_further_commands():
+    async def main():
+        client = SSLClient(None, "localhost", 0, "user", "password", "family",
+                           lambda session_id: None, lambda *args: None, max_in_flight=2)
+        client.state = ConnectionState.READY
+        sent = []
+
+        async def send_packet(data, key):
+            sent.append(data["serial"])
+            return True
+
+        client._send_packet = send_packet
+        commands = [asyncio.ensure_future(client._send_command(_payload(i), timeout=0.1)) for i in range(5)]
+        await asyncio.sleep(0.05)
+        # 窗口已满，其余指令排队等待前面的指令应答或超时
+        assert len(sent) == 2
+        assert await asyncio.gather(*commands) == [None] * 5
+        assert len(sent) == 5
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""HTTPS请求签名：缓存HMAC状态与一次拼接的输出须与原逐字节实现完全一致
+
+期望值由优化前的 hmac_sha256 / create_sign 生成，写死在这里。
+"""
+import pytest
+
+from ORVIBO_Device_Control import functions
+from ORVIBO_Device_Control.const import SIGN_KEY
+from ORVIBO_Device_Control.functions import canonical_sign_string, hmac_sha256
+from ORVIBO_Device_Control.packet import HomemateJsonData
+
+# (参数, 密钥, 待签名字符串, 签名)
+SIGN_CASES = {
+    "login": (
+        {
+            "userName": "user@example.com",
+            "password": "E10ADC3949BA59ABBE56E057F20F883E",
+            "timestamp": 1700000000000,
+            "serial": 12345,
+            "familyId": "",
+        },
+        SIGN_KEY,
+        "password=E10ADC3949BA59ABBE56E057F20F883E&serial=12345&timestamp=1700000000000"
+        "&userName=user@example.com&key=nQ45RjPtOws96jmH",
+        "6CB79756A7A1582EEC88B8F1772BBE5B61C1480F53E246668B996C3011519C46",
+    ),
+    "non_ascii_and_empty": (
+        {"roomName": "客厅", "deviceName": "空调 ①", "empty": "", "none": None, "flag": False, "zero": 0},
+        SIGN_KEY,
+        "deviceName=空调 ①&flag=False&roomName=客厅&zero=0&key=nQ45RjPtOws96jmH",
+        "C25335AF12BFDEC2D6346F81FF9A4E8E6C0F4AEEE827A658D02F6D4C03F9CBCB",
+    ),
+    "other_key": (
+        {"a": "1", "b": "2"},
+        "k3y-with-ümlaut",
+        "a=1&b=2&key=k3y-with-ümlaut",
+        "AE3299EAFAEB0F194616362D3CC6F61CF592D79EF704435033E6992025AA4250",
+    ),
+    "no_params": (
+        {},
+        SIGN_KEY,
+        "key=nQ45RjPtOws96jmH",
+        "187EFA6A269678AAF21F75BD299AEF916CCA1C2ACCECD641804D12501FE40F78",
+    ),
+    "all_empty": (
+        {"x": "", "y": None},
+        "short",
+        "key=short",
+        "A9982BB5AA25D2EA1063D1857C31275DBDAB07471D26CC66AE662F736E9B6B5F",
+    ),
+}
+
+# (密钥, 数据, 签名)
+HMAC_CASES = [
+    (SIGN_KEY, "", "75C489463BFF26FA4B6E8AECC17B1E89AC0484AB6760B1EF5B0F44D68756A234"),
+    ("", "", "B613679A0814D9EC772F95D778C35FC5FF1697C493715653C6C712144292C5AD"),
+    ("密钥", "数据", "3A6A24A2A7B7F98E5BE6100BF436C715BB7C028103CD8F33637AF6C425DF73CB"),
+]
+
+
+@pytest.fixture(autouse=True)
+def _clear_hmac_cache():
+    # 每个用例都从空缓存开始，首次计算与复用缓存两条路径都会被覆盖
+    functions._HMAC_STATES.clear()
+    yield
+    functions._HMAC_STATES.clear()
+
+
+@pytest.mark.parametrize("params,key,sign_str,_sign", SIGN_CASES.values(), ids=SIGN_CASES.keys())
+def test_canonical_sign_string(params, key, sign_str, _sign):
+    assert canonical_sign_string(params, key) == sign_str
+
+
+@pytest.mark.parametrize("params,key,_sign_str,sign", SIGN_CASES.values(), ids=SIGN_CASES.keys())
+def test_create_sign(params, key, _sign_str, sign):
+    assert HomemateJsonData.create_sign(params, key) == sign
+
+
+@pytest.mark.parametrize("key,data,sign", HMAC_CASES)
+def test_hmac_sha256(key, data, sign):
+    assert hmac_sha256(key, data) == sign
+
+
+def test_reused_key_state_is_not_mutated():
+    """同一密钥重复签名、与其他密钥交替签名，结果都不受缓存状态影响"""
+    expected = {(key, data): sign for key, data, sign in HMAC_CASES}
+    for _ in range(3):
+        for (key, data), sign in expected.items():
+            assert hmac_sha256(key, data) == sign
+    assert set(functions._HMAC_STATES) == {key for key, _data in expected}
+
+    for _ in range(2):
+        for params, key, _sign_str, sign in SIGN_CASES.values():
+            assert HomemateJsonData.create_sign(params, key) == sign
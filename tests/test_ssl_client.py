@@ -0,0 +1,162 @@
+"""SSL客户端：响应匹配、心跳与存活判定"""
+import asyncio
+from unittest.mock import Mock
+
+from ORVIBO_Device_Control.connection import ConnectionState
+from ORVIBO_Device_Control.const import (
+    CMD_CONTROL, CMD_HEARTBEAT, CMD_STATE_UPDATE, SSL_HEARTBEAT_MAX_MISSES,
+)
+from ORVIBO_Device_Control.packet import HomemateJsonData
+from ORVIBO_Device_Control.ssl_client import SSLClient
+
+SESSION_KEY = b"0123456789abcdef"
+
+
+def _client(**kwargs) -> SSLClient:
+    client = SSLClient(None, "localhost", 0, "user", "password", "family",
+                       lambda session_id: None, lambda *args: None, **kwargs)
+    client.state = ConnectionState.READY
+    client.session_key = SESSION_KEY
+    return client
+
+
+def _control_payload():
+    return HomemateJsonData.ssl_switch_control("user", "d0", "a0b1c2d3e4f5", 0)
+
+
+async def _command_with_replies(client, payload, replies, delay=0.0):
+    """发送指令，写出后依次把replies交给监听路径，返回指令结果"""
+    async def send_packet(data, key):
+        async def deliver():
+            await asyncio.sleep(delay)
+            for reply in replies:
+                client._resolve_pending(reply)
+        asyncio.get_running_loop().create_task(deliver())
+        return True
+
+    client._send_packet = send_packet
+    return await client._send_command(payload, timeout=0.2)
+
+
+def test_push_reusing_serial_does_not_resolve_command():
+    async def main():
+        client = _client()
+        payload = _control_payload()
+        push = {"cmd": CMD_STATE_UPDATE, "serial": payload["serial"], "respByAcc": 1,
+                "deviceId": "d0", "value1": 0}
+        # 推送与其他命令的数据包恰好使用了同一serial：都不是该指令的应答，指令超时失败
+        other = {"cmd": CMD_HEARTBEAT, "serial": payload["serial"], "status": 0}
+        assert await _command_with_replies(client, payload, [push, other]) is None
+
+        payload = _control_payload()
+        push["serial"] = payload["serial"]
+        ack = {"cmd": CMD_CONTROL, "serial": payload["serial"], "status": 0}
+        assert await _command_with_replies(client, payload, [push, ack]) == 0
+        assert client._pending == {}
+    asyncio.run(main())
+
+
+def test_response_without_status_is_a_failure():
+    async def main():
+        client = _client()
+        payload = _control_payload()
+        reply = {"cmd": CMD_CONTROL, "serial": payload["serial"], "uid": "a0b1c2d3e4f5"}
+        assert await _command_with_replies(client, payload, [reply]) is None
+
+        payload = _control_payload()
+        reply = {"cmd": CMD_CONTROL, "serial": payload["serial"], "status": 1}
+        assert await _command_with_replies(client, payload, [reply]) == 1
+    asyncio.run(main())
+
+
+def test_heartbeat_bypasses_in_flight_window_and_rtt_starts_after_write():
+    async def main():
+        client = _client(max_in_flight=1)
+        # 控制指令占满并发窗口
+        await client._in_flight.acquire()
+        heartbeat = HomemateJsonData.ssl_heartbeat()
+
+        async def send_packet(data, key):
+            # 数据包在发送队列中等待0.2秒才写出
+            await asyncio.sleep(0.2)
+            asyncio.get_running_loop().call_later(
+                0.01, client._resolve_pending, {"cmd": CMD_HEARTBEAT, "serial": data["serial"]})
+            return True
+
+        client._send_packet = send_packet
+        response, rtt = await asyncio.wait_for(client._request(heartbeat, 1.0), 1.0)
+        assert response["serial"] == heartbeat["serial"]
+        assert rtt < 0.1
+    asyncio.run(main())
+
+
+def test_heartbeat_is_sent_while_window_is_full():
+    async def main():
+        client = _client(max_in_flight=1, heartbeat_interval=0.01, command_timeout=0.05)
+        await client._in_flight.acquire()
+        acks = []
+
+        async def send_packet(data, key):
+            asyncio.get_running_loop().call_later(
+                0.01, client._resolve_pending, {"cmd": CMD_HEARTBEAT, "serial": data["serial"]})
+            acks.append(data["serial"])
+            return True
+
+        client._send_packet = send_packet
+        task = asyncio.ensure_future(client._send_heartbeat())
+        await asyncio.sleep(0.1)
+        client.state = ConnectionState.DISCONNECTED
+        await asyncio.wait_for(task, 1)
+        assert acks
+        assert client._heartbeat.misses == 0 and client._heartbeat.last_rtt < 0.05
+    asyncio.run(main())
+
+
+def _heartbeat_client(answer_controls):
+    client = _client(heartbeat_interval=0.01, command_timeout=0.05)
+    client._liveness.on_dead = Mock()
+    client._liveness.start()
+    sent = []
+
+    async def send_packet(data, key):
+        # 心跳永远得不到应答；控制指令按answer_controls决定是否应答
+        sent.append(data["cmd"])
+        if data["cmd"] == CMD_CONTROL and answer_controls:
+            asyncio.get_running_loop().call_later(
+                0.01, client._resolve_pending, {"cmd": CMD_CONTROL, "serial": data["serial"], "status": 0})
+        return True
+
+    client._send_packet = send_packet
+    return client, sent
+
+
+async def _run_heartbeat(client, seconds):
+    async def controls():
+        while client.state is ConnectionState.READY:
+            await client._send_command(_control_payload(), timeout=0.05)
+
+    tasks = [asyncio.ensure_future(client._send_heartbeat()), asyncio.ensure_future(controls())]
+    await asyncio.sleep(seconds)
+    # 以断开连接结束循环，与实际断线时的退出路径一致
+    client.state = ConnectionState.DISCONNECTED
+    await asyncio.wait_for(asyncio.gather(*tasks), 1)
+    client._liveness.stop()
+
+
+def test_control_acks_count_as_liveness():
+    async def main():
+        client, sent = _heartbeat_client(answer_controls=True)
+        await _run_heartbeat(client, 0.4)
+        assert sent.count(CMD_HEARTBEAT) >= SSL_HEARTBEAT_MAX_MISSES + 1
+        assert client._heartbeat.misses == 0
+        client._liveness.on_dead.assert_not_called()
+    asyncio.run(main())
+
+
+def test_silent_link_expires_after_missed_heartbeats():
+    async def main():
+        client, _sent = _heartbeat_client(answer_controls=False)
+        await _run_heartbeat(client, 0.4)
+        assert client._heartbeat.misses >= SSL_HEARTBEAT_MAX_MISSES
+        client._liveness.on_dead.assert_called_once()
+    asyncio.run(main())
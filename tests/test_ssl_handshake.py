@@ -0,0 +1,110 @@
+"""SSL握手：hello/登录由响应事件驱动，不再固定等待；超时与握手中断开都立即结束本次尝试"""
+import asyncio
+import time
+from unittest.mock import Mock
+
+from ORVIBO_Device_Control.const import CMD_HELLO, CMD_LOGIN
+from ORVIBO_Device_Control.ssl_client import SSLClient
+
+SESSION_ID = "S" * 32
+
+
+def _client(reply_login=True, handshake_timeout=1.0) -> SSLClient:
+    hass = Mock()
+    hass.async_create_background_task = lambda coro, name=None: asyncio.get_running_loop().create_task(coro)
+    client = SSLClient(hass, "localhost", 0, "user", "password", "family",
+                       lambda session_id: None, lambda *args: None, handshake_timeout=handshake_timeout)
+    sent = []
+
+    async def connect():
+        return True
+
+    async def listen():
+        await asyncio.Event().wait()
+
+    async def send_packet(data, key):
+        # 服务器在一个往返后应答hello与登录
+        sent.append(data["cmd"])
+        loop = asyncio.get_running_loop()
+        if data["cmd"] == CMD_HELLO:
+            client.session_id = SESSION_ID
+            loop.call_later(0.01, loop.create_task, client._handle_hello({"key": "0123456789abcdef"}))
+        elif data["cmd"] == CMD_LOGIN and reply_login:
+            loop.call_later(0.01, loop.create_task, client._handle_login({"userId": "u"}))
+        return True
+
+    client._connect = connect
+    client._listen_loop = listen
+    client._send_packet = send_packet
+    client.sent = sent
+    return client
+
+
+async def _establish(client):
+    started = time.monotonic()
+    try:
+        return await client._establish(), time.monotonic() - started
+    finally:
+        client._listening_task.cancel()
+
+
+def test_handshake_completes_after_one_round_trip():
+    async def main():
+        client = _client()
+        ok, elapsed = await _establish(client)
+        assert ok
+        assert client.sent == [CMD_HELLO, CMD_LOGIN]
+        assert client.session_key == b"0123456789abcdef"
+        assert client.get_key(SESSION_ID) == b"0123456789abcdef"
+        # 原实现hello后固定等待3秒
+        assert elapsed < 0.5
+    asyncio.run(main())
+
+
+def test_unanswered_login_times_out():
+    async def main():
+        client = _client(reply_login=False, handshake_timeout=0.1)
+        ok, elapsed = await _establish(client)
+        assert not ok
+        assert 0.1 <= elapsed < 0.5
+    asyncio.run(main())
+
+
+def test_failed_login_fails_without_waiting():
+    async def main():
+        client = _client(reply_login=False)
+        send_packet = client._send_packet
+
+        async def reject_login(data, key):
+            if data["cmd"] == CMD_LOGIN:
+                asyncio.get_running_loop().create_task(client._handle_login({"status": 1, "msg": "denied"}))
+                return True
+            return await send_packet(data, key)
+
+        client._send_packet = reject_login
+        ok, elapsed = await _establish(client)
+        assert not ok
+        assert elapsed < 0.5
+    asyncio.run(main())
+
+
+def test_connection_lost_during_handshake_ends_attempt():
+    async def main():
+        client = _client(reply_login=False)
+        asyncio.get_running_loop().call_later(0.05, client._connection_lost, "连接被重置")
+        ok, elapsed = await _establish(client)
+        assert not ok
+        assert elapsed < 0.5
+    asyncio.run(main())
+
+
+def test_wait_ready_returns_once_logged_in():
+    async def main():
+        client = _client()
+        started = time.monotonic()
+        assert await client.wait_ready()
+        assert time.monotonic() - started < 0.5
+        assert client.is_ready
+        await client.disconnect()
+        assert not client.is_ready
+    asyncio.run(main())